@@ -2,10 +2,11 @@ from logging.config import fileConfig
 from sqlalchemy import engine_from_config, pool
 from alembic import context
 from app.db.models import Base
-from app.core.config import settings
+from app.db.database import DATABASE_URL
 
 config = context.config
-config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+# The app's own URL: same fallback and postgres:// handling as the running service
+config.set_main_option("sqlalchemy.url", DATABASE_URL)
 
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
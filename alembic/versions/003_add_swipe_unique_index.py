@@ -0,0 +1,31 @@
+"""Add unique swiper/swiped index to swipes
+
+Revision ID: 003
+Revises: a61e77fd540c
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = 'a61e77fd540c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the oldest swipe of any duplicated pair before enforcing uniqueness
+    op.execute("""
+        DELETE FROM swipes s
+        USING swipes d
+        WHERE s.swiper_id = d.swiper_id
+          AND s.swiped_id = d.swiped_id
+          AND (s.created_at, s.id) > (d.created_at, d.id)
+    """)
+    op.create_unique_constraint('uq_swipes_swiper_swiped', 'swipes', ['swiper_id', 'swiped_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_swipes_swiper_swiped', 'swipes', type_='unique')
@@ -0,0 +1,23 @@
+"""Add (chat_id, created_at) index to messages
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_messages_chat_id_created_at', 'messages', ['chat_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_chat_id_created_at', table_name='messages')
@@ -0,0 +1,37 @@
+"""Add audit_events for the batched security audit sink
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('audit_events',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('ip_address', sa.String(), nullable=True),
+    sa.Column('user_agent', sa.String(), nullable=True),
+    sa.Column('details', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_audit_events_created_at', 'audit_events', ['created_at'])
+    op.create_index('ix_audit_events_user_id_created_at', 'audit_events', ['user_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_events_user_id_created_at', table_name='audit_events')
+    op.drop_index('ix_audit_events_created_at', table_name='audit_events')
+    op.drop_table('audit_events')
@@ -0,0 +1,43 @@
+"""Add users.email_bidx blind index and backfill it
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.core.encryption import data_encryption
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('email_bidx', sa.String(length=64), nullable=True))
+
+    # Digests are computed over the plaintext; decrypt() passes plaintext through
+    conn = op.get_bind()
+    users = sa.table('users', sa.column('id'), sa.column('email'), sa.column('email_bidx'))
+    while True:
+        rows = conn.execute(
+            sa.select(users.c.id, users.c.email).where(users.c.email_bidx.is_(None)).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            users.update().where(users.c.id == sa.bindparam('user_id')).values(email_bidx=sa.bindparam('bidx')),
+            [{'user_id': row.id, 'bidx': data_encryption.blind_index(data_encryption.decrypt(row.email))} for row in rows]
+        )
+
+    op.create_index(op.f('ix_users_email_bidx'), 'users', ['email_bidx'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_email_bidx'), table_name='users')
+    op.drop_column('users', 'email_bidx')
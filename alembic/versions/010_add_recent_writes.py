@@ -0,0 +1,27 @@
+"""Add recent_writes for read-your-writes across workers
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('recent_writes',
+    sa.Column('subject', sa.String(), nullable=False),
+    sa.Column('written_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('subject')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('recent_writes')
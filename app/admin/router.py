@@ -2,9 +2,16 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_
 from app.db.database import get_db
+from app.db.replicas import get_read_db
 from app.db.models import User, Match, Message, Swipe, WantedPost
 from app.auth.dependencies import get_current_user, get_admin_user
+from app.auth import crud
+from app.auth.principal import principal_cache
+from app.core.token_cache import token_cache
+from app.core.revocation import revocation_store
 from app.admin import schemas
+from app.matching.ann import creator_index
+from app.matching.deck import deck_manager
 from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -14,7 +21,7 @@ def check_admin(current_user):
         raise HTTPException(status_code=403, detail="Admin access required")
 
 @router.get("/users")
-def get_all_users(db: Session = Depends(get_db), admin_user = Depends(get_admin_user)):
+def get_all_users(db: Session = Depends(get_read_db), admin_user = Depends(get_admin_user)):
     
     users = db.query(User).order_by(User.created_at.desc()).limit(100).all()
     result = []
@@ -44,7 +51,7 @@ def get_all_users(db: Session = Depends(get_db), admin_user = Depends(get_admin_
     return result
 
 @router.get("/metrics", response_model=schemas.PlatformMetrics)
-def get_platform_metrics(db: Session = Depends(get_db), admin_user = Depends(get_admin_user)):
+def get_platform_metrics(db: Session = Depends(get_read_db), admin_user = Depends(get_admin_user)):
     
     total_users = db.query(User).count()
     
@@ -75,6 +82,18 @@ def moderate_user(user_id: str, action: str, db: Session = Depends(get_db), admi
         user.is_active = True
     
     db.commit()
+    principal_cache.invalidate(user.email)
+    
+    if action == "suspend":
+        # Tokens already issued must stop working, not just new logins
+        revocation_store.revoke_subject(user.email)
+        creator_index.remove(user.id)
+        deck_manager.exclude_creator(user.id)
+    elif action == "activate":
+        if user.onboarding_completed and user.profile:
+            creator_index.upsert(user.id, user.profile)
+        deck_manager.include_creator(user.id)
+    
     return {"success": True, "message": f"User {action}d successfully"}
 
 @router.post("/feature/user/{user_id}")
@@ -82,7 +101,7 @@ def feature_user(user_id: str, db: Session = Depends(get_db), admin_user = Depen
     return {"success": True, "message": f"User {user_id} featured"}
 
 @router.get("/dashboard")
-def get_dashboard(db: Session = Depends(get_db), admin_user = Depends(get_admin_user)):
+def get_dashboard(db: Session = Depends(get_read_db), admin_user = Depends(get_admin_user)):
     
     today = datetime.utcnow().date()
     today_start = datetime.combine(today, datetime.min.time())
@@ -96,4 +115,18 @@ def get_dashboard(db: Session = Depends(get_db), admin_user = Depends(get_admin_
         "total_users": db.query(User).count(),
         "total_matches": db.query(Match).count(),
         "total_messages": db.query(Message).count()
-    }
\ No newline at end of file
+    }
+
+@router.get("/password-hashes")
+def get_password_hash_stats(db: Session = Depends(get_read_db), admin_user = Depends(get_admin_user)):
+    total = db.query(User).count()
+    legacy = crud.count_legacy_hashes(db)
+    return {"total": total, "legacy": legacy, "current": total - legacy}
+
+@router.get("/auth-cache")
+def get_auth_cache_stats(admin_user = Depends(get_admin_user)):
+    return {
+        "verified_tokens": token_cache.stats(),
+        "principals": principal_cache.cache.stats(),
+        "revocation": revocation_store.stats()
+    }
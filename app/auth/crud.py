@@ -1,14 +1,24 @@
+from typing import Optional
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from app.db.models import User
 from app.auth.schemas import UserCreate
-from app.core.security import get_password_hash, verify_password
+from app.core.encryption import data_encryption
+from app.core.security import get_password_hash, verify_password, needs_rehash, BCRYPT_PREFIXES
 
 def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+    # Blind index: stays an index probe when ENCRYPT_PII stores email encrypted
+    user = db.query(User).filter(User.email_bidx == data_encryption.blind_index(email)).first()
+    if user is None:
+        # Rows written around the ORM (raw SQL, or before migration 009 ran) have
+        # no digest yet; their plaintext email still matches
+        user = db.query(User).filter(User.email_bidx.is_(None), User.email == email).first()
+    return user
 
-def create_user(db: Session, user: UserCreate):
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None):
     from app.db.models import UserPlan
-    hashed_password = get_password_hash(user.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = User(
         email=user.email, 
         password_hash=hashed_password,
@@ -24,10 +34,24 @@ def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email)
     if not user or not verify_password(password, user.password_hash):
         return False
+    if needs_rehash(user.password_hash):
+        upgrade_password_hash(db, user, get_password_hash(password))
     return user
 
-def update_user_password(db: Session, user: User, new_password: str):
-    user.password_hash = get_password_hash(new_password)
+def upgrade_password_hash(db: Session, user: User, hashed_password: str):
+    """Replace a legacy hash after a successful login"""
+    user.password_hash = hashed_password
+    db.commit()
+
+def count_legacy_hashes(db: Session) -> int:
+    return db.query(User).filter(
+        or_(*(User.password_hash.startswith(prefix) for prefix in BCRYPT_PREFIXES))
+    ).count()
+
+def update_user_password(db: Session, user: User, new_password: str, hashed_password: Optional[str] = None):
+    from app.auth.principal import principal_cache
+    user.password_hash = hashed_password or get_password_hash(new_password)
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate(user.email)
     return user
\ No newline at end of file
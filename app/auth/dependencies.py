@@ -2,33 +2,50 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.db.database import get_db
+from app.db.replicas import current_subject
+from app.db.models import User
 from app.core.security import verify_token
-from app.auth.crud import get_user_by_email
+from app.core.revocation import revocation_store
+from app.auth.principal import UserPrincipal, principal_cache
 
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> UserPrincipal:
+    # Async so authenticating does not take a threadpool slot per request
     payload = verify_token(credentials.credentials)
-    if payload is None:
-        raise credentials_exception
+    if payload is None or await revocation_store.is_revoked_async(payload):
+        raise _credentials_exception()
     
     email: str = payload.get("sub")
     if email is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
-    user = get_user_by_email(db, email=email)
+    # Only a cache miss reaches the database
+    user = await principal_cache.get_async(email)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
+    # Lets commits made for this request keep the user's reads on the primary
+    current_subject.set(email)
+    return user
+
+def get_current_db_user(
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """The authenticated user as an ORM row, for routes that modify it"""
+    user = db.get(User, current_user.id)
+    if user is None:
+        raise _credentials_exception()
     return user
 
 def get_admin_user(
@@ -39,4 +56,4 @@ def get_admin_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
         )
-    return current_user
\ No newline at end of file
+    return current_user
@@ -0,0 +1,93 @@
+"""
+Authenticated Principal for Collapp
+Cached, detached view of the user behind a token
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.auth.crud import get_user_by_email
+from app.core.cache import TTLCache
+from app.db.database import AsyncSessionLocal
+
+PRINCIPAL_TTL_SECONDS = 30   # bounds staleness of changes made through other workers
+MAX_PRINCIPALS = 10000
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """The user fields routers read; never attached to a session"""
+    id: uuid.UUID
+    email: str
+    name: Optional[str]
+    bio: Optional[str]
+    profile_photo: Optional[str]
+    onboarding_completed: bool
+    plan: Optional[str]
+    is_active: bool
+    is_admin: bool
+    email_verified: bool
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user) -> "UserPrincipal":
+        plan = getattr(user.plan, "value", user.plan)
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            bio=user.bio,
+            profile_photo=user.profile_photo,
+            onboarding_completed=bool(user.onboarding_completed),
+            plan=plan,
+            is_active=bool(user.is_active),
+            is_admin=bool(user.is_admin),
+            email_verified=bool(user.email_verified),
+            created_at=user.created_at
+        )
+
+
+class PrincipalCache:
+    """Token subject (email) -> UserPrincipal, loaded from the database on a miss"""
+
+    def __init__(self, maxsize: int = MAX_PRINCIPALS, ttl: float = PRINCIPAL_TTL_SECONDS, async_session_factory=AsyncSessionLocal):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.async_session_factory = async_session_factory
+
+    def get(self, db: Session, email: str) -> Optional[UserPrincipal]:
+        principal = self.cache.get(email)
+        if principal is not None:
+            return principal
+
+        user = get_user_by_email(db, email=email)
+        if user is None:
+            return None
+        principal = UserPrincipal.from_user(user)
+        self.cache.set(email, principal)
+        return principal
+
+    async def get_async(self, email: str) -> Optional[UserPrincipal]:
+        """get() for async callers; a session is only opened on a cache miss"""
+        principal = self.cache.get(email)
+        if principal is not None:
+            return principal
+
+        async with self.async_session_factory() as db:
+            user = await db.run_sync(get_user_by_email, email)
+        if user is None:
+            return None
+        principal = UserPrincipal.from_user(user)
+        self.cache.set(email, principal)
+        return principal
+
+    def invalidate(self, email: str):
+        self.cache.pop(email)
+
+    def invalidate_user(self, user_id):
+        """Forget a user when only the id is at hand"""
+        self.cache.discard_where(lambda _, principal: str(principal.id) == str(user_id))
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache()
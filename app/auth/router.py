@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.db.database import get_db
 from app.auth import schemas, crud
-from app.core.security import create_access_token, create_refresh_token
-from app.auth.dependencies import get_current_user
+from app.core.security import create_access_token, create_refresh_token, needs_rehash, verify_token
+from app.core.revocation import revocation_store
+from app.auth.dependencies import get_current_user, security
+from app.core.hashing import password_hasher, PasswordHasherBusy
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,9 +15,10 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/register", response_model=schemas.UserResponse)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    # Hashing runs in the password hasher pool, database work in the threadpool
     logger.info(f"Registration attempt: {user.email}")
-    db_user = crud.get_user_by_email(db, email=user.email)
+    db_user = await run_in_threadpool(crud.get_user_by_email, db, user.email)
     if db_user:
         logger.warning(f"Registration attempt with existing email: {user.email}")
         raise HTTPException(
@@ -21,17 +26,20 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
             detail="Email already registered"
         )
     
-    created_user = crud.create_user(db=db, user=user)
+    hashed_password = await password_hasher.hash(user.password)
+    created_user = await run_in_threadpool(crud.create_user, db, user, hashed_password)
     logger.info(f"New user registered: {created_user.email}")
     return created_user
 
 @router.post("/login", response_model=schemas.Token)
-def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
     # Limpar email se tiver mailto:
     clean_email = user_credentials.email.replace('mailto:', '') if user_credentials.email.startswith('mailto:') else user_credentials.email
     logger.info(f"Login attempt - Original: {user_credentials.email}, Clean: {clean_email}")
     
-    user = crud.authenticate_user(db, clean_email, user_credentials.password)
+    user = await run_in_threadpool(crud.get_user_by_email, db, clean_email)
+    if user and not await password_hasher.verify(user_credentials.password, user.password_hash):
+        user = None
     if not user:
         logger.warning(f"Failed login attempt for email: {user_credentials.email}")
         raise HTTPException(
@@ -40,16 +48,42 @@ def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(data={"sub": user.email})
-    refresh_token = create_refresh_token(data={"sub": user.email})
+    # Read before the hash upgrade commits: the commit expires the instance, and
+    # reloading it here would be a blocking query on the event loop
+    email = user.email
+    if needs_rehash(user.password_hash):
+        # Migrate legacy (bcrypt) hashes while the plain password is at hand
+        try:
+            hashed_password = await password_hasher.hash(user_credentials.password)
+            await run_in_threadpool(crud.upgrade_password_hash, db, user, hashed_password)
+        except PasswordHasherBusy:
+            logger.info(f"Hash upgrade postponed for user: {email}")
     
-    logger.info(f"Successful login for user: {user.email}")
+    access_token = create_access_token(data={"sub": email})
+    refresh_token = create_refresh_token(data={"sub": email})
+    
+    logger.info(f"Successful login for user: {email}")
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
         "token_type": "bearer"
     }
 
+@router.post("/logout")
+def logout(
+    request: schemas.LogoutRequest = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user = Depends(get_current_user)
+):
+    revocation_store.revoke_token(verify_token(credentials.credentials))
+    if request and request.refresh_token:
+        refresh_payload = verify_token(request.refresh_token)
+        if refresh_payload and refresh_payload.get("sub") == current_user.email:
+            revocation_store.revoke_token(refresh_payload)
+    
+    logger.info(f"User logged out: {current_user.email}")
+    return {"message": "Logged out"}
+
 @router.get("/me", response_model=schemas.UserResponse)
 def read_users_me(current_user = Depends(get_current_user)):
     return current_user
@@ -80,10 +114,11 @@ def forgot_password(request: schemas.PasswordResetRequest, db: Session = Depends
     return {"message": "Se o email existir, um link de redefinição foi enviado"}
 
 @router.post("/reset-password")
-def reset_password(request: schemas.PasswordReset, db: Session = Depends(get_db)):
+async def reset_password(request: schemas.PasswordReset, db: Session = Depends(get_db)):
     try:
-        from app.core.security import verify_token
         payload = verify_token(request.token)
+        if payload is None or await run_in_threadpool(revocation_store.is_revoked, payload):
+            raise HTTPException(status_code=400, detail="Invalid or expired token")
         
         if payload.get("type") != "password_reset":
             raise HTTPException(status_code=400, detail="Invalid token type")
@@ -92,15 +127,20 @@ def reset_password(request: schemas.PasswordReset, db: Session = Depends(get_db)
         if not email:
             raise HTTPException(status_code=400, detail="Invalid token")
         
-        user = crud.get_user_by_email(db, email)
+        user = await run_in_threadpool(crud.get_user_by_email, db, email)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        crud.update_user_password(db, user, request.new_password)
+        hashed_password = await password_hasher.hash(request.new_password)
+        await run_in_threadpool(crud.update_user_password, db, user, request.new_password, hashed_password)
+        # Sessions opened with the old password, and this reset token, stop working
+        await run_in_threadpool(revocation_store.revoke_subject, user.email)
         logger.info(f"Password reset successful for user: {user.email}")
         
         return {"message": "Password reset successful"}
         
+    except PasswordHasherBusy:
+        raise
     except Exception as e:
         logger.error(f"Password reset error: {str(e)}")
         raise HTTPException(status_code=400, detail="Invalid or expired token")
\ No newline at end of file
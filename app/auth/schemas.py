@@ -48,6 +48,9 @@ class Token(BaseModel):
     refresh_token: str
     token_type: str = "bearer"
 
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 class TokenData(BaseModel):
     email: Optional[str] = None
 
@@ -6,8 +6,10 @@ from typing import Optional
 from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.core.security_enhanced import security_manager
 from app.core.audit import audit, SecurityEventType
+from app.core.revocation import revocation_store
 from app.db.database import get_db
 from app.auth.crud import get_user_by_email
 import logging
@@ -24,7 +26,21 @@ class EnhancedAuthService:
         self.failed_attempts = {}
         self.locked_accounts = {}
     
-    def authenticate_user(
+    async def authenticate_user(
+        self, 
+        email: str, 
+        password: str, 
+        ip_address: str,
+        user_agent: str,
+        db: Session
+    ):
+        """Authenticate user with enhanced security and equalized response time"""
+        async with security_manager.login_deadline():
+            return await run_in_threadpool(
+                self._authenticate_user, email, password, ip_address, user_agent, db
+            )
+    
+    def _authenticate_user(
         self, 
         email: str, 
         password: str, 
@@ -32,7 +48,6 @@ class EnhancedAuthService:
         user_agent: str,
         db: Session
     ):
-        """Authenticate user with enhanced security"""
         
         # Check if account is locked
         if self._is_account_locked(email):
@@ -165,12 +180,20 @@ async def get_current_user_secure(
     
     # Verify token
     payload = security_manager.verify_token(credentials.credentials)
-    if not payload:
+    if payload and await run_in_threadpool(revocation_store.is_revoked, payload):
+        audit.log_security_event(
+            SecurityEventType.PERMISSION_DENIED,
+            ip_address=ip_address,
+            details={"reason": "revoked_token"}
+        )
+        payload = None
+    elif not payload:
         audit.log_security_event(
             SecurityEventType.PERMISSION_DENIED,
             ip_address=ip_address,
             details={"reason": "invalid_token"}
         )
+    if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
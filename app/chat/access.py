@@ -0,0 +1,98 @@
+"""
+Chat Access Control for Collapp
+Resolves and caches who may read and write each chat
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import FrozenSet, Optional
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.db.models import Chat, Match, WantedPost, WantedApplication
+
+
+@dataclass(frozen=True)
+class ChatParticipants:
+    """A chat row together with the IDs of every user allowed in it"""
+    id: str
+    match_id: Optional[str]
+    wanted_id: Optional[str]
+    created_at: Optional[datetime]
+    user_ids: FrozenSet[str]
+
+
+class ChatParticipantsResolver:
+    """Cached chat_id -> participants lookup, populated by a single query"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def resolve(self, db: Session, chat_id: str, refresh: bool = False) -> Optional[ChatParticipants]:
+        """Return the chat's participants, or None if the chat does not exist"""
+        chat_id = str(chat_id)
+        if not refresh:
+            cached = self.cache.get(chat_id)
+            if cached is not None:
+                return cached
+
+        rows = db.query(
+            Chat.id, Chat.match_id, Chat.wanted_id, Chat.created_at,
+            Match.user_a_id, Match.user_b_id,
+            WantedPost.author_id, WantedApplication.applicant_id
+        ).outerjoin(
+            Match, Match.id == Chat.match_id
+        ).outerjoin(
+            WantedPost, WantedPost.id == Chat.wanted_id
+        ).outerjoin(
+            WantedApplication, WantedApplication.wanted_post_id == Chat.wanted_id
+        ).filter(Chat.id == chat_id).all()
+        if not rows:
+            return None
+
+        first = rows[0]
+        user_ids = set()
+        for row in rows:
+            if first.match_id:
+                # Match chats belong to both sides of the match
+                user_ids.update((row.user_a_id, row.user_b_id))
+            elif first.wanted_id:
+                # Wanted chats belong to the author and every applicant
+                user_ids.update((row.author_id, row.applicant_id))
+        user_ids.discard(None)
+
+        participants = ChatParticipants(
+            id=str(first.id),
+            match_id=str(first.match_id) if first.match_id else None,
+            wanted_id=str(first.wanted_id) if first.wanted_id else None,
+            created_at=first.created_at,
+            user_ids=frozenset(str(user_id) for user_id in user_ids)
+        )
+        self.cache.set(chat_id, participants)
+        return participants
+
+    def authorize(self, db: Session, chat_id: str, user_id) -> Optional[bool]:
+        """True/False for access, None if the chat does not exist"""
+        participants = self.resolve(db, chat_id)
+        if participants is None:
+            return None
+        if str(user_id) in participants.user_ids:
+            return True
+        # Re-check a denial in case another worker just added the user
+        participants = self.resolve(db, chat_id, refresh=True)
+        if participants is None:
+            return None
+        return str(user_id) in participants.user_ids
+
+    def invalidate(self, chat_id: str):
+        self.cache.pop(str(chat_id))
+
+    def invalidate_wanted(self, wanted_id: str):
+        """Forget chats of a wanted post (new or accepted application)"""
+        self.cache.discard_where(lambda _, p: p.wanted_id == str(wanted_id))
+
+    def invalidate_match(self, match_id: str):
+        """Forget chats of a match that changed"""
+        self.cache.discard_where(lambda _, p: p.match_id == str(match_id))
+
+
+# Global chat access resolver
+chat_access = ChatParticipantsResolver()
@@ -0,0 +1,167 @@
+"""
+Real-time Chat Hub for Collapp
+Fans new messages out to WebSocket subscribers, optionally across workers
+"""
+import asyncio
+import json
+import select
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional, Set
+from fastapi import WebSocket
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.engine import make_url
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_PAYLOAD_LIMIT = 7900  # Postgres rejects NOTIFY payloads of 8000 bytes or more
+
+Deliver = Callable[[str, Dict[str, Any]], None]
+
+
+class LocalBroker:
+    """In-process broker: single worker deployments and tests"""
+
+    def __init__(self):
+        self.deliver: Optional[Deliver] = None
+
+    def start(self, deliver: Deliver):
+        self.deliver = deliver
+
+    def publish(self, chat_id: str, payload: Dict[str, Any]):
+        if self.deliver:
+            self.deliver(chat_id, payload)
+
+    def stop(self):
+        self.deliver = None
+
+
+class PostgresBroker:
+    """Cross-worker broker built on Postgres LISTEN/NOTIFY"""
+
+    channel = "chat_messages"
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.deliver: Optional[Deliver] = None
+        self.publish_conn = None
+        self.publish_lock = threading.Lock()
+        self.listener: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+
+    def start(self, deliver: Deliver):
+        self.deliver = deliver
+        if self.listener is None:
+            self.listener = threading.Thread(target=self._listen, name="chat-hub-listener", daemon=True)
+            self.listener.start()
+
+    def publish(self, chat_id: str, payload: Dict[str, Any]):
+        data = json.dumps({"chat_id": chat_id, "payload": payload})
+        if len(data.encode()) > NOTIFY_PAYLOAD_LIMIT:
+            # Clients fetch the full message over REST when flagged as truncated
+            payload = dict(payload, content=None, truncated=True)
+            data = json.dumps({"chat_id": chat_id, "payload": payload})
+        with self.publish_lock:
+            try:
+                if self.publish_conn is None or self.publish_conn.closed:
+                    self.publish_conn = self._connect()
+                with self.publish_conn.cursor() as cur:
+                    cur.execute("SELECT pg_notify(%s, %s)", (self.channel, data))
+            except Exception as e:
+                logger.error(f"Chat hub publish failed: {e}")
+                self.publish_conn = None
+
+    def stop(self):
+        self.stopping.set()
+        with self.publish_lock:
+            if self.publish_conn is not None:
+                self.publish_conn.close()
+                self.publish_conn = None
+
+    def _connect(self):
+        import psycopg2
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    def _listen(self):
+        while not self.stopping.is_set():
+            try:
+                conn = self._connect()
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.channel}")
+                while not self.stopping.is_set():
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        event = json.loads(notify.payload)
+                        if self.deliver:
+                            self.deliver(event["chat_id"], event["payload"])
+                conn.close()
+            except Exception as e:
+                logger.error(f"Chat hub listener error, reconnecting: {e}")
+                self.stopping.wait(1)
+
+
+class ChatHub:
+    """Per-process registry of WebSocket subscribers keyed by chat_id"""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.connections: Dict[str, Set[WebSocket]] = defaultdict(set)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.lock = threading.Lock()
+
+    def connect(self, chat_id: str, websocket: WebSocket):
+        """Subscribe an accepted, authenticated socket (call from the event loop)"""
+        if self.loop is None:
+            self.broker.start(self._deliver)
+        self.loop = asyncio.get_running_loop()
+        with self.lock:
+            self.connections[chat_id].add(websocket)
+
+    def disconnect(self, chat_id: str, websocket: WebSocket):
+        with self.lock:
+            subscribers = self.connections.get(chat_id)
+            if subscribers is not None:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del self.connections[chat_id]
+
+    def publish(self, chat_id: str, message: Dict[str, Any]):
+        """Publish a new message (safe to call from sync route threads)"""
+        self.broker.publish(str(chat_id), jsonable_encoder(message))
+
+    def close(self):
+        self.broker.stop()
+
+    def _deliver(self, chat_id: str, payload: Dict[str, Any]):
+        # Brokers call this from request or listener threads
+        if self.loop is None or not self.connections.get(chat_id):
+            return
+        asyncio.run_coroutine_threadsafe(self._broadcast(chat_id, payload), self.loop)
+
+    async def _broadcast(self, chat_id: str, payload: Dict[str, Any]):
+        with self.lock:
+            subscribers = list(self.connections.get(chat_id, ()))
+        for websocket in subscribers:
+            try:
+                await websocket.send_json({"type": "message", "message": payload})
+            except Exception:
+                self.disconnect(chat_id, websocket)
+
+
+def _create_broker():
+    if settings.CHAT_HUB_BACKEND == "postgres":
+        from app.db.database import DATABASE_URL
+        dsn = make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresBroker(dsn)
+    return LocalBroker()
+
+
+# Global chat hub instance
+chat_hub = ChatHub(_create_broker())
@@ -1,139 +1,97 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from app.db.database import get_db
-from app.db.models import User, Chat, Message, Match, WantedPost, WantedApplication
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import or_, and_, case, select
+from app.db.database import get_db, get_async_db, SessionLocal
+from app.db.models import User, Message, Match, WantedPost, WantedApplication, ChatSummary, ChatParticipant
 from app.chat.schemas import MessageCreate, MessageResponse, ChatResponse
+from app.chat.hub import chat_hub
+from app.chat.access import chat_access
+from app.chat import summaries
+from app.core.security import verify_token
+from app.core.revocation import revocation_store
+from app.auth.crud import get_user_by_email
 import logging
 from app.auth.dependencies import get_current_user
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+DEFAULT_PAGE_SIZE = 30
+MAX_PAGE_SIZE = 100
+WS_AUTH_TIMEOUT_SECONDS = 10
+
+FALLBACK_NAMES = {summaries.ROLE_AUTHOR: "Autor", summaries.ROLE_APPLICANT: "Aplicante"}
+
 @router.get("/chats", response_model=List[ChatResponse])
 def get_user_chats(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    result = []
-    
-    # Only get chats where current user is involved
-    
-    # 1. Chats from applications current user made
-    applications = db.query(WantedApplication).filter(
-        WantedApplication.applicant_id == current_user.id
+    # Single read of the inbox read model, newest activity first
+    me = aliased(ChatParticipant)
+    other = aliased(ChatParticipant)
+    other_user = aliased(User)
+    sender = aliased(User)
+    rows = db.query(
+        ChatSummary, me.unread_count, other.user_id, other.role, other_user.name, sender.id, sender.name
+    ).select_from(me).join(
+        ChatSummary, ChatSummary.chat_id == me.chat_id
+    ).join(
+        other, and_(other.chat_id == me.chat_id, other.user_id != me.user_id)
+    ).outerjoin(
+        other_user, other_user.id == other.user_id
+    ).outerjoin(
+        sender, sender.id == ChatSummary.last_sender_id
+    ).filter(
+        me.user_id == current_user.id,
+        # The inbox lists wanted post conversations
+        ChatSummary.wanted_id.isnot(None)
+    ).order_by(
+        me.last_activity_at.desc(), me.chat_id,
+        case((other.role == summaries.ROLE_AUTHOR, 0), else_=1), other.created_at, other.user_id
     ).all()
     
-    for app in applications:
-        chat = db.query(Chat).filter(Chat.wanted_id == app.wanted_post_id).first()
-        if chat:
-            wanted_post = db.query(WantedPost).filter(WantedPost.id == app.wanted_post_id).first()
-            if wanted_post:
-                author = db.query(User).filter(User.id == wanted_post.author_id).first()
-                if author:
-                    last_message = db.query(Message).filter(
-                        Message.chat_id == chat.id
-                    ).order_by(Message.created_at.desc()).first()
-                    
-                    last_msg_response = None
-                    if last_message:
-                        sender = db.query(User).filter(User.id == last_message.sender_id).first()
-                        last_msg_response = MessageResponse(
-                            id=str(last_message.id),
-                            chat_id=str(last_message.chat_id),
-                            sender={"id": str(last_message.sender_id), "name": sender.name if sender else "Usuário"},
-                            content=last_message.content,
-                            message_type=last_message.message_type,
-                            created_at=last_message.created_at
-                        )
-                    
-                    result.append(ChatResponse(
-                        id=str(chat.id),
-                        match_id=None,
-                        wanted_id=wanted_post.id,
-                        participants=[
-                            {"id": str(current_user.id), "name": current_user.name or "Usuário"},
-                            {"id": str(author.id), "name": author.name or "Autor"}
-                        ],
-                        last_message=last_msg_response,
-                        created_at=chat.created_at
-                    ))
-    
-    # 2. Chats from wanted posts current user created (where others applied)
-    user_posts = db.query(WantedPost).filter(WantedPost.author_id == current_user.id).all()
-    for post in user_posts:
-        # Get all applications to this post
-        applications_to_post = db.query(WantedApplication).filter(
-            WantedApplication.wanted_post_id == post.id
-        ).all()
+    result = []
+    seen = set()
+    for summary, unread_count, other_id, other_role, other_name, sender_id, sender_name in rows:
+        # One counterpart per chat: the author, or the first applicant
+        if summary.chat_id in seen:
+            continue
+        seen.add(summary.chat_id)
         
-        for app in applications_to_post:
-            chat = db.query(Chat).filter(Chat.wanted_id == post.id).first()
-            if chat:
-                applicant = db.query(User).filter(User.id == app.applicant_id).first()
-                if applicant:
-                    last_message = db.query(Message).filter(
-                        Message.chat_id == chat.id
-                    ).order_by(Message.created_at.desc()).first()
-                    
-                    last_msg_response = None
-                    if last_message:
-                        sender = db.query(User).filter(User.id == last_message.sender_id).first()
-                        last_msg_response = MessageResponse(
-                            id=str(last_message.id),
-                            chat_id=str(last_message.chat_id),
-                            sender={"id": str(last_message.sender_id), "name": sender.name if sender else "Usuário"},
-                            content=last_message.content,
-                            message_type=last_message.message_type,
-                            created_at=last_message.created_at
-                        )
-                    
-                    # Avoid duplicates
-                    if not any(c.id == str(chat.id) for c in result):
-                        result.append(ChatResponse(
-                            id=str(chat.id),
-                            match_id=None,
-                            wanted_id=post.id,
-                            participants=[
-                                {"id": str(current_user.id), "name": current_user.name or "Usuário"},
-                                {"id": str(applicant.id), "name": applicant.name or "Aplicante"}
-                            ],
-                            last_message=last_msg_response,
-                            created_at=chat.created_at
-                        ))
+        last_message = None
+        if summary.last_message_id:
+            last_message = MessageResponse(
+                id=str(summary.last_message_id),
+                chat_id=str(summary.chat_id),
+                sender={"id": str(summary.last_sender_id), "name": sender_name if sender_id else "Usuário"},
+                content=summary.last_message_preview or "",
+                message_type=summary.last_message_type or "text",
+                created_at=summary.last_message_at
+            )
+        
+        result.append(ChatResponse(
+            id=str(summary.chat_id),
+            match_id=str(summary.match_id) if summary.match_id else None,
+            wanted_id=summary.wanted_id,
+            participants=[
+                {"id": str(current_user.id), "name": current_user.name or "Usuário"},
+                {"id": str(other_id), "name": other_name or FALLBACK_NAMES.get(other_role, "Usuário")}
+            ],
+            last_message=last_message,
+            unread_count=unread_count,
+            created_at=summary.created_at
+        ))
     
     return result
 
 @router.post("/messages")
 def send_message(message: MessageCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
-        # Verify chat exists
-        chat = db.query(Chat).filter(Chat.id == message.chat_id).first()
-        if not chat:
+        # Verify chat exists and user has access to it
+        has_access = chat_access.authorize(db, message.chat_id, current_user.id)
+        if has_access is None:
             raise HTTPException(status_code=404, detail="Chat not found")
-        
-        # Verify user has access to this chat
-        has_access = False
-        
-        if chat.match_id:
-            # Check if user is part of the match
-            match_id = chat.match_id if isinstance(chat.match_id, str) else str(chat.match_id)
-            match = db.query(Match).filter(Match.id == match_id).first()
-            if match and (match.user_a_id == current_user.id or match.user_b_id == current_user.id):
-                has_access = True
-        
-        elif chat.wanted_id:
-            # Check if user is the author of the wanted post
-            wanted_post_id = chat.wanted_id if isinstance(chat.wanted_id, str) else str(chat.wanted_id)
-            wanted_post = db.query(WantedPost).filter(WantedPost.id == wanted_post_id).first()
-            if wanted_post and wanted_post.author_id == current_user.id:
-                has_access = True
-            
-            # Check if user applied to this wanted post
-            application = db.query(WantedApplication).filter(
-                WantedApplication.wanted_post_id == wanted_post_id,
-                WantedApplication.applicant_id == current_user.id
-            ).first()
-            if application:
-                has_access = True
-        
         if not has_access:
             raise HTTPException(status_code=403, detail="Access denied")
         
@@ -144,10 +102,12 @@ def send_message(message: MessageCreate, current_user: User = Depends(get_curren
             message_type=message.message_type or "text"
         )
         db.add(new_message)
+        db.flush()
+        summaries.record_message(db, new_message)
         db.commit()
         db.refresh(new_message)
         
-        return {
+        response = {
             "id": str(new_message.id),
             "chat_id": str(new_message.chat_id),
             "sender": {"id": str(current_user.id), "name": current_user.name or "Usuário"},
@@ -155,6 +115,9 @@ def send_message(message: MessageCreate, current_user: User = Depends(get_curren
             "message_type": new_message.message_type,
             "created_at": new_message.created_at
         }
+        chat_hub.publish(new_message.chat_id, response)
+        
+        return response
     except HTTPException:
         raise
     except Exception as e:
@@ -162,53 +125,76 @@ def send_message(message: MessageCreate, current_user: User = Depends(get_curren
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.get("/messages/{chat_id}")
-def get_chat_messages(chat_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_chat_messages(
+    chat_id: str,
+    before: Optional[str] = Query(None, description="Return messages older than this message id"),
+    after: Optional[str] = Query(None, description="Return messages newer than this message id"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
     try:
-        # Verify chat exists
-        chat = db.query(Chat).filter(Chat.id == chat_id).first()
-        if not chat:
+        # Verify chat exists and user has access to it
+        has_access = await db.run_sync(chat_access.authorize, chat_id, current_user.id)
+        if has_access is None:
             raise HTTPException(status_code=404, detail="Chat not found")
+        if not has_access:
+            raise HTTPException(status_code=403, detail="Access denied")
         
-        # Verify user has access to this chat
-        has_access = False
+        if before and after:
+            raise HTTPException(status_code=400, detail="Use either before or after, not both")
         
-        if chat.match_id:
-            # Check if user is part of the match
-            match_id = chat.match_id if isinstance(chat.match_id, str) else str(chat.match_id)
-            match = db.query(Match).filter(Match.id == match_id).first()
-            if match and (match.user_a_id == current_user.id or match.user_b_id == current_user.id):
-                has_access = True
+        query = select(Message).where(Message.chat_id == chat_id)
+        cursor_id = before or after
+        if cursor_id:
+            cursor = (await db.execute(
+                select(Message.created_at, Message.id).where(
+                    Message.id == cursor_id,
+                    Message.chat_id == chat_id
+                )
+            )).first()
+            if not cursor:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            # Keyset pagination on (created_at, id)
+            if before:
+                query = query.where(or_(
+                    Message.created_at < cursor.created_at,
+                    and_(Message.created_at == cursor.created_at, Message.id < cursor.id)
+                ))
+            else:
+                query = query.where(or_(
+                    Message.created_at > cursor.created_at,
+                    and_(Message.created_at == cursor.created_at, Message.id > cursor.id)
+                ))
+            limit = limit or DEFAULT_PAGE_SIZE
         
-        elif chat.wanted_id:
-            # Check if user is the author of the wanted post
-            wanted_post_id = chat.wanted_id if isinstance(chat.wanted_id, str) else str(chat.wanted_id)
-            wanted_post = db.query(WantedPost).filter(WantedPost.id == wanted_post_id).first()
-            if wanted_post and wanted_post.author_id == current_user.id:
-                has_access = True
-            
-            # Check if user applied to this wanted post
-            application = db.query(WantedApplication).filter(
-                WantedApplication.wanted_post_id == wanted_post_id,
-                WantedApplication.applicant_id == current_user.id
-            ).first()
-            if application:
-                has_access = True
+        if limit and not after:
+            # Newest page first, returned in chronological order
+            messages = list((await db.execute(
+                query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)
+            )).scalars())
+            messages.reverse()
+        else:
+            query = query.order_by(Message.created_at.asc(), Message.id.asc())
+            if limit:
+                query = query.limit(limit)
+            messages = list((await db.execute(query)).scalars())
         
-        if not has_access:
-            raise HTTPException(status_code=403, detail="Access denied")
+        if not before:
+            # Reading the latest page clears the unread counter
+            await db.run_sync(summaries.mark_read, chat_id, current_user.id)
+            await db.commit()
         
-        # Get all messages for this chat
-        messages = db.query(Message).filter(
-            Message.chat_id == chat_id
-        ).order_by(Message.created_at.asc()).all()
+        # Resolve sender names once per page
+        sender_ids = {message.sender_id for message in messages}
+        senders = dict((await db.execute(select(User.id, User.name).where(User.id.in_(sender_ids)))).all()) if sender_ids else {}
         
         result = []
         for message in messages:
-            sender = db.query(User).filter(User.id == message.sender_id).first()
             result.append({
                 "id": str(message.id),
                 "chat_id": str(message.chat_id),
-                "sender": {"id": str(message.sender_id), "name": sender.name if sender else "Usuário"},
+                "sender": {"id": str(message.sender_id), "name": senders[message.sender_id] if message.sender_id in senders else "Usuário"},
                 "content": message.content,
                 "message_type": message.message_type,
                 "created_at": message.created_at
@@ -221,13 +207,60 @@ def get_chat_messages(chat_id: str, current_user: User = Depends(get_current_use
         logging.error(f"Error in get_chat_messages: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.websocket("/ws/{chat_id}")
+async def chat_websocket(websocket: WebSocket, chat_id: str):
+    """Push new messages of a chat to a connected participant.
+
+    The first frame must be {"type": "auth", "token": <access token>}; a token
+    in the URL would end up in the server's access log.
+    """
+    await websocket.accept()
+    try:
+        frame = await asyncio.wait_for(websocket.receive_json(), timeout=WS_AUTH_TIMEOUT_SECONDS)
+    except WebSocketDisconnect:
+        return
+    except (asyncio.TimeoutError, ValueError, KeyError, TypeError):
+        frame = None  # silent, not JSON, or a binary frame
+    token = frame.get("token") if isinstance(frame, dict) and frame.get("type") == "auth" else None
+    if not isinstance(token, str) or not await run_in_threadpool(_authorize_websocket, chat_id, token):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    chat_hub.connect(chat_id, websocket)
+    try:
+        await websocket.send_json({"type": "ready"})
+        while True:
+            # Incoming frames are only used as keep-alives
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        chat_hub.disconnect(chat_id, websocket)
+
+def _authorize_websocket(chat_id: str, token: str) -> bool:
+    payload = verify_token(token)
+    if not payload or not payload.get("sub") or revocation_store.is_revoked(payload):
+        return False
+    
+    db = SessionLocal()
+    try:
+        user = get_user_by_email(db, payload["sub"])
+        return bool(user and chat_access.authorize(db, chat_id, user.id))
+    finally:
+        db.close()
+
 @router.get("/{chat_id}")
 def get_chat_by_id(chat_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
-        # Get chat details
-        chat = db.query(Chat).filter(Chat.id == chat_id).first()
-        if not chat:
+        # Verify chat exists and user has access to it
+        has_access = chat_access.authorize(db, chat_id, current_user.id)
+        if has_access is None:
             raise HTTPException(status_code=404, detail="Chat not found")
+        if not has_access:
+            raise HTTPException(status_code=403, detail="Access denied")
+        
+        # Chat details come from the access cache
+        chat = chat_access.resolve(db, chat_id)
         
         participants = []
         
@@ -286,6 +319,8 @@ def get_chat_by_id(chat_id: str, current_user: User = Depends(get_current_user),
             "last_message": last_msg_response,
             "created_at": chat.created_at
         }
+    except HTTPException:
+        raise
     except Exception as e:
         import logging
         logging.error(f"Error in get_chat_by_id: {str(e)}")
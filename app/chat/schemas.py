@@ -21,4 +21,5 @@ class ChatResponse(BaseModel):
     wanted_id: Optional[str]
     participants: List[dict]
     last_message: Optional[MessageResponse]
+    unread_count: int = 0
     created_at: datetime
\ No newline at end of file
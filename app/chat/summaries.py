@@ -0,0 +1,207 @@
+"""
+Chat Summaries for Collapp
+Inbox read model (last message, participants, unread counters) maintained on write
+"""
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from app.db.models import (
+    Chat, ChatParticipant, ChatSummary, Match, Message, WantedApplication, WantedPost
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_LENGTH = 140
+
+ROLE_MATCH = "match"
+ROLE_AUTHOR = "author"
+ROLE_APPLICANT = "applicant"
+ROLE_OFFER_CREATOR = "offer_creator"
+ROLE_OFFER_ACCEPTER = "offer_accepter"
+
+
+def _preview(content: Optional[str]) -> Optional[str]:
+    if content is None or len(content) <= PREVIEW_LENGTH:
+        return content
+    return content[:PREVIEW_LENGTH - 1].rstrip() + "…"
+
+
+def register_chat(db: Session, chat: Chat, participants: Iterable[Tuple[object, str]]):
+    """Create the summary of a new chat; call before the chat is committed"""
+    db.add(ChatSummary(chat_id=chat.id, match_id=chat.match_id, wanted_id=chat.wanted_id))
+    seen = set()
+    for user_id, role in participants:
+        if str(user_id) in seen:
+            continue
+        seen.add(str(user_id))
+        db.add(ChatParticipant(chat_id=chat.id, user_id=user_id, role=role, unread_count=0))
+    db.flush()
+
+
+def add_participant(db: Session, chat_id: str, user_id, role: str):
+    """Add a user to an existing chat (e.g. a new applicant to a wanted chat)"""
+    ensure_summary(db, chat_id)
+    if db.get(ChatParticipant, (chat_id, user_id)) is None:
+        db.add(ChatParticipant(chat_id=chat_id, user_id=user_id, role=role, unread_count=0))
+        db.flush()
+
+
+def record_message(db: Session, message: Message):
+    """Move a chat's last message forward and bump unread counters of everyone but the sender"""
+    # The UPDATE below references the message row, so it must be inserted first;
+    # an id assigned up front does not mean the row exists (autoflush is off)
+    if message.id is None or message in db.new:
+        db.flush()
+    sent_at = message.created_at or func.now()
+
+    last_message = {
+        ChatSummary.last_message_id: message.id,
+        ChatSummary.last_message_at: sent_at,
+        ChatSummary.last_sender_id: message.sender_id,
+        ChatSummary.last_message_type: message.message_type or "text",
+        ChatSummary.last_message_preview: _preview(message.content)
+    }
+    summary = db.query(ChatSummary).filter(ChatSummary.chat_id == message.chat_id)
+    # A chat from before the read model gets its summary on its first new message
+    if not summary.update(last_message, synchronize_session=False) and ensure_summary(db, message.chat_id):
+        summary.update(last_message, synchronize_session=False)
+    db.query(ChatParticipant).filter(ChatParticipant.chat_id == message.chat_id).update({
+        ChatParticipant.unread_count: ChatParticipant.unread_count + case(
+            (ChatParticipant.user_id == message.sender_id, 0), else_=1
+        ),
+        ChatParticipant.last_activity_at: sent_at
+    }, synchronize_session=False)
+
+
+def mark_read(db: Session, chat_id: str, user_id):
+    """Reset a participant's unread counter"""
+    db.query(ChatParticipant).filter(
+        ChatParticipant.chat_id == chat_id,
+        ChatParticipant.user_id == user_id,
+        ChatParticipant.unread_count != 0
+    ).update({ChatParticipant.unread_count: 0}, synchronize_session=False)
+
+
+def ensure_summary(db: Session, chat_id: str) -> bool:
+    """Build the summary of one chat if it has none; True if one was created"""
+    if db.get(ChatSummary, chat_id) is not None:
+        return False
+    created = _summarize(db, _unsummarized(db, [chat_id]).all())
+    db.flush()
+    return bool(created)
+
+
+def backfill(db: Session, batch_size: int = 500) -> int:
+    """Build summaries for chats created before the read model existed.
+
+    Covers match chats and the conversation (oldest chat) of each wanted post.
+    Offer chats carry no link back to their offer and are left out.
+    """
+    chats = _unsummarized(db).order_by(Chat.created_at).all()
+
+    created = 0
+    for start in range(0, len(chats), batch_size):
+        created += _summarize(db, chats[start:start + batch_size])
+        db.commit()
+        logger.info(f"Chat summaries backfilled: {created}")
+
+    return created
+
+
+def _unsummarized(db: Session, chat_ids: Optional[Iterable[str]] = None):
+    """Chats the inbox can show that have no summary yet"""
+    ranked = db.query(
+        Chat.id.label("chat_id"),
+        func.row_number().over(partition_by=Chat.wanted_id, order_by=(Chat.created_at, Chat.id)).label("rank")
+    ).filter(Chat.wanted_id.isnot(None)).subquery()
+    first_wanted_chats = db.query(ranked.c.chat_id).filter(ranked.c.rank == 1)
+
+    summarized = db.query(ChatSummary.chat_id)
+    query = db.query(Chat).filter(
+        ~Chat.id.in_(summarized),
+        (Chat.match_id.isnot(None)) | (Chat.id.in_(first_wanted_chats))
+    )
+    if chat_ids is not None:
+        query = query.filter(Chat.id.in_(list(chat_ids)))
+    return query
+
+
+def _summarize(db: Session, batch) -> int:
+    """Add summaries and participants for a batch of chats, from their matches, posts and messages"""
+    if not batch:
+        return 0
+    chat_ids = [chat.id for chat in batch]
+
+    match_ids = {chat.match_id for chat in batch if chat.match_id}
+    matches = {
+        str(match.id): match for match in db.query(Match).filter(Match.id.in_(match_ids))
+    } if match_ids else {}
+
+    wanted_ids = {chat.wanted_id for chat in batch if chat.wanted_id and not chat.match_id}
+    authors = dict(
+        db.query(WantedPost.id, WantedPost.author_id).filter(WantedPost.id.in_(wanted_ids)).all()
+    ) if wanted_ids else {}
+    applicants = {}
+    if wanted_ids:
+        for wanted_id, applicant_id in db.query(
+            WantedApplication.wanted_post_id, WantedApplication.applicant_id
+        ).filter(WantedApplication.wanted_post_id.in_(wanted_ids)).order_by(WantedApplication.created_at):
+            applicants.setdefault(wanted_id, []).append(applicant_id)
+
+    ranked_messages = db.query(
+        Message.id,
+        func.row_number().over(
+            partition_by=Message.chat_id,
+            order_by=(Message.created_at.desc(), Message.id.desc())
+        ).label("rank")
+    ).filter(Message.chat_id.in_(chat_ids)).subquery()
+    last_messages = {
+        message.chat_id: message for message in db.query(Message).join(
+            ranked_messages, ranked_messages.c.id == Message.id
+        ).filter(ranked_messages.c.rank == 1)
+    }
+
+    existing = {
+        (chat_id, str(user_id)) for chat_id, user_id in db.query(
+            ChatParticipant.chat_id, ChatParticipant.user_id
+        ).filter(ChatParticipant.chat_id.in_(chat_ids))
+    }
+
+    created = 0
+    for chat in batch:
+        if chat.match_id:
+            match = matches.get(str(chat.match_id))
+            if not match:
+                continue
+            participants = [(match.user_a_id, ROLE_MATCH), (match.user_b_id, ROLE_MATCH)]
+        else:
+            if chat.wanted_id not in authors:
+                continue
+            participants = [(authors[chat.wanted_id], ROLE_AUTHOR)]
+            participants += [(applicant_id, ROLE_APPLICANT) for applicant_id in applicants.get(chat.wanted_id, [])]
+
+        last = last_messages.get(chat.id)
+        db.add(ChatSummary(
+            chat_id=chat.id,
+            match_id=chat.match_id,
+            wanted_id=chat.wanted_id,
+            last_message_id=last.id if last else None,
+            last_message_at=last.created_at if last else None,
+            last_sender_id=last.sender_id if last else None,
+            last_message_type=last.message_type if last else None,
+            last_message_preview=_preview(last.content) if last else None,
+            created_at=chat.created_at
+        ))
+        activity = (last.created_at if last else None) or chat.created_at or datetime.utcnow()
+        for user_id, role in participants:
+            if (chat.id, str(user_id)) in existing:
+                continue
+            existing.add((chat.id, str(user_id)))
+            db.add(ChatParticipant(
+                chat_id=chat.id, user_id=user_id, role=role, unread_count=0, last_activity_at=activity
+            ))
+        created += 1
+
+    return created
@@ -2,23 +2,294 @@
 Security Audit and Logging Module
 Tracks security events and user actions
 """
+import atexit
 import json
 import logging
-from datetime import datetime
-from typing import Dict, Any, Optional
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
 from enum import Enum
-from sqlalchemy.orm import Session
-from app.db.database import get_db
-
-# Configure security logger
-security_logger = logging.getLogger("security")
-security_handler = logging.FileHandler("logs/security.log")
-security_formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-security_handler.setFormatter(security_formatter)
-security_logger.addHandler(security_handler)
-security_logger.setLevel(logging.INFO)
+from sqlalchemy import insert
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+BLOCK_TIMEOUT_SECONDS = 0.05
+
+
+class FileSink:
+    """Appends events to a log file, rotating it by size and by age"""
+
+    def __init__(self, path: str, max_bytes: int, rotate_seconds: int, backup_count: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.stream = None
+        self.opened_at = 0.0
+
+    def write(self, events: List[Dict[str, Any]]):
+        data = "".join(self._format(event) for event in events)
+        if self.stream is None:
+            self._open()
+        if self._should_rotate(len(data)):
+            self._rotate()
+        # One write and one flush per batch; fsync is left to the OS
+        self.stream.write(data)
+        self.stream.flush()
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    @staticmethod
+    def _format(event: Dict[str, Any]) -> str:
+        # Same line layout the logging.FileHandler used to produce
+        timestamp = event["timestamp"]
+        prefix = timestamp.strftime("%Y-%m-%d %H:%M:%S") + f",{timestamp.microsecond // 1000:03d}"
+        payload = dict(event, timestamp=timestamp.isoformat())
+        return f"{prefix} - security - INFO - {json.dumps(payload, default=str)}\n"
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.stream = open(self.path, "a", encoding="utf-8")
+        self.opened_at = time.time()
+
+    def _should_rotate(self, incoming: int) -> bool:
+        size = self.stream.tell()
+        if not size:
+            return False
+        if self.max_bytes and size + incoming > self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.time() - self.opened_at >= self.rotate_seconds
+
+    def _rotate(self):
+        self.close()
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+
+class DatabaseSink:
+    """Bulk-inserts each batch into audit_events with a single statement"""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def write(self, events: List[Dict[str, Any]]):
+        rows = [
+            {
+                "event_type": event["event_type"],
+                "user_id": str(event["user_id"]) if event["user_id"] is not None else None,
+                "ip_address": event["ip_address"],
+                "user_agent": event["user_agent"],
+                "details": event["details"],
+                "created_at": event["timestamp"].replace(tzinfo=timezone.utc),
+            }
+            for event in events
+        ]
+        db = self.session_factory()
+        try:
+            db.execute(insert(AuditEvent), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    def close(self):
+        pass
+
+
+class _FlushMarker:
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class AuditPipeline:
+    """Bounded queue drained in batches by one background writer thread.
+
+    Request threads only append to the queue. When it is full the overflow
+    policy decides: drop the oldest queued event, drop the new one, or wait
+    briefly for room and then drop it.
+    """
+
+    def __init__(
+        self,
+        sinks: List[Any],
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow_policy: str = "drop_oldest"
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown audit overflow policy: {overflow_policy}")
+        self.sinks = sinks
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.stopping = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def enqueue(self, event: Dict[str, Any]) -> bool:
+        """Hand an event to the writer; False if it was dropped"""
+        if self.thread is None:
+            self._start()
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return self._overflow(event)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything enqueued so far has reached the sinks"""
+        if self.thread is None or not self.thread.is_alive():
+            return True
+        marker = _FlushMarker()
+        try:
+            self.queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        if self.thread is not None and self.thread.is_alive():
+            self.flush(timeout)
+            self.stopping = True
+            try:
+                self.queue.put(_FlushMarker(), timeout=timeout)  # wake the writer
+            except queue.Full:
+                pass
+            self.thread.join(timeout)
+        self.thread = None
+        self.stopping = False
+        for sink in self.sinks:
+            sink.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _overflow(self, event: Dict[str, Any]) -> bool:
+        if self.overflow_policy == "drop_oldest":
+            try:
+                self.queue.get_nowait()
+                self._count_drop()
+                self.queue.put_nowait(event)
+                return True
+            except (queue.Empty, queue.Full):
+                pass
+        elif self.overflow_policy == "block":
+            try:
+                self.queue.put(event, timeout=BLOCK_TIMEOUT_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        self._count_drop()
+        return False
+
+    def _count_drop(self):
+        with self.lock:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(f"Audit queue full, {self.dropped} events dropped so far")
+
+    def _start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self.thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while not (self.stopping and self.queue.empty()):
+            batch, markers = self._collect()
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.done.set()
+
+    def _collect(self):
+        """Up to batch_size events, waiting at most flush_interval after the first one"""
+        batch, markers = [], []
+        try:
+            item = self.queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return batch, markers
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if isinstance(item, _FlushMarker):
+                markers.append(item)
+                return batch, markers
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, markers
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.stopping:
+                    return batch, markers
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    return batch, markers
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        for sink in self.sinks:
+            try:
+                sink.write(batch)
+            except Exception as e:
+                # Never retried: a failing sink must not back the queue up into requests
+                self.failed += len(batch)
+                logger.error(f"Audit sink {type(sink).__name__} failed for {len(batch)} events: {e}")
+        self.written += len(batch)
+
+
+def _create_pipeline() -> AuditPipeline:
+    sinks = [FileSink(
+        settings.AUDIT_LOG_PATH,
+        max_bytes=settings.AUDIT_LOG_MAX_BYTES,
+        rotate_seconds=settings.AUDIT_LOG_ROTATE_SECONDS,
+        backup_count=settings.AUDIT_LOG_BACKUP_COUNT
+    )]
+    if settings.AUDIT_DB_SINK:
+        sinks.append(DatabaseSink())
+    return AuditPipeline(
+        sinks,
+        queue_size=settings.AUDIT_QUEUE_SIZE,
+        batch_size=settings.AUDIT_BATCH_SIZE,
+        flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+        overflow_policy=settings.AUDIT_OVERFLOW_POLICY
+    )
+
+
+# Global audit pipeline instance (the writer thread starts on the first event)
+audit_pipeline = _create_pipeline()
 
 class SecurityEventType(Enum):
     """Security event types"""
@@ -44,9 +315,9 @@ class SecurityAudit:
         user_agent: Optional[str] = None,
         details: Optional[Dict[str, Any]] = None
     ):
-        """Log security event"""
+        """Log security event (queued; written in the background)"""
         event_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.utcnow(),
             "event_type": event_type.value,
             "user_id": user_id,
             "ip_address": ip_address,
@@ -54,7 +325,7 @@ class SecurityAudit:
             "details": details or {}
         }
         
-        security_logger.info(json.dumps(event_data))
+        audit_pipeline.enqueue(event_data)
     
     @staticmethod
     def log_login_attempt(
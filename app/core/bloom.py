@@ -0,0 +1,66 @@
+"""
+Bloom Filters for Collapp
+Compact probabilistic membership sets (no false negatives)
+"""
+import hashlib
+import math
+from typing import Iterable, List
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter using double hashing"""
+
+    def __init__(self, capacity: int = 1000, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(str(item).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+
+class ScalableBloomFilter:
+    """Bloom filter that adds larger slices as it fills up"""
+
+    def __init__(self, initial_capacity: int = 256, error_rate: float = 0.01, growth: int = 2):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.filters: List[BloomFilter] = []
+
+    def add(self, item: str):
+        if not self.filters or len(self.filters[-1]) >= self.filters[-1].capacity:
+            capacity = self.initial_capacity * (self.growth ** len(self.filters))
+            # Tighten each new slice so the compound error rate stays bounded
+            error_rate = self.error_rate * (0.5 ** (len(self.filters) + 1))
+            self.filters.append(BloomFilter(capacity, error_rate))
+        self.filters[-1].add(item)
+
+    def update(self, items: Iterable[str]):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in f for f in self.filters)
+
+    def __len__(self):
+        return sum(len(f) for f in self.filters)
@@ -8,6 +8,10 @@ class Settings:
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL")
     DATABASE_URL_ASYNC: str = os.getenv("DATABASE_URL_ASYNC")
+    DATABASE_REPLICA_URLS: list = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_STICKY_SECONDS: float = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))  # reads after a write stay on the primary
+    REPLICA_CHECK_INTERVAL_SECONDS: float = float(os.getenv("REPLICA_CHECK_INTERVAL_SECONDS", "5"))
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "collapp_db")
     POSTGRES_USER: str = os.getenv("POSTGRES_USER", "collapp_user")
     POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "collapp_pass")
@@ -21,6 +25,35 @@ class Settings:
     REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
     
+    # Matching
+    ANN_INDEX_PATH: str = os.getenv("ANN_INDEX_PATH", "data/creator_index.npz")
+    
+    # Password hashing
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", 2))  # 0 hashes inline in the threadpool
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+    
+    # Rate limiting
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory, sql
+    RATE_LIMIT_DATABASE_URL: str = os.getenv("RATE_LIMIT_DATABASE_URL")  # defaults to DATABASE_URL
+    RATE_LIMIT_TRUSTED_PROXIES: int = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", 0))
+    
+    # Security audit log
+    AUDIT_LOG_PATH: str = os.getenv("AUDIT_LOG_PATH", "logs/security.log")
+    AUDIT_LOG_MAX_BYTES: int = int(os.getenv("AUDIT_LOG_MAX_BYTES", 10 * 1024 * 1024))
+    AUDIT_LOG_ROTATE_SECONDS: int = int(os.getenv("AUDIT_LOG_ROTATE_SECONDS", 24 * 3600))
+    AUDIT_LOG_BACKUP_COUNT: int = int(os.getenv("AUDIT_LOG_BACKUP_COUNT", 7))
+    AUDIT_QUEUE_SIZE: int = int(os.getenv("AUDIT_QUEUE_SIZE", 10000))
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", 500))
+    AUDIT_FLUSH_INTERVAL: float = float(os.getenv("AUDIT_FLUSH_INTERVAL", 1.0))
+    AUDIT_OVERFLOW_POLICY: str = os.getenv("AUDIT_OVERFLOW_POLICY", "drop_oldest")  # drop_oldest, drop_newest, block
+    AUDIT_DB_SINK: bool = os.getenv("AUDIT_DB_SINK", "false").lower() == "true"
+    
+    # Metrics
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN")  # unset: /metrics is open
+    
+    # Chat
+    CHAT_HUB_BACKEND: str = os.getenv("CHAT_HUB_BACKEND", "local")  # local, postgres
+    
     # Environment
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
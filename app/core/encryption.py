@@ -3,37 +3,82 @@ Data Encryption Module for Collapp
 Handles sensitive data encryption/decryption
 """
 import base64
-import secrets
-from cryptography.fernet import Fernet
+import hashlib
+import hmac
+import threading
+from functools import lru_cache
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional
 import os
 
+SALT = b'collapp_salt_2024'  # In production, use random salt per user
+BLIND_INDEX_SALT = b'collapp_bidx_2024'  # separate key: index digests must not share the cipher key
+KDF_ITERATIONS = 100000
+TOKEN_PREFIX = "gAAAAA"  # base64 of Fernet's version byte (0x80) plus the timestamp's high bytes
+
+@lru_cache(maxsize=8)
+def _derive_key(password: str, salt: bytes = SALT) -> bytes:
+    """PBKDF2 runs once per password per process, on first use"""
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=KDF_ITERATIONS,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(password.encode()))
+
 class DataEncryption:
-    """Handle sensitive data encryption"""
-    
-    def __init__(self, password: Optional[str] = None):
+    """Handle sensitive data encryption.
+
+    Keys form a ring: the first password encrypts, every password decrypts,
+    so a key can be rotated by prepending the new one and re-encrypting
+    with rotate_rows before the old one is dropped.
+    """
+
+    def __init__(
+        self,
+        password: Optional[str] = None,
+        previous_passwords: Optional[Iterable[str]] = None,
+        blind_index_password: Optional[str] = None
+    ):
         if password is None:
             password = os.getenv("ENCRYPTION_KEY", "default-key-change-in-production")
-        
-        # Generate key from password
-        salt = b'collapp_salt_2024'  # In production, use random salt per user
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-        self.cipher = Fernet(key)
-    
+        if previous_passwords is None:
+            previous_passwords = [p for p in os.getenv("ENCRYPTION_PREVIOUS_KEYS", "").split(",") if p]
+        if blind_index_password is None:
+            blind_index_password = os.getenv("BLIND_INDEX_KEY", password)
+
+        self.passwords = [password, *previous_passwords]
+        self.blind_index_password = blind_index_password
+        self._cipher: Optional[MultiFernet] = None
+        self._lock = threading.Lock()
+
+    @property
+    def cipher(self) -> MultiFernet:
+        """Key ring, derived on first use rather than at import"""
+        if self._cipher is None:
+            with self._lock:
+                if self._cipher is None:
+                    self._cipher = MultiFernet([Fernet(_derive_key(p)) for p in self.passwords])
+        return self._cipher
+
+    def blind_index(self, value: str) -> str:
+        """Keyed HMAC-SHA256 of a value, for equality lookups on encrypted columns.
+
+        Deterministic by design and not part of the key ring: changing
+        BLIND_INDEX_KEY means recomputing every stored digest.
+        """
+        key = _derive_key(self.blind_index_password, BLIND_INDEX_SALT)
+        return hmac.new(key, value.encode(), hashlib.sha256).hexdigest()
+
     def encrypt(self, data: str) -> str:
         """Encrypt sensitive data"""
         if not data:
             return data
         return self.cipher.encrypt(data.encode()).decode()
-    
+
     def decrypt(self, encrypted_data: str) -> str:
         """Decrypt sensitive data"""
         if not encrypted_data:
@@ -42,22 +87,68 @@ class DataEncryption:
             return self.cipher.decrypt(encrypted_data.encode()).decode()
         except Exception:
             return encrypted_data  # Return as-is if decryption fails
-    
+
     def encrypt_dict(self, data: dict, fields_to_encrypt: list) -> dict:
         """Encrypt specific fields in a dictionary"""
-        encrypted_data = data.copy()
-        for field in fields_to_encrypt:
-            if field in encrypted_data and encrypted_data[field]:
-                encrypted_data[field] = self.encrypt(str(encrypted_data[field]))
-        return encrypted_data
-    
+        return self.encrypt_rows([data], fields_to_encrypt)[0]
+
     def decrypt_dict(self, data: dict, fields_to_decrypt: list) -> dict:
         """Decrypt specific fields in a dictionary"""
-        decrypted_data = data.copy()
-        for field in fields_to_decrypt:
-            if field in decrypted_data and decrypted_data[field]:
-                decrypted_data[field] = self.decrypt(decrypted_data[field])
-        return decrypted_data
-
-# Global encryption instance
-data_encryption = DataEncryption()
\ No newline at end of file
+        return self.decrypt_rows([data], fields_to_decrypt)[0]
+
+    def encrypt_rows(self, rows: List[Dict[str, Any]], fields: Iterable[str]) -> List[Dict[str, Any]]:
+        """Encrypt the given fields of every row (copies; inputs are left untouched)"""
+        encrypt = self.cipher.encrypt
+        fields = tuple(fields)
+        result = []
+        for row in rows:
+            row = dict(row)
+            for field in fields:
+                value = row.get(field)
+                if value:
+                    row[field] = encrypt(str(value).encode()).decode()
+            result.append(row)
+        return result
+
+    def decrypt_rows(self, rows: List[Dict[str, Any]], fields: Iterable[str]) -> List[Dict[str, Any]]:
+        """Decrypt the given fields of every row; values that are not tokens pass through"""
+        decrypt = self.cipher.decrypt
+        fields = tuple(fields)
+        seen: Dict[str, str] = {}  # repeated ciphertexts (e.g. a joined column) are decrypted once
+        result = []
+        for row in rows:
+            row = dict(row)
+            for field in fields:
+                value = row.get(field)
+                if not value or not isinstance(value, str) or not value.startswith(TOKEN_PREFIX):
+                    continue
+                plain = seen.get(value)
+                if plain is None:
+                    try:
+                        plain = decrypt(value.encode()).decode()
+                    except (InvalidToken, UnicodeDecodeError):
+                        plain = value  # Return as-is if decryption fails
+                    seen[value] = plain
+                row[field] = plain
+            result.append(row)
+        return result
+
+    def rotate_rows(self, rows: List[Dict[str, Any]], fields: Iterable[str]) -> List[Dict[str, Any]]:
+        """Re-encrypt the given fields under the current (first) key"""
+        rotate = self.cipher.rotate
+        fields = tuple(fields)
+        result = []
+        for row in rows:
+            row = dict(row)
+            for field in fields:
+                value = row.get(field)
+                if value and isinstance(value, str) and value.startswith(TOKEN_PREFIX):
+                    try:
+                        row[field] = rotate(value.encode()).decode()
+                    except InvalidToken:
+                        pass
+            result.append(row)
+        return result
+
+# Global encryption instance (keys are derived on first use)
+data_encryption = DataEncryption()
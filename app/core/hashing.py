@@ -0,0 +1,100 @@
+"""
+Password Hashing Service for Collapp
+Runs PBKDF2 hashing in a dedicated process pool so bursts of logins do not starve the request threadpool
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+import logging
+
+logger = logging.getLogger(__name__)
+
+RETRY_AFTER_SECONDS = 1
+
+
+class PasswordHasherBusy(HTTPException):
+    """Raised instead of queueing when the hashing service is saturated"""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, please retry",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+
+
+class PasswordHasher:
+    """Bounded process pool with its own admission limit for password hashing"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def _run(self, fn, *args):
+        self._admit()
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(fn, *args)
+            loop = asyncio.get_running_loop()
+            pool = self._pool()
+            try:
+                return await loop.run_in_executor(pool, fn, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed) and the pool refuses all work from now on
+                logger.error("Password hashing pool is broken, starting a new one")
+                self._discard(pool)
+                return await loop.run_in_executor(self._pool(), fn, *args)
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    def _admit(self):
+        # Fast reject: a full queue means callers would only time out later
+        with self.lock:
+            if self.pending >= self.max_pending:
+                logger.warning("Password hashing queue saturated, rejecting request")
+                raise PasswordHasherBusy()
+            self.pending += 1
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                # Forking a process that already runs threads is unsafe; use a clean interpreter
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(method)
+                )
+            return self.executor
+
+    def _discard(self, pool: ProcessPoolExecutor):
+        # Callers that saw the same broken pool replace it only once
+        with self.lock:
+            if self.executor is pool:
+                self.executor = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
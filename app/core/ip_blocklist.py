@@ -0,0 +1,99 @@
+"""
+IP Blocklist for Collapp
+Expiring CIDR blocks stored in a binary prefix tree (constant-time lookups)
+"""
+import ipaddress
+import math
+import threading
+import time
+from typing import Optional
+
+
+class _Node:
+    __slots__ = ("children", "expires_at")
+
+    def __init__(self):
+        self.children = [None, None]
+        self.expires_at = 0.0  # > now: this prefix is blocked; math.inf: permanently
+
+
+class CIDRBlocklist:
+    """Blocked networks; a lookup walks at most 32 (IPv4) or 128 (IPv6) nodes"""
+
+    def __init__(self):
+        self.roots = {4: _Node(), 6: _Node()}
+        self.lock = threading.Lock()
+        self.size = 0
+
+    @staticmethod
+    def _bits(address: int, prefixlen: int, max_prefixlen: int):
+        for shift in range(max_prefixlen - 1, max_prefixlen - 1 - prefixlen, -1):
+            yield (address >> shift) & 1
+
+    def block(self, network: str, ttl: Optional[float] = None, now: Optional[float] = None):
+        """Block an address or CIDR range, forever or for ttl seconds"""
+        net = ipaddress.ip_network(network, strict=False)
+        expires_at = math.inf if ttl is None else (now or time.time()) + ttl
+        with self.lock:
+            node = self.roots[net.version]
+            for bit in self._bits(int(net.network_address), net.prefixlen, net.max_prefixlen):
+                if node.children[bit] is None:
+                    node.children[bit] = _Node()
+                node = node.children[bit]
+            if not node.expires_at:
+                self.size += 1
+            node.expires_at = max(node.expires_at, expires_at)
+
+    def unblock(self, network: str):
+        net = ipaddress.ip_network(network, strict=False)
+        with self.lock:
+            node = self.roots[net.version]
+            for bit in self._bits(int(net.network_address), net.prefixlen, net.max_prefixlen):
+                node = node.children[bit]
+                if node is None:
+                    return
+            if node.expires_at:
+                node.expires_at = 0.0
+                self.size -= 1
+
+    def is_blocked(self, ip: str, now: Optional[float] = None) -> bool:
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        now = now or time.time()
+        node = self.roots[address.version]
+        if node.expires_at > now:
+            return True
+        for bit in self._bits(int(address), address.max_prefixlen, address.max_prefixlen):
+            node = node.children[bit]
+            if node is None:
+                return False
+            if node.expires_at > now:
+                return True
+        return False
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """Drop expired blocks and the branches only they were using"""
+        now = now or time.time()
+        with self.lock:
+            removed = sum(self._purge(root, now) for root in self.roots.values())
+            self.size -= removed
+            return removed
+
+    def _purge(self, node: _Node, now: float) -> int:
+        removed = 0
+        if node.expires_at and node.expires_at <= now:
+            node.expires_at = 0.0
+            removed += 1
+        for bit in (0, 1):
+            child = node.children[bit]
+            if child is None:
+                continue
+            removed += self._purge(child, now)
+            if not child.expires_at and child.children == [None, None]:
+                node.children[bit] = None
+        return removed
+
+    def __len__(self):
+        return self.size
@@ -1,51 +1,116 @@
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import math
 import time
-from collections import defaultdict, deque
-from typing import Dict, Deque
+from app.core.rate_limit import RateLimiter, rate_limiter
+from app.core.metrics import (
+    REQUESTS_IN_PROGRESS, UNMATCHED_ROUTE, RequestStats, current_request_stats, observe_request
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Raw ASGI middleware: no extra task or response re-streaming per request
+# (which BaseHTTPMiddleware and app.middleware("http") both add).
+
 class RateLimitMiddleware:
-    def __init__(self, calls: int = 100, period: int = 60):
-        self.calls = calls
-        self.period = period
-        self.clients: Dict[str, Deque[float]] = defaultdict(deque)
+    def __init__(self, app: ASGIApp, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
     
-    async def __call__(self, request: Request, call_next):
-        client_ip = request.client.host
-        now = time.time()
-        
-        # Clean old requests
-        while self.clients[client_ip] and self.clients[client_ip][0] <= now - self.period:
-            self.clients[client_ip].popleft()
-        
-        # Check rate limit
-        if len(self.clients[client_ip]) >= self.calls:
-            logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-            return JSONResponse(
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request = Request(scope)
+        retry_after = await self.limiter.check(request)
+        if retry_after > 0:
+            logger.warning(f"Rate limit exceeded for {request.url.path} from IP: {self.limiter.client_ip(request)}")
+            response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                content={"detail": "Rate limit exceeded"}
+                content={"detail": "Rate limit exceeded"},
+                headers={"Retry-After": str(math.ceil(retry_after))}
             )
+            await response(scope, receive, send)
+            return
         
-        # Add current request
-        self.clients[client_ip].append(now)
-        
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
 
 class LoggingMiddleware:
-    async def __call__(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         start_time = time.time()
         
         # Log request
-        logger.info(f"Request: {request.method} {request.url}")
+        logger.info(f"Request: {scope['method']} {Request(scope).url}")
         
-        response = await call_next(request)
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                # Log response (once headers are ready, as before)
+                process_time = time.time() - start_time
+                logger.info(f"Response: {message['status']} - {process_time:.3f}s")
+            await send(message)
         
-        # Log response
-        process_time = time.time() - start_time
-        logger.info(f"Response: {response.status_code} - {process_time:.3f}s")
+        await self.app(scope, receive, send_wrapper)
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.templates = {}  # endpoint -> route path template
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        status_code = 500  # if the app raises before responding
+        observed = False
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        REQUESTS_IN_PROGRESS.inc((method,))
+        start_time = time.perf_counter()
+        
+        def observe():
+            nonlocal observed
+            if not observed:
+                observed = True
+                duration = time.perf_counter() - start_time
+                REQUESTS_IN_PROGRESS.dec((method,))
+                observe_request(method, self._route(scope), status_code, duration, stats)
         
-        return response
\ No newline at end of file
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            # Stop the clock at the last body chunk; background tasks run after it
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_stats.reset(token)
+            observe()
+    
+    def _route(self, scope: Scope) -> str:
+        # The router leaves the matched endpoint in the scope; label by its template, not the raw path
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        template = self.templates.get(endpoint)
+        if template is None:
+            for route in getattr(scope.get("app"), "routes", ()):
+                if getattr(route, "endpoint", None) is not None:
+                    self.templates.setdefault(route.endpoint, route.path)
+            template = self.templates.setdefault(endpoint, UNMATCHED_ROUTE)
+        return template
@@ -4,47 +4,77 @@ Implements security headers, rate limiting, and request validation
 """
 import time
 import json
-from typing import Dict, Set
-from fastapi import Request, Response, HTTPException
-from fastapi.middleware.base import BaseHTTPMiddleware
+from typing import Iterable, Optional
+from fastapi import Request, HTTPException
+from starlette.datastructures import MutableHeaders
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.ip_blocklist import CIDRBlocklist
+from app.core.rate_limit import SlidingWindowCounter
+from app.core.security_config import security_settings
 import logging
 
 logger = logging.getLogger(__name__)
 
-class SecurityMiddleware(BaseHTTPMiddleware):
-    """Enhanced security middleware"""
+SUSPICIOUS_PATTERNS = (
+    "../", "..\\", "<script", "javascript:", "data:",
+    "vbscript:", "onload=", "onerror=", "eval(", "alert("
+)
+
+class SecurityMiddleware:
+    """Enhanced security middleware (raw ASGI)"""
     
-    def __init__(self, app, max_requests_per_minute: int = 60):
-        super().__init__(app)
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_requests_per_minute: int = security_settings.RATE_LIMIT_REQUESTS_PER_MINUTE,
+        block_minutes: int = security_settings.IP_BLOCK_DURATION_MINUTES,
+        blocklist: Optional[Iterable[str]] = None
+    ):
+        self.app = app
         self.max_requests_per_minute = max_requests_per_minute
-        self.request_counts: Dict[str, list] = {}
-        self.blocked_ips: Set[str] = set()
+        self.block_seconds = block_minutes * 60
+        self.request_counts = SlidingWindowCounter(window=60)
+        # Static blocks (addresses or CIDR ranges) never expire; automatic ones do
+        self.blocked_ips = CIDRBlocklist()
+        for network in (security_settings.IP_BLOCKLIST if blocklist is None else blocklist):
+            self.blocked_ips.block(network)
+        self.last_purge = time.time()
+        
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-    async def dispatch(self, request: Request, call_next):
         # Get client IP
-        client_ip = self._get_client_ip(request)
+        client_ip = self._get_client_ip(Request(scope))
         
         # Check if IP is blocked
-        if client_ip in self.blocked_ips:
-            return JSONResponse(
+        if self.blocked_ips.is_blocked(client_ip):
+            response = JSONResponse(
                 status_code=429,
                 content={"detail": "IP blocked due to suspicious activity"}
             )
+            await response(scope, receive, send)
+            return
         
         # Rate limiting
         if not self._check_rate_limit(client_ip):
             logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=429,
                 content={"detail": "Rate limit exceeded"}
             )
+            await response(scope, receive, send)
+            return
         
         # Security headers
-        response = await call_next(request)
-        self._add_security_headers(response)
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                self._add_security_headers(MutableHeaders(scope=message))
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_headers)
     
     def _get_client_ip(self, request: Request) -> str:
         """Get real client IP considering proxies"""
@@ -60,42 +90,38 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         return request.client.host if request.client else "unknown"
     
     def _check_rate_limit(self, client_ip: str) -> bool:
-        """Check rate limiting per IP"""
+        """Check rate limiting per IP (constant work per request)"""
         now = time.time()
-        minute_ago = now - 60
-        
-        if client_ip not in self.request_counts:
-            self.request_counts[client_ip] = []
+        if now - self.last_purge > self.block_seconds:
+            self.last_purge = now
+            self.blocked_ips.purge(now)
         
-        # Clean old requests
-        self.request_counts[client_ip] = [
-            req_time for req_time in self.request_counts[client_ip]
-            if req_time > minute_ago
-        ]
-        
-        # Check limit
-        if len(self.request_counts[client_ip]) >= self.max_requests_per_minute:
+        # Denied requests are counted too, so sustained abuse can be detected
+        count = self.request_counts.hit(client_ip, now)
+        if count > self.max_requests_per_minute:
             # Block IP if consistently exceeding limits
-            if len(self.request_counts[client_ip]) > self.max_requests_per_minute * 2:
-                self.blocked_ips.add(client_ip)
+            if count > self.max_requests_per_minute * 2:
+                try:
+                    self.blocked_ips.block(client_ip, ttl=self.block_seconds, now=now)
+                    logger.warning(f"Blocking IP for {self.block_seconds}s: {client_ip}")
+                except ValueError:
+                    pass  # not an address (e.g. "unknown"), keep rate limiting only
             return False
         
-        # Record this request
-        self.request_counts[client_ip].append(now)
         return True
     
-    def _add_security_headers(self, response: Response):
+    def _add_security_headers(self, headers: MutableHeaders):
         """Add security headers to response"""
         # Prevent XSS
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
+        headers["X-Content-Type-Options"] = "nosniff"
+        headers["X-Frame-Options"] = "DENY"
+        headers["X-XSS-Protection"] = "1; mode=block"
         
         # HSTS (HTTPS only)
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
         
         # CSP
-        response.headers["Content-Security-Policy"] = (
+        headers["Content-Security-Policy"] = (
             "default-src 'self'; "
             "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "
             "style-src 'self' 'unsafe-inline'; "
@@ -106,26 +132,40 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         )
         
         # Referrer Policy
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
         
         # Permissions Policy
-        response.headers["Permissions-Policy"] = (
+        headers["Permissions-Policy"] = (
             "geolocation=(), microphone=(), camera=(), "
             "payment=(), usb=(), magnetometer=(), gyroscope=()"
         )
 
-class RequestValidationMiddleware(BaseHTTPMiddleware):
-    """Validate and sanitize requests"""
+class RequestValidationMiddleware:
+    """Validate and sanitize requests (raw ASGI)"""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        response = self._validate(Request(scope))
+        if response is not None:
+            await response(scope, receive, send)
+            return
+        
+        await self.app(scope, receive, send)
     
-    async def dispatch(self, request: Request, call_next):
+    def _validate(self, request: Request) -> Optional[JSONResponse]:
         # Validate request size
-        if hasattr(request, 'headers'):
-            content_length = request.headers.get('content-length')
-            if content_length and int(content_length) > 10 * 1024 * 1024:  # 10MB limit
-                return JSONResponse(
-                    status_code=413,
-                    content={"detail": "Request too large"}
-                )
+        content_length = request.headers.get('content-length')
+        if content_length and int(content_length) > 10 * 1024 * 1024:  # 10MB limit
+            return JSONResponse(
+                status_code=413,
+                content={"detail": "Request too large"}
+            )
         
         # Validate content type for POST/PUT requests
         if request.method in ["POST", "PUT", "PATCH"]:
@@ -137,13 +177,8 @@ class RequestValidationMiddleware(BaseHTTPMiddleware):
                 )
         
         # Check for suspicious patterns in URL
-        suspicious_patterns = [
-            "../", "..\\", "<script", "javascript:", "data:", 
-            "vbscript:", "onload=", "onerror=", "eval(", "alert("
-        ]
-        
-        url_path = str(request.url.path).lower()
-        for pattern in suspicious_patterns:
+        url_path = request.url.path.lower()
+        for pattern in SUSPICIOUS_PATTERNS:
             if pattern in url_path:
                 logger.warning(f"Suspicious request pattern detected: {pattern} in {request.url}")
                 return JSONResponse(
@@ -151,4 +186,4 @@ class RequestValidationMiddleware(BaseHTTPMiddleware):
                     content={"detail": "Invalid request"}
                 )
         
-        return await call_next(request)
\ No newline at end of file
+        return None
@@ -0,0 +1,220 @@
+"""
+Rate Limiting for Collapp
+GCRA (generic cell rate algorithm) limiter: one timestamp per key, pluggable storage
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from fastapi import Request
+from sqlalchemy import create_engine, delete, func, select
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.db.models import RateLimitBucket
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_MEMORY_KEYS = 100000
+SQL_EVICT_INTERVAL_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """`calls` requests per `period` seconds, bursting up to `calls`"""
+    calls: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.calls
+
+
+# Authenticated users are limited per plan, anonymous clients per IP
+ANONYMOUS_LIMIT = RateLimit(100, 60)
+PLAN_LIMITS: Dict[str, RateLimit] = {
+    "FREE": RateLimit(100, 60),
+    "PRO": RateLimit(300, 60),
+    "ENTERPRISE": RateLimit(1000, 60),
+}
+
+# Stricter buckets for expensive or abuse-prone routes (matched by path prefix)
+ROUTE_LIMITS: Dict[str, RateLimit] = {
+    "/auth/login": RateLimit(10, 60),
+    "/auth/register": RateLimit(5, 60),
+    "/auth/forgot-password": RateLimit(3, 300),
+    "/auth/reset-password": RateLimit(5, 300),
+    "/ai/": RateLimit(20, 60),
+}
+
+
+class MemoryStore:
+    """Per-process buckets; idle keys are evicted from the LRU end"""
+
+    def __init__(self, max_keys: int = MAX_MEMORY_KEYS):
+        self.max_keys = max_keys
+        self.buckets: "OrderedDict[str, float]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def acquire(self, key: str, limit: RateLimit, now: float) -> float:
+        """0 if allowed, otherwise seconds until the next request would be"""
+        with self.lock:
+            self._evict(now)
+            tat = self.buckets.pop(key, now)
+            new_tat = max(tat, now) + limit.interval
+            if new_tat - now > limit.period:
+                self.buckets[key] = tat
+                return new_tat - now - limit.period
+            self.buckets[key] = new_tat
+            return 0.0
+
+    def _evict(self, now: float):
+        # A bucket whose TAT has passed is full again, so forgetting it changes nothing
+        while self.buckets:
+            key, tat = next(iter(self.buckets.items()))
+            if tat > now and len(self.buckets) <= self.max_keys:
+                break
+            self.buckets.popitem(last=False)
+
+
+class SQLStore:
+    """Buckets shared by every worker through one table.
+
+    Runs against Postgres in production; a SQLite file URL works as a local
+    stand-in for several workers on one host.
+    """
+
+    def __init__(self, url: str):
+        self.engine = create_engine(url, pool_pre_ping=True)
+        self.table = RateLimitBucket.__table__
+        self.table.create(self.engine, checkfirst=True)
+        self.greatest = func.max if self.engine.dialect.name == "sqlite" else func.greatest
+        if self.engine.dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        self.insert = insert
+        self.last_evicted = 0.0
+
+    def acquire(self, key: str, limit: RateLimit, now: float) -> float:
+        table = self.table
+        new_tat = self.greatest(table.c.tat, now) + limit.interval
+        stmt = self.insert(table).values(key=key, tat=now + limit.interval).on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={"tat": new_tat},
+            where=new_tat - now <= limit.period
+        ).returning(table.c.tat)
+
+        with self.engine.begin() as conn:
+            if conn.execute(stmt).first() is not None:
+                allowed, retry_after = True, 0.0
+            else:
+                tat = conn.execute(select(table.c.tat).where(table.c.key == key)).scalar() or now
+                allowed, retry_after = False, max(tat, now) + limit.interval - now - limit.period
+            if now - self.last_evicted > SQL_EVICT_INTERVAL_SECONDS:
+                self.last_evicted = now
+                conn.execute(delete(table).where(table.c.tat < now))
+        return 0.0 if allowed else retry_after
+
+
+class SlidingWindowCounter:
+    """Approximate sliding window from two fixed windows per key (previous and current)"""
+
+    def __init__(self, window: float = 60, max_keys: int = MAX_MEMORY_KEYS):
+        self.window = window
+        self.max_keys = max_keys
+        self.counters: "OrderedDict[str, list]" = OrderedDict()  # key -> [window index, current, previous]
+        self.lock = threading.Lock()
+
+    def hit(self, key: str, now: float) -> float:
+        """Count a request and return the estimated requests in the last window, this one included"""
+        index, offset = divmod(now, self.window)
+        index = int(index)
+        with self.lock:
+            self._evict(index)
+            counter = self.counters.pop(key, None)
+            if counter is None or counter[0] < index - 1:
+                counter = [index, 0, 0]
+            elif counter[0] == index - 1:
+                counter = [index, 0, counter[1]]
+            counter[1] += 1
+            self.counters[key] = counter
+            return counter[2] * (1 - offset / self.window) + counter[1]
+
+    def _evict(self, index: int):
+        # Keys idle for two windows count as zero and can be forgotten
+        while self.counters:
+            key, counter = next(iter(self.counters.items()))
+            if counter[0] >= index - 1 and len(self.counters) <= self.max_keys:
+                break
+            self.counters.popitem(last=False)
+
+
+class RateLimiter:
+    """Chooses the bucket for a request and asks the store for a decision"""
+
+    def __init__(self, store, trusted_proxies: int = 0):
+        self.store = store
+        self.blocking = isinstance(store, SQLStore)
+        self.trusted_proxies = trusted_proxies
+        self.warned_untrusted = False
+
+    def client_ip(self, request: Request) -> str:
+        # Behind a load balancer the peer address is the balancer itself
+        if self.trusted_proxies:
+            hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+            if len(hops) >= self.trusted_proxies:
+                return hops[-self.trusted_proxies]
+        return request.client.host if request.client else "unknown"
+
+    def identify(self, request: Request) -> Tuple[str, Optional[str]]:
+        """(bucket identity, plan) without touching the database"""
+        authorization = request.headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            from app.core.security import verify_token
+            from app.auth.principal import principal_cache
+            payload = verify_token(authorization[7:])
+            if payload and payload.get("sub"):
+                principal = principal_cache.cache.peek(payload["sub"])
+                return f"user:{payload['sub']}", principal.plan if principal else None
+        if not self.trusted_proxies and "x-forwarded-for" in request.headers and not self.warned_untrusted:
+            # The header is client-controlled until a proxy we trust writes it, so the
+            # peer address is still the key; behind a balancer that is one shared bucket
+            self.warned_untrusted = True
+            logger.warning("X-Forwarded-For present but RATE_LIMIT_TRUSTED_PROXIES is 0; anonymous requests share the proxy's bucket")
+        return f"ip:{self.client_ip(request)}", None
+
+    def limit_for(self, path: str, plan: Optional[str]) -> Tuple[str, RateLimit]:
+        for prefix, limit in ROUTE_LIMITS.items():
+            if path.startswith(prefix):
+                return prefix, limit
+        if plan:
+            return "plan", PLAN_LIMITS.get(str(plan).upper(), ANONYMOUS_LIMIT)
+        return "default", ANONYMOUS_LIMIT
+
+    async def check(self, request: Request) -> float:
+        """0 if the request may proceed, otherwise the Retry-After in seconds"""
+        identity, plan = self.identify(request)
+        scope, limit = self.limit_for(request.url.path, plan)
+        key = f"{scope}:{identity}"
+        now = time.time()
+        try:
+            if self.blocking:
+                return await run_in_threadpool(self.store.acquire, key, limit, now)
+            return self.store.acquire(key, limit, now)
+        except Exception as e:
+            # Fail open: an unavailable store must not take the API down
+            logger.error(f"Rate limit store error: {e}")
+            return 0.0
+
+
+def _create_store():
+    if settings.RATE_LIMIT_BACKEND == "sql":
+        from app.db.database import DATABASE_URL
+        return SQLStore(settings.RATE_LIMIT_DATABASE_URL or DATABASE_URL)
+    return MemoryStore()
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter(_create_store(), trusted_proxies=settings.RATE_LIMIT_TRUSTED_PROXIES)
@@ -0,0 +1,190 @@
+"""
+Token Revocation for Collapp
+Revoked jtis and subjects persisted in revoked_tokens, mirrored in a Bloom filter
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import delete, select
+from starlette.concurrency import run_in_threadpool
+from app.core.bloom import BloomFilter
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security_config import security_settings
+from app.core.token_cache import token_cache
+from app.db.database import SessionLocal
+from app.db.models import RevokedToken
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUBJECT_PREFIX = "sub:"
+BLOOM_CAPACITY = 100000
+SYNC_INTERVAL_SECONDS = 5        # how quickly revocations made by other workers are seen
+COMPACT_INTERVAL_SECONDS = 600
+SYNC_SKEW_SECONDS = 2            # overlap between syncs for rows committed late
+BLOOM_ERROR_RATE = 0.001
+
+
+class RevocationStore:
+    """Answers "is this token revoked?" from memory unless the Bloom filter reports a hit.
+
+    A miss in the filter is definitive. A hit is confirmed against the table,
+    since it may be a false positive, and the answer is cached briefly.
+    """
+
+    def __init__(self, session_factory=SessionLocal, capacity: int = BLOOM_CAPACITY, enabled: bool = True):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.enabled = enabled
+        self.bloom = BloomFilter(capacity, BLOOM_ERROR_RATE)
+        self.confirmed = TTLCache(maxsize=10000, ttl=60)  # key -> not_before (0.0 for a jti) or None
+        self.lock = threading.Lock()
+        self.synced_until = 0.0   # revoked_at high-water mark of the last sync
+        self.next_sync = 0.0
+        self.next_compact = 0.0
+
+    def revoke_token(self, payload: Dict[str, Any]):
+        """Revoke one token until it would have expired anyway"""
+        jti = payload.get("jti")
+        if not jti:
+            return
+        self._persist(jti, not_before=None, expires_at=float(payload.get("exp") or time.time() + self._max_lifetime()))
+        token_cache.revoke_jti(jti)
+
+    def revoke_subject(self, subject: str):
+        """Revoke every token issued to a subject so far (password reset, suspension)"""
+        now = time.time()
+        self._persist(SUBJECT_PREFIX + subject, not_before=now, expires_at=now + self._max_lifetime())
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        if not self.enabled:
+            return False
+        self._maybe_sync()
+
+        jti = payload.get("jti")
+        if jti and jti in self.bloom and self._lookup(jti) is not None:
+            return True
+
+        subject = payload.get("sub")
+        if subject and SUBJECT_PREFIX + subject in self.bloom:
+            not_before = self._lookup(SUBJECT_PREFIX + subject)
+            # Tokens minted before iat was stamped count as issued at the epoch
+            if not_before is not None and (payload.get("iat") or 0) <= not_before:
+                return True
+        return False
+
+    async def is_revoked_async(self, payload: Dict[str, Any]) -> bool:
+        """is_revoked for async callers: the usual filter miss is answered on the event loop,
+        a due sync or a filter hit (both need the database) in the threadpool"""
+        if not self.enabled:
+            return False
+        if time.monotonic() >= self.next_sync or self._might_be_revoked(payload):
+            return await run_in_threadpool(self.is_revoked, payload)
+        return False
+
+    def _might_be_revoked(self, payload: Dict[str, Any]) -> bool:
+        jti = payload.get("jti")
+        subject = payload.get("sub")
+        return bool(jti and jti in self.bloom) or bool(subject and SUBJECT_PREFIX + subject in self.bloom)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "bloom_items": len(self.bloom),
+            "bloom_capacity": self.bloom.capacity,
+            "confirmed": self.confirmed.stats(),
+        }
+
+    @staticmethod
+    def _max_lifetime() -> float:
+        return max(settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+    def _persist(self, key: str, not_before: Optional[float], expires_at: float):
+        db = self.session_factory()
+        try:
+            db.merge(RevokedToken(key=key, not_before=not_before, expires_at=expires_at, revoked_at=time.time()))
+            db.commit()
+        finally:
+            db.close()
+        self.bloom.add(key)
+        self.confirmed.pop(key)
+
+    def _lookup(self, key: str) -> Optional[float]:
+        """not_before of a live revocation (0.0 for a jti), None if there is none"""
+        cached = self.confirmed.get(key, default=self)
+        if cached is not self:
+            return cached
+
+        db = self.session_factory()
+        try:
+            row = db.execute(
+                select(RevokedToken.not_before).where(RevokedToken.key == key, RevokedToken.expires_at > time.time())
+            ).first()
+        except Exception as e:
+            # Only reached on a filter hit, so fail closed
+            logger.error(f"Revocation lookup failed for {key}: {e}")
+            return float("inf")
+        finally:
+            db.close()
+        value = None if row is None else (row.not_before or 0.0)
+        self.confirmed.set(key, value)
+        return value
+
+    def _maybe_sync(self):
+        now = time.monotonic()
+        if now < self.next_sync or not self.lock.acquire(blocking=False):
+            return
+        try:
+            if now >= self.next_compact:
+                self._compact()
+                self.next_compact = now + COMPACT_INTERVAL_SECONDS
+            else:
+                self._sync()
+            self.next_sync = now + SYNC_INTERVAL_SECONDS
+        except Exception as e:
+            logger.error(f"Revocation sync failed: {e}")
+            self.next_sync = now + SYNC_INTERVAL_SECONDS
+        finally:
+            self.lock.release()
+
+    def _sync(self):
+        """Add revocations made by other workers since the last sync"""
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(RevokedToken.key, RevokedToken.revoked_at)
+                .where(RevokedToken.revoked_at >= self.synced_until - SYNC_SKEW_SECONDS)
+            ).all()
+        finally:
+            db.close()
+        for row in rows:
+            self.bloom.add(row.key)
+            self.confirmed.pop(row.key)
+            self.synced_until = max(self.synced_until, row.revoked_at)
+        if len(self.bloom) > self.bloom.capacity:
+            self.next_compact = 0.0  # over capacity the false-positive rate climbs; rebuild larger
+
+    def _compact(self):
+        """Delete expired rows and rebuild the filter from the live ones"""
+        now = time.time()
+        db = self.session_factory()
+        try:
+            db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+            db.commit()
+            rows = db.execute(select(RevokedToken.key, RevokedToken.revoked_at)).all()
+        finally:
+            db.close()
+        bloom = BloomFilter(max(self.capacity, 2 * len(rows)), BLOOM_ERROR_RATE)
+        for row in rows:
+            bloom.add(row.key)
+            self.synced_until = max(self.synced_until, row.revoked_at)
+        self.bloom = bloom
+        self.confirmed.clear()
+        # Revocations committed while the filter was being rebuilt may have gone to the old one
+        self._sync()
+        logger.info(f"Revocation store compacted: {len(rows)} live entries")
+
+
+# Global revocation store instance
+revocation_store = RevocationStore(enabled=security_settings.TOKEN_BLACKLIST_ENABLED)
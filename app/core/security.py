@@ -1,29 +1,52 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
+from passlib.context import CryptContext
 import hashlib
 import secrets
+import time
 from app.core.config import settings
+from app.core.token_cache import token_cache
+
+# Senhas antigas em bcrypt: contexto criado uma vez, migradas para PBKDF2 no login
+legacy_pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+SCHEME_PBKDF2 = "pbkdf2"
+SCHEME_BCRYPT = "bcrypt"
+SCHEME_UNKNOWN = "unknown"
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+def detect_hash_scheme(hashed_password: Optional[str]) -> str:
+    if not hashed_password:
+        return SCHEME_UNKNOWN
+    if hashed_password.startswith(BCRYPT_PREFIXES):
+        return SCHEME_BCRYPT
+    if hashed_password.count('$') == 1:
+        return SCHEME_PBKDF2
+    return SCHEME_UNKNOWN
+
+def needs_rehash(hashed_password: Optional[str]) -> bool:
+    return detect_hash_scheme(hashed_password) != SCHEME_PBKDF2
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    # Tentar novo formato primeiro (PBKDF2)
-    if '$' in hashed_password:
-        try:
-            salt, stored_hash = hashed_password.split('$')
-            computed_hash = hashlib.pbkdf2_hmac('sha256', plain_password.encode(), salt.encode(), 100000)
-            return secrets.compare_digest(stored_hash.encode(), computed_hash.hex().encode())
-        except:
-            pass
+    scheme = detect_hash_scheme(hashed_password)
+    
+    # Formato atual (PBKDF2)
+    if scheme == SCHEME_PBKDF2:
+        salt, stored_hash = hashed_password.split('$')
+        computed_hash = hashlib.pbkdf2_hmac('sha256', plain_password.encode(), salt.encode(), 100000)
+        return secrets.compare_digest(stored_hash.encode(), computed_hash.hex().encode())
     
     # Fallback para bcrypt (senhas antigas)
-    try:
-        from passlib.context import CryptContext
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        if len(plain_password.encode('utf-8')) > 72:
-            plain_password = plain_password[:72]
-        return pwd_context.verify(plain_password, hashed_password)
-    except:
-        return False
+    if scheme == SCHEME_BCRYPT:
+        try:
+            if len(plain_password.encode('utf-8')) > 72:
+                plain_password = plain_password[:72]
+            return legacy_pwd_context.verify(plain_password, hashed_password)
+        except Exception:
+            return False
+    
+    return False
 
 def get_password_hash(password: str) -> str:
     # Usar PBKDF2 com SHA256 (sem limite de tamanho)
@@ -37,18 +60,26 @@ def create_access_token(data: dict, expires_delta: Optional[int] = None):
         expire = datetime.utcnow() + timedelta(seconds=expires_delta)
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # iat/jti let tokens be revoked individually or per subject; iat keeps sub-second
+    # precision so a token issued right after a subject revocation is not caught by it
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": secrets.token_urlsafe(16)})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 def create_refresh_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": secrets.token_urlsafe(16)})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 def verify_token(token: str):
+    # Tokens already verified by this process skip the HMAC and claim checks
+    payload = token_cache.get("access", token)
+    if payload is not None:
+        return payload
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+    token_cache.put("access", token, payload)
+    return payload
\ No newline at end of file
@@ -25,6 +25,8 @@ class SecuritySettings(BaseSettings):
     # Rate Limiting
     RATE_LIMIT_REQUESTS_PER_MINUTE: int = 60
     RATE_LIMIT_BURST: int = 100
+    IP_BLOCK_DURATION_MINUTES: int = 15
+    IP_BLOCKLIST: List[str] = []  # addresses or CIDR ranges, blocked permanently
     
     # Session Management
     SESSION_TIMEOUT_MINUTES: int = 30
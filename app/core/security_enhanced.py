@@ -2,6 +2,8 @@
 Enhanced Security Module for Collapp
 Implements enterprise-grade security measures
 """
+import asyncio
+import math
 import secrets
 import hashlib
 import hmac
@@ -13,6 +15,7 @@ from passlib.context import CryptContext
 from passlib.hash import argon2
 import bcrypt
 from app.core.config import settings
+from app.core.token_cache import token_cache
 
 # Enhanced password context with Argon2
 pwd_context = CryptContext(
@@ -23,6 +26,27 @@ pwd_context = CryptContext(
     argon2__parallelism=1       # 1 thread
 )
 
+LOGIN_PADDING_SECONDS = 0.1  # every login attempt answers after a multiple of this (the old fixed sleep)
+
+class LoginDeadline:
+    """Pads a block to a fixed duration by awaiting, so no thread is held while waiting"""
+    
+    def __init__(self, target: float):
+        self.target = target
+        self.started = 0.0
+    
+    async def __aenter__(self):
+        self.started = time.monotonic()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        # Success and every failure path finish on the same deadline; overruns
+        # are rounded up to the next slot so they reveal nothing finer
+        elapsed = time.monotonic() - self.started
+        slots = max(1, math.ceil(elapsed / self.target))
+        await asyncio.sleep(slots * self.target - elapsed)
+        return False
+
 class SecurityManager:
     """Enhanced security manager with multiple layers of protection"""
     
@@ -31,14 +55,16 @@ class SecurityManager:
         self.blocked_ips = set()   # IP blocking
         
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Verify password with timing attack protection"""
+        """Verify password (wrap login attempts in login_deadline() for timing protection)"""
         try:
-            # Add constant time delay to prevent timing attacks
-            time.sleep(0.1)
             return pwd_context.verify(plain_password, hashed_password)
         except Exception:
             return False
     
+    def login_deadline(self, target: float = LOGIN_PADDING_SECONDS) -> LoginDeadline:
+        """Equalize login latency: async with security_manager.login_deadline(): ..."""
+        return LoginDeadline(target)
+    
     def get_password_hash(self, password: str) -> str:
         """Generate secure password hash with salt"""
         return pwd_context.hash(password)
@@ -122,6 +148,10 @@ class SecurityManager:
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify JWT token with enhanced validation"""
+        payload = token_cache.get("enhanced", token)
+        if payload is not None:
+            return payload
+        
         try:
             payload = jwt.decode(
                 token, 
@@ -130,9 +160,10 @@ class SecurityManager:
                 audience="collapp-client",
                 issuer="collapp-api"
             )
-            return payload
         except JWTError:
             return None
+        token_cache.put("enhanced", token, payload)
+        return payload
     
     def check_rate_limit(self, identifier: str, max_attempts: int = 5, window_minutes: int = 15) -> bool:
         """Check if identifier is rate limited"""
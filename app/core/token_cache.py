@@ -0,0 +1,69 @@
+"""
+Verified Token Cache for Collapp
+Skips JWT signature and claim checks for tokens already verified by this process
+"""
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Optional
+from app.core.cache import TTLCache
+
+MAX_VERIFIED_TOKENS = 50000
+
+
+class VerifiedTokenCache:
+    """sha256(token) -> decoded claims, kept until the token's exp"""
+
+    def __init__(self, maxsize: int = MAX_VERIFIED_TOKENS):
+        self.cache = TTLCache(maxsize=maxsize)
+        self.by_jti: Dict[str, set] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(namespace: str, token: str):
+        return namespace, hashlib.sha256(token.encode()).digest()
+
+    def get(self, namespace: str, token: str) -> Optional[Dict[str, Any]]:
+        payload = self.cache.get(self._key(namespace, token))
+        return dict(payload) if payload is not None else None
+
+    def put(self, namespace: str, token: str, payload: Dict[str, Any]):
+        """Remember a verified payload; tokens without a numeric exp are not cached"""
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+        key = self._key(namespace, token)
+        self.cache.set(key, dict(payload), ttl=exp - time.time())
+
+        jti = payload.get("jti")
+        if jti:
+            with self.lock:
+                self.by_jti.setdefault(jti, set()).add(key)
+                if len(self.by_jti) > 2 * self.cache.maxsize:
+                    self._prune_jti_index()
+
+    def revoke_jti(self, jti: str):
+        """Drop every cached token carrying this jti"""
+        with self.lock:
+            keys = self.by_jti.pop(jti, ())
+        for key in keys:
+            self.cache.pop(key)
+
+    def clear(self):
+        self.cache.clear()
+        with self.lock:
+            self.by_jti.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self.cache.stats()
+
+    def _prune_jti_index(self):
+        # Entries expired or evicted from the LRU leave stale index keys behind
+        self.by_jti = {
+            jti: live for jti, keys in self.by_jti.items()
+            if (live := {key for key in keys if self.cache.peek(key) is not None})
+        }
+
+
+# Global verified token cache instance
+token_cache = VerifiedTokenCache()
@@ -1,9 +1,10 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, Integer, Text, ForeignKey, Boolean, Float, Enum, ARRAY
+from sqlalchemy import Column, String, DateTime, Integer, Text, ForeignKey, Boolean, Float, Enum, ARRAY, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from app.db.database import Base
+from app.core.encryption import data_encryption
 import enum
 
 class UserPlan(enum.Enum):
@@ -22,6 +23,7 @@ class User(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String(255), unique=True, index=True, nullable=False)
+    email_bidx = Column(String(64), unique=True, index=True)  # HMAC of the plaintext email; lookups use this
     password_hash = Column(String(255), nullable=False)
     name = Column(String(100))
     bio = Column(Text)
@@ -36,6 +38,12 @@ class User(Base):
     
     # Relationships
     profile = relationship("UserProfile", back_populates="user", uselist=False, cascade="all, delete-orphan")
+    
+    @validates("email")
+    def _index_email(self, key, email):
+        # Kept in step on every write so lookups never depend on email being readable
+        self.email_bidx = data_encryption.blind_index(email) if email else None
+        return email
 
 class UserProfile(Base):
     __tablename__ = "user_profiles"
@@ -85,6 +93,10 @@ class Swipe(Base):
     action = Column(String, nullable=False)  # like, dislike, boost
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        UniqueConstraint("swiper_id", "swiped_id", name="uq_swipes_swiper_swiped"),
+    )
+
 class Match(Base):
     __tablename__ = "matches"
 
@@ -113,6 +125,78 @@ class Message(Base):
     message_type = Column(String, default="text")  # text, file, link
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_messages_chat_id_created_at", "chat_id", "created_at"),
+    )
+
+class ChatSummary(Base):
+    __tablename__ = "chat_summaries"
+
+    chat_id = Column(String, ForeignKey("chats.id"), primary_key=True)
+    match_id = Column(String, ForeignKey("matches.id"))
+    wanted_id = Column(String, ForeignKey("wanted_posts.id"))
+    last_message_id = Column(String, ForeignKey("messages.id"))
+    last_message_at = Column(DateTime(timezone=True))
+    last_sender_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    last_message_type = Column(String)
+    last_message_preview = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ChatParticipant(Base):
+    __tablename__ = "chat_participants"
+
+    chat_id = Column(String, ForeignKey("chats.id"), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    role = Column(String, nullable=False)  # match, author, applicant, offer_creator, offer_accepter
+    unread_count = Column(Integer, default=0, nullable=False)
+    last_activity_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_chat_participants_user_id_last_activity_at", "user_id", "last_activity_at"),
+    )
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String, primary_key=True)
+    tat = Column(Float, nullable=False)  # GCRA theoretical arrival time (epoch seconds)
+
+class RecentWrite(Base):
+    __tablename__ = "recent_writes"
+
+    subject = Column(String, primary_key=True)  # token subject (email)
+    written_at = Column(Float, nullable=False)  # epoch seconds of the subject's last commit with writes
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    key = Column(String, primary_key=True)  # a jti, or "sub:<email>" for every token of a subject
+    not_before = Column(Float)  # subject keys: tokens issued at or before this epoch are revoked
+    expires_at = Column(Float, nullable=False)  # epoch seconds; the row is useless afterwards
+    revoked_at = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_revoked_tokens_revoked_at", "revoked_at"),
+        Index("ix_revoked_tokens_expires_at", "expires_at"),
+    )
+
+class AuditEvent(Base):
+    __tablename__ = "audit_events"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_type = Column(String, nullable=False)
+    user_id = Column(String)  # as logged; not every event has a valid user
+    ip_address = Column(String)
+    user_agent = Column(String)
+    details = Column(JSONB, default=dict)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_audit_events_created_at", "created_at"),
+        Index("ix_audit_events_user_id_created_at", "user_id", "created_at"),
+    )
+
 class WantedPost(Base):
     __tablename__ = "wanted_posts"
 
@@ -0,0 +1,256 @@
+"""
+Read Replica Routing for Collapp
+Sends read-only dependencies to healthy replicas and keeps recent writers on the primary
+"""
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from fastapi import Request
+from sqlalchemy import create_engine, delete, event, select, text
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import verify_token
+from app.db.database import SessionLocal
+from app.db.models import RecentWrite
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_STICKY_SUBJECTS = 100000
+WRITER_EVICT_INTERVAL_SECONDS = 60
+
+# Seconds the replica is behind; 0 when it has replayed everything it received,
+# so an idle primary does not read as lag
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+# Token subject of the request being served, set by get_current_user
+current_subject: ContextVar[Optional[str]] = ContextVar("current_subject", default=None)
+
+
+def create_replica_engine(url: str):
+    """Sync engine for a replica, pooled like the primary's"""
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+        pool_recycle=3600,
+        echo=settings.DEBUG,
+        connect_args={
+            "client_encoding": "utf8",
+            "application_name": "collapp_backend_replica",
+            "connect_timeout": 2
+        }
+    )
+
+
+class Replica:
+    """A replica engine and the result of its last health check"""
+
+    def __init__(self, engine):
+        self.name = engine.url.render_as_string(hide_password=True)
+        self.engine = engine
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.healthy = False  # until the first check succeeds
+        self.lag: Optional[float] = None
+        event.listen(engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        # A dropped replica leaves the rotation now, not at the next check
+        if context.is_disconnect:
+            self.healthy = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"replica": self.name, "healthy": self.healthy, "lag_seconds": self.lag}
+
+
+class ReplicaRouter:
+    """Picks the engine behind a read-only session.
+
+    Replicas are used round-robin while healthy and no more than max_lag seconds
+    behind. A subject that committed a write reads from the primary for the
+    sticky window, so it sees its own writes. The write time is committed to
+    recent_writes along with the write itself, so the window holds whichever
+    worker serves the next read; recent_writers caches the positive answers.
+    """
+
+    def __init__(self, engines: List, max_lag: float, sticky_seconds: float, check_interval: float, session_factory=SessionLocal):
+        self.replicas = [Replica(engine) for engine in engines]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.session_factory = session_factory
+        # A replica within max_lag may still miss a write younger than max_lag
+        self.recent_writers = TTLCache(maxsize=MAX_STICKY_SUBJECTS, ttl=max(sticky_seconds, max_lag))
+        self.lag_query = LAG_QUERY
+        self.lock = threading.Lock()
+        self.next_check = 0.0
+        self.last_evicted = 0.0
+        self.turn = itertools.count()
+
+    def record_write(self, subject: str):
+        self.recent_writers.set(subject, True)
+
+    def share_write(self, session: Session, subject: str, now: Optional[float] = None):
+        """Stamp the subject's write time in the session's own transaction"""
+        now = time.time() if now is None else now
+        table = RecentWrite.__table__
+        if session.get_bind().dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(subject=subject, written_at=now)
+        session.execute(stmt.on_conflict_do_update(index_elements=[table.c.subject], set_={"written_at": now}))
+        if now - self.last_evicted > WRITER_EVICT_INTERVAL_SECONDS:
+            self.last_evicted = now
+            session.execute(delete(table).where(table.c.written_at < now - self.recent_writers.ttl))
+
+    def wrote_recently(self, subject: str) -> bool:
+        """Whether the subject committed a write, through any worker, within the sticky window"""
+        if self.recent_writers.get(subject):
+            return True
+        try:
+            db = self.session_factory()
+            try:
+                written_at = db.execute(
+                    select(RecentWrite.written_at).where(RecentWrite.subject == subject)
+                ).scalar()
+            finally:
+                db.close()
+        except Exception as e:
+            # Unknown, so read from the primary: it is never behind
+            logger.error(f"Could not read recent writes: {e}")
+            return True
+        if written_at is None:
+            return False
+        remaining = written_at + self.recent_writers.ttl - time.time()
+        self.recent_writers.set(subject, True, ttl=remaining)
+        return remaining > 0
+
+    def session(self, subject: Optional[str] = None) -> Session:
+        """A session on a usable replica, else on the primary"""
+        replica = self._pick(subject)
+        if replica is None:
+            return self.session_factory()
+        return replica.session_factory()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [replica.stats() for replica in self.replicas]
+
+    def dispose(self):
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+    def _pick(self, subject: Optional[str]) -> Optional[Replica]:
+        if not self.replicas:
+            return None
+        if subject is not None and self.wrote_recently(subject):
+            return None
+
+        self._maybe_check()
+        usable = [
+            replica for replica in self.replicas
+            if replica.healthy and replica.lag is not None and replica.lag <= self.max_lag
+        ]
+        if not usable:
+            return None
+        return usable[next(self.turn) % len(usable)]
+
+    def _maybe_check(self):
+        now = time.monotonic()
+        if now < self.next_check or not self.lock.acquire(blocking=False):
+            return
+        try:
+            for replica in self.replicas:
+                self._check(replica)
+            self.next_check = now + self.check_interval
+        finally:
+            self.lock.release()
+
+    def _check(self, replica: Replica):
+        was_usable = replica.healthy and replica.lag is not None and replica.lag <= self.max_lag
+        try:
+            with replica.engine.connect() as conn:
+                replica.lag = float(conn.execute(self.lag_query).scalar() or 0)
+            replica.healthy = True
+        except Exception as e:
+            if replica.healthy:
+                logger.error(f"Replica {replica.name} is unavailable: {e}")
+            replica.healthy = False
+            replica.lag = None
+
+        is_usable = replica.healthy and replica.lag <= self.max_lag
+        if was_usable and replica.healthy and not is_usable:
+            logger.warning(f"Replica {replica.name} is {replica.lag:.1f}s behind; reading from the primary")
+        elif is_usable and not was_usable:
+            logger.info(f"Replica {replica.name} is back in rotation")
+
+
+def _bearer_subject(request: Request) -> Optional[str]:
+    """Subject of an optional bearer token, for routes that do not authenticate"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = verify_token(token)
+    return payload.get("sub") if payload else None
+
+
+def get_read_db(request: Request):
+    """Dependency for read-only sessions; never commit through it"""
+    db = replica_router.session(current_subject.get() or _bearer_subject(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@event.listens_for(Session, "after_flush")
+def _flag_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _share_writer(session):
+    # Only worth a row when reads can go to a replica; the final flush has not run yet
+    subject = current_subject.get()
+    if subject is None or not replica_router.replicas:
+        return
+    if session.info.get("wrote") or session.new or session.dirty or session.deleted:
+        replica_router.share_write(session, subject)
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session):
+    # Sync and async sessions alike; commits outside a request have no subject
+    if session.info.pop("wrote", False):
+        subject = current_subject.get()
+        if subject is not None:
+            replica_router.record_write(subject)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_write(session):
+    session.info.pop("wrote", None)
+
+
+# Global replica router instance
+replica_router = ReplicaRouter(
+    [create_replica_engine(url) for url in settings.DATABASE_REPLICA_URLS],
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    sticky_seconds=settings.REPLICA_STICKY_SECONDS,
+    check_interval=settings.REPLICA_CHECK_INTERVAL_SECONDS
+)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, status
 from app.db.database import check_db_connection
+from app.db.replicas import replica_router
 from datetime import datetime
 
 router = APIRouter(prefix="/health", tags=["health"])
@@ -25,5 +26,6 @@ def database_health():
     return {
         "status": "healthy",
         "database": "connected",
+        "replicas": replica_router.stats(),
         "timestamp": datetime.utcnow().isoformat()
     }
\ No newline at end of file
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.db.database import get_db
+from app.db.replicas import get_read_db
 from app.db.models import User, LinkInBio
 from app.linkinbio.schemas import LinkInBioCreate, LinkInBioUpdate, LinkInBioResponse
 from app.auth.dependencies import get_current_user
@@ -46,7 +47,7 @@ def get_my_pages(
     return pages
 
 @router.get("/{slug}", response_model=LinkInBioResponse)
-def get_link_in_bio(slug: str, db: Session = Depends(get_db)):
+def get_link_in_bio(slug: str, db: Session = Depends(get_read_db)):
     link_page = db.query(LinkInBio).filter(
         LinkInBio.slug == slug,
         LinkInBio.is_active == True
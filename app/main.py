@@ -1,4 +1,5 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.auth.router import router as auth_router
 from app.onboarding.router import router as onboarding_router
@@ -16,8 +17,14 @@ from app.subscriptions.router import router as subscriptions_router
 from app.admin.router import router as admin_router
 from app.reports.router import router as reports_router
 from app.profile.router import router as profile_router
-from app.core.middleware import RateLimitMiddleware, LoggingMiddleware
-from app.db.database import engine
+from app.core.middleware import RateLimitMiddleware, LoggingMiddleware, MetricsMiddleware
+from app.core.metrics import registry, instrument_engine
+from app.chat.hub import chat_hub
+from app.core.hashing import password_hasher
+from app.core.audit import audit_pipeline
+from app.db.database import engine, async_engine
+from app.db.replicas import replica_router
+from app.core.config import settings
 from app.db.models import Base
 import logging
 import sys
@@ -53,9 +60,16 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
-# Add middleware
-app.middleware("http")(RateLimitMiddleware(calls=100, period=60))
-app.middleware("http")(LoggingMiddleware())
+# Add middleware (last added runs first: metrics, logging, rate limiting, then CORS)
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(LoggingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+# SQL statement counts and time per request
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+for replica in replica_router.replicas:
+    instrument_engine(replica.engine)
 
 # Include routers
 app.include_router(auth_router)
@@ -76,10 +90,42 @@ app.include_router(reports_router)
 app.include_router(profile_router)
 
 
+@app.on_event("shutdown")
+def shutdown_chat_hub():
+    chat_hub.close()
+
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
+
+
+@app.on_event("shutdown")
+def shutdown_audit_pipeline():
+    audit_pipeline.close()
+
+
+@app.on_event("shutdown")
+async def shutdown_async_engine():
+    await async_engine.dispose()
+
+
+@app.on_event("shutdown")
+def shutdown_replica_engines():
+    replica_router.dispose()
+
+
 @app.get("/")
 def read_root():
     return {"message": "Collapp Auth API is running"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: str = Header(None)):
+    # Prometheus scrape endpoint; set METRICS_TOKEN to require "Bearer <token>"
+    if settings.METRICS_TOKEN and authorization != f"Bearer {settings.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
@@ -93,12 +139,13 @@ def create_admin_user():
     from sqlalchemy.orm import sessionmaker
     from app.db.models import User
     from app.core.security import get_password_hash
+    from app.auth.crud import get_user_by_email
     
     SessionLocal = sessionmaker(bind=engine)
     db = SessionLocal()
     
     try:
-        existing = db.query(User).filter(User.email == "admin@admin.com").first()
+        existing = get_user_by_email(db, "admin@admin.com")
         if existing:
             existing.is_admin = True
             db.commit()
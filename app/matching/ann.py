@@ -0,0 +1,381 @@
+"""
+Approximate Nearest-Neighbour Index for Collapp
+IVF (inverted file) index over creator profile feature vectors
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Container, Dict, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.models import User, UserProfile
+from app.matching.scoring import profile_encoder, score_vectors
+import logging
+
+logger = logging.getLogger(__name__)
+
+MIN_TRAIN_SIZE = 1000    # below this, search is an exact brute-force scan
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 20000
+RELOAD_CHECK_SECONDS = 60
+SYNC_SLACK_SECONDS = 30  # clock skew between workers and the database, plus commit latency
+
+
+class IVFIndex:
+    """Inverted-file index with incremental insert/delete and disk snapshots"""
+
+    def __init__(self, dimensions: int, blocks: int):
+        self.dimensions = dimensions
+        self.blocks = blocks
+        self.centroids = np.zeros((0, dimensions), dtype=np.float32)
+        self.built_at: Optional[float] = None  # when the rows were read from the database
+        self.vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self.presence = np.zeros((0, blocks), dtype=np.float32)
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.row_ids: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self.free_rows: List[int] = []
+        self.lists: Dict[int, Set[int]] = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def trained(self) -> bool:
+        return len(self.centroids) > 0
+
+    def train(self, vectors: np.ndarray):
+        """Learn coarse centroids with spherical k-means"""
+        if len(vectors) < MIN_TRAIN_SIZE:
+            self.centroids = np.zeros((0, self.dimensions), dtype=np.float32)
+            return
+        nlist = int(min(1024, max(1, np.sqrt(len(vectors)))))
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(len(vectors), min(len(vectors), KMEANS_SAMPLE), replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[nearest == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids = centroids / np.where(norms > 0, norms, 1)
+        self.centroids = centroids.astype(np.float32)
+
+    def add(self, item_id: str, vector: np.ndarray, presence: np.ndarray):
+        """Insert or replace one item"""
+        self.remove(item_id)
+        if self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            row = len(self.row_ids)
+            if row >= len(self.vectors):
+                self._grow(max(1024, len(self.vectors) * 2))
+            self.row_ids.append(None)
+        self.vectors[row] = vector
+        self.presence[row] = presence
+        self.row_ids[row] = item_id
+        self.rows[item_id] = row
+        list_id = self._nearest_list(vector)
+        self.assignments[row] = list_id
+        self.lists.setdefault(list_id, set()).add(row)
+
+    def remove(self, item_id: str):
+        """Delete one item (no-op if absent)"""
+        row = self.rows.pop(item_id, None)
+        if row is None:
+            return
+        self.lists.get(int(self.assignments[row]), set()).discard(row)
+        self.row_ids[row] = None
+        self.free_rows.append(row)
+
+    def search(
+        self,
+        vector: np.ndarray,
+        presence: np.ndarray,
+        k: int,
+        exclude: Optional[Container[str]] = None,
+        nprobe: Optional[int] = None,
+        excluded: Optional[Dict[str, int]] = None
+    ) -> List[Tuple[str, int]]:
+        """Return up to k (item id, score) pairs most similar to the query.
+
+        Scores of the candidates that exclude removed are written to excluded,
+        for callers whose exclude set can have false positives.
+        """
+        if exclude is None:
+            exclude = set()
+        if not self.rows:
+            return []
+
+        if not self.trained:
+            candidate_rows = np.fromiter(self.rows.values(), dtype=np.int64)
+            return self._rank(candidate_rows, vector, presence, k, exclude, excluded)
+
+        order = np.argsort(-(self.centroids @ vector))
+        nprobe = nprobe or max(1, len(self.centroids) // 16)
+        results: List[Tuple[str, int]] = []
+        # Widen the probe until enough unexcluded items are found
+        while True:
+            probed = order[:nprobe]
+            candidate_rows = np.fromiter(
+                (row for list_id in probed for row in self.lists.get(int(list_id), ())),
+                dtype=np.int64
+            )
+            results = self._rank(candidate_rows, vector, presence, k, exclude, excluded)
+            if len(results) >= k or nprobe >= len(order):
+                return results
+            nprobe *= 2
+
+    def save(self, path: str):
+        """Atomically write a snapshot of the index to disk"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        live_rows = np.fromiter(self.rows.values(), dtype=np.int64)
+        tmp_path = f"{path}.tmp.{os.getpid()}.npz"
+        np.savez_compressed(
+            tmp_path,
+            centroids=self.centroids,
+            vectors=self.vectors[live_rows],
+            presence=self.presence[live_rows],
+            ids=np.array([self.row_ids[row] for row in live_rows], dtype=str),
+            built_at=np.float64(self.built_at if self.built_at is not None else time.time()),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        """Read a snapshot written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            index = cls(data["vectors"].shape[1], data["presence"].shape[1])
+            index.centroids = data["centroids"]
+            index.add_many(data["ids"].tolist(), data["vectors"], data["presence"])
+            # Older snapshots have no built_at; their file time is the best guess
+            index.built_at = float(data["built_at"]) if "built_at" in data.files else os.path.getmtime(path)
+        return index
+
+    def add_many(self, item_ids: List[str], vectors: np.ndarray, presence: np.ndarray):
+        """Bulk insert (used when building or loading)"""
+        self._grow(len(self.row_ids) + len(item_ids))
+        list_ids = self._nearest_lists(vectors)
+        for item_id, vector, mask, list_id in zip(item_ids, vectors, presence, list_ids):
+            self.remove(item_id)
+            row = len(self.row_ids)
+            self.row_ids.append(item_id)
+            self.vectors[row] = vector
+            self.presence[row] = mask
+            self.assignments[row] = list_id
+            self.rows[item_id] = row
+            self.lists.setdefault(int(list_id), set()).add(row)
+
+    def _rank(self, candidate_rows, vector, presence, k, exclude, excluded=None) -> List[Tuple[str, int]]:
+        if len(candidate_rows) == 0:
+            return []
+        scores = score_vectors(
+            vector, presence,
+            self.vectors[candidate_rows], self.presence[candidate_rows],
+            profile_encoder.weights
+        )
+        keep = np.fromiter((self.row_ids[row] not in exclude for row in candidate_rows), dtype=bool, count=len(candidate_rows))
+        if excluded is not None:
+            for i in np.flatnonzero(~keep):
+                excluded[self.row_ids[candidate_rows[i]]] = int(scores[i])
+        candidate_rows, scores = candidate_rows[keep], scores[keep]
+        if len(scores) == 0:
+            return []
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self.row_ids[candidate_rows[i]], int(scores[i])) for i in best]
+
+    def _nearest_list(self, vector: np.ndarray) -> int:
+        if not self.trained:
+            return 0
+        return int(np.argmax(self.centroids @ vector))
+
+    def _nearest_lists(self, vectors: np.ndarray) -> np.ndarray:
+        if not self.trained or len(vectors) == 0:
+            return np.zeros(len(vectors), dtype=np.int32)
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _grow(self, capacity: int):
+        if capacity <= len(self.vectors):
+            return
+        extra = capacity - len(self.vectors)
+        self.vectors = np.vstack([self.vectors, np.zeros((extra, self.dimensions), dtype=np.float32)])
+        self.presence = np.vstack([self.presence, np.zeros((extra, self.blocks), dtype=np.float32)])
+        self.assignments = np.concatenate([self.assignments, np.zeros(extra, dtype=np.int32)])
+
+
+class CreatorIndex:
+    """Process-wide IVF index of eligible creators, loaded from disk on first use"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index: Optional[IVFIndex] = None
+        self.loaded_mtime: Optional[float] = None
+        self.last_reload_check = 0.0
+        # Rows changed in the database after this time are not in the index yet
+        self.synced_at: Optional[float] = None
+        self.last_sync = 0.0
+        # Local changes not yet in a snapshot: user id -> (changed at, vectors or None if removed)
+        self.pending: Dict[str, Tuple[float, Optional[Tuple[np.ndarray, np.ndarray]]]] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        self._maybe_reload()
+        return self.index is not None
+
+    def build(self, db: Session) -> IVFIndex:
+        """Build the index from every eligible creator and save it"""
+        built_at = time.time()
+        rows = eligible_creator_profiles(db).all()
+        vectors, presence = profile_encoder.encode_many(rows)
+        index = IVFIndex(profile_encoder.dimensions, len(profile_encoder.blocks))
+        index.train(vectors)
+        index.add_many([str(row.id) for row in rows], vectors, presence)
+        index.built_at = built_at
+        index.save(self.path)
+        with self.lock:
+            self.index = index
+            self.loaded_mtime = os.path.getmtime(self.path)
+            self.synced_at = built_at
+            self._drop_pending_before(built_at)
+        logger.info(f"Creator index built with {len(index)} profiles")
+        return index
+
+    def upsert(self, user_id: str, profile):
+        """Insert or refresh a creator after a profile change"""
+        vector, presence = profile_encoder.encode(profile)
+        with self.lock:
+            self.pending[str(user_id)] = (time.time(), (vector, presence))
+            if self.index is not None:
+                self.index.add(str(user_id), vector, presence)
+
+    def remove(self, user_id: str):
+        """Drop a creator that is no longer eligible"""
+        with self.lock:
+            self.pending[str(user_id)] = (time.time(), None)
+            if self.index is not None:
+                self.index.remove(str(user_id))
+
+    def sync(self, db: Session):
+        """Apply creators changed in the database since the snapshot or the last sync.
+
+        Upserts only reach the index of the worker that served them; this is how
+        the other workers, and a restarted one, pick them up.
+        """
+        now = time.time()
+        if self.index is None or self.synced_at is None or now - self.last_sync < RELOAD_CHECK_SECONDS:
+            return
+        self.last_sync = now
+        since = datetime.fromtimestamp(self.synced_at - SYNC_SLACK_SECONDS, timezone.utc)
+        rows = db.query(
+            User.id,
+            User.onboarding_completed,
+            User.is_active,
+            UserProfile.user_id.label("profile_user_id"),
+            *PROFILE_FEATURE_COLUMNS
+        ).outerjoin(UserProfile).filter(
+            (User.updated_at >= since) | (UserProfile.updated_at >= since)
+        ).all()
+        eligible = [row for row in rows if row.onboarding_completed and row.is_active and row.profile_user_id is not None]
+        vectors, presence = profile_encoder.encode_many(eligible)
+        with self.lock:
+            if self.index is None:
+                return
+            for row, vector, mask in zip(eligible, vectors, presence):
+                self.index.add(str(row.id), vector, mask)
+            for row in rows:
+                if not (row.onboarding_completed and row.is_active and row.profile_user_id is not None):
+                    self.index.remove(str(row.id))
+            self.synced_at = now
+        if rows:
+            logger.info(f"Creator index synced {len(rows)} changed profiles")
+
+    def search(
+        self,
+        profile,
+        k: int,
+        exclude: Optional[Container[str]] = None,
+        confirm: Optional[Callable[[List[str]], Set[str]]] = None
+    ) -> List[Tuple[str, int]]:
+        """Top-k most compatible creators for a profile.
+
+        With confirm, exclude may have false positives (a Bloom filter): the
+        excluded candidates are passed to confirm, outside the lock, and the
+        ones it does not return are ranked back in.
+        """
+        vector, presence = profile_encoder.encode(profile)
+        excluded: Dict[str, int] = {}
+        with self.lock:
+            if self.index is None:
+                return []
+            results = self.index.search(vector, presence, k, exclude, excluded=excluded if confirm else None)
+        if not excluded:
+            return results
+        really_excluded = confirm(list(excluded))
+        results += [(item_id, score) for item_id, score in excluded.items() if item_id not in really_excluded]
+        results.sort(key=lambda result: -result[1])
+        return results[:k]
+
+    def _maybe_reload(self):
+        now = time.time()
+        if now - self.last_reload_check < RELOAD_CHECK_SECONDS:
+            return
+        self.last_reload_check = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self.loaded_mtime:
+            return
+        try:
+            index = IVFIndex.load(self.path)
+        except Exception as e:
+            logger.error(f"Failed to load creator index from {self.path}: {e}")
+            return
+        with self.lock:
+            # The snapshot already holds whatever changed before it was built
+            self._drop_pending_before(index.built_at)
+            for user_id, (_, change) in self.pending.items():
+                if change is None:
+                    index.remove(user_id)
+                else:
+                    index.add(user_id, *change)
+            self.index = index
+            self.loaded_mtime = mtime
+            # Changes other workers made after the snapshot come back on the next sync
+            self.synced_at = index.built_at
+            self.last_sync = 0.0
+
+    def _drop_pending_before(self, built_at: float):
+        self.pending = {user_id: entry for user_id, entry in self.pending.items() if entry[0] >= built_at}
+
+
+PROFILE_FEATURE_COLUMNS = (
+    UserProfile.niches,
+    UserProfile.content_types,
+    UserProfile.languages,
+    UserProfile.country,
+    UserProfile.follower_counts,
+    UserProfile.engagement_rates,
+    UserProfile.collaboration_types
+)
+
+
+def eligible_creator_profiles(db: Session):
+    """Profile feature columns of every creator that may appear in a deck"""
+    return db.query(User.id, *PROFILE_FEATURE_COLUMNS).join(UserProfile).filter(
+        User.onboarding_completed == True,
+        User.is_active == True
+    )
+
+
+# Global creator index instance
+creator_index = CreatorIndex(settings.ANN_INDEX_PATH)
@@ -0,0 +1,197 @@
+"""
+Candidate Deck Engine for Collapp
+Precomputes per-user queues of eligible creators for /matching/discover
+"""
+import threading
+import time
+from collections import deque, OrderedDict
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.db.database import SessionLocal
+from app.db.models import User, UserProfile
+from app.matching.ann import creator_index, eligible_creator_profiles
+from app.matching.scoring import top_k
+from app.matching.swipe_filter import swipe_history
+import logging
+
+logger = logging.getLogger(__name__)
+
+DECK_SIZE = 200          # candidates precomputed per user
+CANDIDATE_POOL = 2000    # eligible creators scored per rebuild
+MAX_POOL_PAGES = 5       # pages scanned when no ANN index is available
+REFILL_THRESHOLD = 30    # rebuild in background when fewer live cards remain
+DECK_TTL_SECONDS = 300   # rebuild stale decks so other workers' writes show up
+MAX_DECKS = 10000        # LRU bound on decks kept in memory
+
+
+class CandidateDeck:
+    """Ordered queue of candidate creator IDs for a single user"""
+
+    def __init__(self, candidate_ids: List[str], generation: int, scores: Optional[Dict[str, int]] = None):
+        self.queue: Deque[str] = deque(candidate_ids)
+        self.members: Set[str] = set(candidate_ids)
+        self.scores: Dict[str, int] = scores or {}
+        self.removed: Set[str] = set()
+        self.generation = generation
+        self.exhausted = len(candidate_ids) < DECK_SIZE
+        self.built_at = time.time()
+
+    def discard(self, candidate_id: str):
+        """Lazily remove a candidate (skipped on the next peek)"""
+        # Swipes on creators outside the deck must not count against live_count
+        if candidate_id in self.members:
+            self.removed.add(candidate_id)
+
+    def peek(self, count: int, excluded: Set[str]) -> List[str]:
+        """Return the next live candidates without consuming them"""
+        # Drop dead entries from the head so repeated peeks stay O(1)
+        while self.queue and (self.queue[0] in self.removed or self.queue[0] in excluded):
+            candidate_id = self.queue.popleft()
+            self.removed.discard(candidate_id)
+            self.members.discard(candidate_id)
+
+        cards = []
+        for candidate_id in self.queue:
+            if candidate_id in self.removed or candidate_id in excluded:
+                continue
+            cards.append(candidate_id)
+            if len(cards) >= count:
+                break
+        return cards
+
+    def live_count(self) -> int:
+        return len(self.queue) - len(self.removed)
+
+
+class DeckManager:
+    """Per-process store of candidate decks with background refill"""
+
+    def __init__(self):
+        self.decks: "OrderedDict[str, CandidateDeck]" = OrderedDict()
+        self.excluded: Set[str] = set()  # suspended creators
+        self.generation = 0
+        self.rebuilding: Set[str] = set()
+        self.lock = threading.Lock()
+
+    def build_candidates(self, db: Session, user_id: str) -> List[Tuple[str, int]]:
+        """Query eligible creators and rank them by compatibility"""
+        profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+        history = swipe_history.get(db, user_id)
+        
+        if profile is not None and creator_index.ready:
+            creator_index.sync(db)
+            ranked = creator_index.search(
+                profile, DECK_SIZE + 1, exclude=history,
+                confirm=lambda hits: swipe_history.confirm(db, user_id, hits)
+            )
+            return [(c, score) for c, score in ranked if c != str(user_id)][:DECK_SIZE]
+        
+        # Page through recently active creators; filter hits are confirmed in the database
+        query = eligible_creator_profiles(db).filter(User.id != user_id).order_by(
+            UserProfile.last_activity.desc().nullslast(),
+            User.created_at.desc()
+        )
+        rows = []
+        for page in range(MAX_POOL_PAGES):
+            batch = query.offset(page * CANDIDATE_POOL).limit(CANDIDATE_POOL).all()
+            swiped = swipe_history.confirm(db, user_id, [row.id for row in batch if str(row.id) in history])
+            rows.extend(row for row in batch if str(row.id) not in swiped)
+            if len(batch) < CANDIDATE_POOL or len(rows) >= CANDIDATE_POOL:
+                break
+        return [(str(rows[i].id), score) for i, score in top_k(profile, rows, DECK_SIZE)]
+
+    def rebuild(self, user_id: str, db: Optional[Session] = None):
+        """Recompute a user's deck (runs as a background task)"""
+        owns_session = db is None
+        if owns_session:
+            db = SessionLocal()
+        try:
+            with self.lock:
+                generation = self.generation
+            ranked = self.build_candidates(db, user_id)
+            candidate_ids = [candidate_id for candidate_id, _ in ranked]
+            deck = CandidateDeck(candidate_ids, generation, dict(ranked))
+            with self.lock:
+                previous = self.decks.get(user_id)
+                if previous:
+                    # Keep swipes recorded while the rebuild query was running
+                    deck.removed = previous.removed & set(candidate_ids)
+                self._store(user_id, deck)
+        except Exception as e:
+            logger.error(f"Deck rebuild failed for user {user_id}: {e}")
+        finally:
+            with self.lock:
+                self.rebuilding.discard(user_id)
+            if owns_session:
+                db.close()
+
+    def peek_cards(self, user_id: str, count: int = 10) -> Optional[List[Tuple[str, int]]]:
+        """Return the next (candidate ID, score) pairs from memory, None if there is no deck yet"""
+        with self.lock:
+            deck = self.decks.get(user_id)
+            if deck:
+                self.decks.move_to_end(user_id)
+                return [(c, deck.scores.get(c)) for c in deck.peek(count, self.excluded)]
+        return None
+
+    def next_cards(self, db: Optional[Session], user_id: str, count: int = 10) -> List[Tuple[str, int]]:
+        """Return the next (candidate ID, score) pairs, building the deck on first use"""
+        cards = self.peek_cards(user_id, count)
+        if cards is not None:
+            return cards
+
+        self.rebuild(user_id, db)
+        with self.lock:
+            deck = self.decks.get(user_id)
+            if not deck:
+                return []
+            return [(c, deck.scores.get(c)) for c in deck.peek(count, self.excluded)]
+
+    def needs_refill(self, user_id: str) -> bool:
+        """Check whether a background rebuild should be scheduled"""
+        with self.lock:
+            deck = self.decks.get(user_id)
+            if deck is None or user_id in self.rebuilding:
+                return False
+            stale = (
+                deck.generation != self.generation
+                or time.time() - deck.built_at > DECK_TTL_SECONDS
+            )
+            low = not deck.exhausted and deck.live_count() < REFILL_THRESHOLD
+            if stale or low:
+                self.rebuilding.add(user_id)
+                return True
+            return False
+
+    def record_swipe(self, swiper_id: str, swiped_id: str):
+        """Remove a swiped creator from the swiper's deck"""
+        with self.lock:
+            deck = self.decks.get(str(swiper_id))
+            if deck:
+                deck.discard(str(swiped_id))
+
+    def exclude_creator(self, user_id: str):
+        """Hide a creator from every deck (e.g. suspension)"""
+        with self.lock:
+            self.excluded.add(str(user_id))
+
+    def include_creator(self, user_id: str):
+        """Make a creator eligible again and refresh all decks"""
+        with self.lock:
+            self.excluded.discard(str(user_id))
+            self.generation += 1
+
+    def invalidate_all(self):
+        """Mark every deck stale (e.g. a new creator finished onboarding)"""
+        with self.lock:
+            self.generation += 1
+
+    def _store(self, user_id: str, deck: CandidateDeck):
+        self.decks[user_id] = deck
+        self.decks.move_to_end(user_id)
+        while len(self.decks) > MAX_DECKS:
+            self.decks.popitem(last=False)
+
+
+# Global deck manager instance
+deck_manager = DeckManager()
@@ -1,32 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from app.db.database import get_db
+from sqlalchemy import and_, or_, select
+from sqlalchemy.exc import IntegrityError
+from app.db.database import get_db, get_async_db
 from app.db.models import User, UserProfile, Swipe, Match, Chat
 from app.matching.schemas import SwipeAction, CreatorCard, MatchResponse
+from app.matching.deck import deck_manager
+from app.matching.scoring import compatibility
+from app.matching.swipe_filter import swipe_history
+from app.chat.access import chat_access
+from app.chat import summaries
 from app.auth.dependencies import get_current_user
 from typing import List
 import json
-import random
 
 router = APIRouter(prefix="/matching", tags=["matching"])
 
 @router.get("/discover", response_model=List[CreatorCard])
-def discover_creators(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    # Get users already swiped
-    swiped_users = db.query(Swipe.swiped_id).filter(Swipe.swiper_id == current_user.id).subquery()
+async def discover_creators(background_tasks: BackgroundTasks, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    user_id = str(current_user.id)
+    ranked = deck_manager.peek_cards(user_id, count=10)
+    if ranked is None:
+        # Building a deck scores the whole candidate pool; keep that CPU off the event loop
+        ranked = await run_in_threadpool(deck_manager.next_cards, None, user_id, 10)
+    candidate_ids = [candidate_id for candidate_id, _ in ranked]
+    if deck_manager.needs_refill(user_id):
+        background_tasks.add_task(deck_manager.rebuild, user_id)
     
-    # Get potential matches (exclude self and already swiped)
-    potential_matches = db.query(User, UserProfile).join(UserProfile).filter(
-        and_(
-            User.id != current_user.id,
+    if not candidate_ids:
+        return []
+    
+    # Load the cards in one query, confirming they are still eligible and were
+    # not swiped through another worker
+    already_swiped = select(Swipe.id).where(
+        Swipe.swiper_id == current_user.id,
+        Swipe.swiped_id == User.id
+    ).exists()
+    rows = (await db.execute(
+        select(User, UserProfile).join(UserProfile).where(
+            User.id.in_(candidate_ids),
             User.onboarding_completed == True,
-            ~User.id.in_(swiped_users)
+            User.is_active == True,
+            ~already_swiped
         )
-    ).limit(10).all()
+    )).all()
+    found = {str(user.id): (user, profile) for user, profile in rows}
     
     cards = []
-    for user, profile in potential_matches:
+    for candidate_id, score in ranked:
+        if candidate_id not in found:
+            deck_manager.record_swipe(user_id, candidate_id)
+            continue
+        user, profile = found[candidate_id]
         cards.append(CreatorCard(
             id=str(user.id),
             name=user.name or "Creator",
@@ -34,59 +61,86 @@ def discover_creators(current_user: User = Depends(get_current_user), db: Sessio
             profile_photo=user.profile_photo,
             niches=profile.niches or [],
             social_media=profile.social_platforms or {},
-            match_percentage=random.randint(60, 95),  # Mock AI calculation
+            match_percentage=score,
             ai_analysis=f"Great potential for collaboration in {profile.niches[0] if profile.niches else 'content creation'}"
         ))
     
     return cards
 
 @router.post("/swipe")
-def swipe_user(swipe: SwipeAction, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def swipe_user(swipe: SwipeAction, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     from app.db.models import Message
     from datetime import datetime
     import uuid
     
-    # Check if already swiped
-    existing = db.query(Swipe).filter(
-        Swipe.swiper_id == current_user.id,
-        Swipe.swiped_id == swipe.swiped_user_id
-    ).first()
+    # A UUID, not the raw string: batched inserts match RETURNING rows by value
+    try:
+        swiped_id = uuid.UUID(str(swipe.swiped_user_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user id")
     
-    if existing:
-        raise HTTPException(status_code=400, detail="Already swiped")
+    # Check if already swiped (the database is only asked on a filter hit)
+    if await swipe_history.might_have_swiped_async(current_user.id, swiped_id):
+        existing = (await db.execute(
+            select(Swipe.id).where(
+                Swipe.swiper_id == current_user.id,
+                Swipe.swiped_id == swiped_id
+            ).limit(1)
+        )).first()
+        
+        if existing:
+            raise HTTPException(status_code=400, detail="Already swiped")
     
     # Record swipe
     new_swipe = Swipe(
         swiper_id=current_user.id,
-        swiped_id=swipe.swiped_user_id,
+        swiped_id=swiped_id,
         action=swipe.action
     )
     db.add(new_swipe)
+    deck_manager.record_swipe(current_user.id, swiped_id)
     
     # Check for match if it's a like or boost
     if swipe.action in ["like", "boost"]:
-        mutual_like = db.query(Swipe).filter(
-            and_(
-                Swipe.swiper_id == swipe.swiped_user_id,
-                Swipe.swiped_id == current_user.id,
-                Swipe.action.in_(["like", "boost"])
-            )
-        ).first()
+        mutual_like = (await db.execute(
+            select(Swipe.id).where(
+                and_(
+                    Swipe.swiper_id == swiped_id,
+                    Swipe.swiped_id == current_user.id,
+                    Swipe.action.in_(["like", "boost"])
+                )
+            ).limit(1)
+        )).first()
         
         if mutual_like:
+            profiles = {
+                str(p.user_id): p for p in (await db.execute(
+                    select(UserProfile).where(
+                        UserProfile.user_id.in_([current_user.id, swiped_id])
+                    )
+                )).scalars()
+            }
+            
             # Create match
             match = Match(
                 user_a_id=current_user.id,
-                user_b_id=swipe.swiped_user_id,
-                match_percent=random.randint(70, 95)
+                user_b_id=swiped_id,
+                match_percent=compatibility(
+                    profiles.get(str(current_user.id)),
+                    profiles.get(str(swiped_id))
+                )
             )
             db.add(match)
-            db.flush()
+            await db.flush()
             
             # Create chat
             chat = Chat(match_id=match.id)
             db.add(chat)
-            db.flush()
+            await db.flush()
+            await db.run_sync(summaries.register_chat, chat, [
+                (current_user.id, summaries.ROLE_MATCH),
+                (swiped_id, summaries.ROLE_MATCH)
+            ])
             
             # Add boost message if applicable
             if swipe.action == "boost":
@@ -99,13 +153,26 @@ def swipe_user(swipe: SwipeAction, current_user: User = Depends(get_current_user
                     created_at=datetime.utcnow()
                 )
                 db.add(boost_msg)
+                await db.run_sync(summaries.record_message, boost_msg)
             
-            db.commit()
+            await _commit_swipe(db, current_user.id, swiped_id)
+            chat_access.invalidate_match(match.id)
             return {"match": True, "match_id": match.id, "chat_id": chat.id}
     
-    db.commit()
+    await _commit_swipe(db, current_user.id, swiped_id)
     return {"match": False}
 
+async def _commit_swipe(db: AsyncSession, swiper_id, swiped_id):
+    # The unique (swiper_id, swiped_id) index catches duplicates that a
+    # filter loaded in another worker could not see yet
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        swipe_history.invalidate(swiper_id)
+        raise HTTPException(status_code=400, detail="Already swiped")
+    swipe_history.record(swiper_id, swiped_id)
+
 @router.get("/matches", response_model=List[MatchResponse])
 def get_matches(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     matches = db.query(Match).filter(
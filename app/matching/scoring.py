@@ -0,0 +1,186 @@
+"""
+Compatibility Scoring Engine for Collapp
+Encodes creator profiles as NumPy feature vectors and scores them in batches
+"""
+import math
+import zlib
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from app.db.models import CollaborationType
+
+# Feature blocks: (name, dimensions, weight). Weights sum to 1.
+FEATURE_BLOCKS = [
+    ("niches", 64, 0.35),
+    ("content_types", 32, 0.15),
+    ("languages", 16, 0.10),
+    ("country", 32, 0.05),
+    ("followers", 10, 0.15),
+    ("engagement", 6, 0.10),
+    ("collaboration_types", len(CollaborationType), 0.10),
+]
+
+# Upper bounds (in %) of the engagement rate buckets
+ENGAGEMENT_BUCKETS = [1.0, 3.0, 6.0, 10.0, 20.0]
+
+NEUTRAL_SCORE = 50  # used when two profiles share no comparable data
+
+
+def _hash_token(token: str, dimensions: int) -> int:
+    """Stable hash (identical across workers) of a categorical value"""
+    return zlib.crc32(token.strip().lower().encode("utf-8")) % dimensions
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ProfileEncoder:
+    """Turns UserProfile-like objects into fixed-size feature vectors"""
+
+    def __init__(self, blocks=FEATURE_BLOCKS):
+        self.blocks = blocks
+        self.offsets = []
+        offset = 0
+        for _, dimensions, _ in blocks:
+            self.offsets.append(offset)
+            offset += dimensions
+        self.dimensions = offset
+        self.weights = np.array([weight for _, _, weight in blocks], dtype=np.float32)
+        self.collaboration_index = {c.value: i for i, c in enumerate(CollaborationType)}
+
+    def encode(self, profile) -> Tuple[np.ndarray, np.ndarray]:
+        """Encode one profile into (vector, block presence mask)"""
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        presence = np.zeros(len(self.blocks), dtype=np.float32)
+
+        for block_index, (name, dimensions, weight) in enumerate(self.blocks):
+            block = np.zeros(dimensions, dtype=np.float32)
+            getattr(self, f"_encode_{name}")(profile, block)
+            norm = np.linalg.norm(block)
+            if norm > 0:
+                # Unit blocks scaled by sqrt(weight): the dot product of two
+                # vectors is then the weighted sum of per-block cosines
+                start = self.offsets[block_index]
+                vector[start:start + dimensions] = block / norm * math.sqrt(weight)
+                presence[block_index] = 1.0
+
+        return vector, presence
+
+    def encode_many(self, profiles: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+        """Encode profiles into (n x dimensions, n x blocks) matrices"""
+        encoded = [self.encode(profile) for profile in profiles]
+        if not encoded:
+            return (
+                np.zeros((0, self.dimensions), dtype=np.float32),
+                np.zeros((0, len(self.blocks)), dtype=np.float32),
+            )
+        vectors, presence = zip(*encoded)
+        return np.vstack(vectors), np.vstack(presence)
+
+    def _encode_categories(self, values, block: np.ndarray):
+        for value in values or []:
+            if value:
+                block[_hash_token(str(value), len(block))] = 1.0
+
+    def _encode_niches(self, profile, block):
+        self._encode_categories(getattr(profile, "niches", None), block)
+
+    def _encode_content_types(self, profile, block):
+        self._encode_categories(getattr(profile, "content_types", None), block)
+
+    def _encode_languages(self, profile, block):
+        self._encode_categories(getattr(profile, "languages", None), block)
+
+    def _encode_country(self, profile, block):
+        country = getattr(profile, "country", None)
+        if country:
+            self._encode_categories([country], block)
+
+    def _encode_followers(self, profile, block):
+        counts = getattr(profile, "follower_counts", None) or {}
+        total = sum(c for c in (_to_float(v) for v in counts.values()) if c and c > 0)
+        if total <= 0:
+            return
+        # log10 buckets (1, 10, 100, ... followers), softened so that
+        # neighbouring audience sizes still count as partially similar
+        bucket = min(int(math.log10(total)), len(block) - 1)
+        block[bucket] = 1.0
+        if bucket > 0:
+            block[bucket - 1] = 0.5
+        if bucket < len(block) - 1:
+            block[bucket + 1] = 0.5
+
+    def _encode_engagement(self, profile, block):
+        rates = getattr(profile, "engagement_rates", None) or {}
+        values = [r for r in (_to_float(v) for v in rates.values()) if r is not None and r >= 0]
+        if not values:
+            return
+        # Rates may be stored as fractions (0.045) or percentages (4.5)
+        average = sum(v * 100 if v <= 1 else v for v in values) / len(values)
+        bucket = next(
+            (i for i, limit in enumerate(ENGAGEMENT_BUCKETS) if average < limit),
+            len(ENGAGEMENT_BUCKETS)
+        )
+        block[bucket] = 1.0
+        if bucket > 0:
+            block[bucket - 1] = 0.5
+        if bucket < len(block) - 1:
+            block[bucket + 1] = 0.5
+
+    def _encode_collaboration_types(self, profile, block):
+        for value in getattr(profile, "collaboration_types", None) or []:
+            key = value.value if isinstance(value, CollaborationType) else str(value)
+            if key in self.collaboration_index:
+                block[self.collaboration_index[key]] = 1.0
+
+
+def score_vectors(
+    vector: np.ndarray,
+    presence: np.ndarray,
+    candidate_vectors: np.ndarray,
+    candidate_presence: np.ndarray,
+    weights: np.ndarray
+) -> np.ndarray:
+    """Score one encoded profile against a matrix of candidates (0-100)"""
+    if len(candidate_vectors) == 0:
+        return np.zeros(0, dtype=np.int32)
+
+    similarity = candidate_vectors @ vector
+    # Only blocks filled in on both sides count towards the maximum score
+    shared_weight = candidate_presence @ (presence * weights)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(shared_weight > 0, similarity / shared_weight, NEUTRAL_SCORE / 100)
+    return np.clip(np.rint(scores * 100), 0, 100).astype(np.int32)
+
+
+def score_candidates(profile, candidate_profiles: Sequence) -> np.ndarray:
+    """Compatibility scores (0-100) of a profile against many candidates"""
+    vector, presence = profile_encoder.encode(profile)
+    candidate_vectors, candidate_presence = profile_encoder.encode_many(candidate_profiles)
+    return score_vectors(vector, presence, candidate_vectors, candidate_presence, profile_encoder.weights)
+
+
+def top_k(profile, candidate_profiles: Sequence, k: int) -> List[Tuple[int, int]]:
+    """Return (candidate index, score) pairs of the k best candidates"""
+    scores = score_candidates(profile, candidate_profiles)
+    if len(scores) == 0:
+        return []
+    k = min(k, len(scores))
+    best = np.sort(np.argpartition(-scores, k - 1)[:k])
+    # Stable sort keeps the incoming order (e.g. recent activity) on ties
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return [(int(i), int(scores[i])) for i in best]
+
+
+def compatibility(profile_a, profile_b) -> int:
+    """Compatibility score (0-100) between two profiles"""
+    if profile_a is None or profile_b is None:
+        return NEUTRAL_SCORE
+    return int(score_candidates(profile_a, [profile_b])[0])
+
+
+# Global encoder instance
+profile_encoder = ProfileEncoder()
@@ -0,0 +1,101 @@
+"""
+Swipe History Filter for Collapp
+Per-user Bloom filters answering "has this user already swiped that creator?"
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Set
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.bloom import ScalableBloomFilter
+from app.db.database import SessionLocal
+from app.db.models import Swipe
+
+FILTER_TTL_SECONDS = 900   # rebuild so swipes made through other workers show up
+MAX_FILTERS = 10000        # LRU bound on users kept in memory
+
+
+class SwipeHistoryFilter:
+    """Per-process cache of swipe-history Bloom filters, rebuilt from the swipes table on demand"""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.filters: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.session_factory = session_factory
+
+    def cached(self, swiper_id: str) -> Optional[ScalableBloomFilter]:
+        """The swiper's filter if it is loaded and fresh, without touching the database"""
+        swiper_id = str(swiper_id)
+        with self.lock:
+            entry = self.filters.get(swiper_id)
+            if entry and time.time() - entry[1] < FILTER_TTL_SECONDS:
+                self.filters.move_to_end(swiper_id)
+                return entry[0]
+        return None
+
+    def get(self, db: Session, swiper_id: str) -> ScalableBloomFilter:
+        """Return the swiper's filter, loading it from the database if needed"""
+        history = self.cached(swiper_id)
+        if history is not None:
+            return history
+        return self.rebuild(db, swiper_id)
+
+    def load(self, swiper_id: str) -> ScalableBloomFilter:
+        """rebuild() on a session of its own, for callers that hold none"""
+        db = self.session_factory()
+        try:
+            return self.rebuild(db, swiper_id)
+        finally:
+            db.close()
+
+    def rebuild(self, db: Session, swiper_id: str) -> ScalableBloomFilter:
+        """Reload a swiper's filter from the swipes table"""
+        swiper_id = str(swiper_id)
+        history = ScalableBloomFilter()
+        history.update(str(row[0]) for row in db.query(Swipe.swiped_id).filter(Swipe.swiper_id == swiper_id))
+        with self.lock:
+            self.filters[swiper_id] = (history, time.time())
+            self.filters.move_to_end(swiper_id)
+            while len(self.filters) > MAX_FILTERS:
+                self.filters.popitem(last=False)
+        return history
+
+    def might_have_swiped(self, db: Session, swiper_id: str, swiped_id: str) -> bool:
+        """False means definitely not swiped; True must be confirmed in the database"""
+        return str(swiped_id) in self.get(db, swiper_id)
+
+    def confirm(self, db: Session, swiper_id: str, swiped_ids: Iterable[str]) -> Set[str]:
+        """Which filter hits the swiper really swiped; one IN query, none without hits"""
+        swiped_ids = [str(swiped_id) for swiped_id in swiped_ids]
+        if not swiped_ids:
+            return set()
+        return {
+            str(row[0]) for row in db.query(Swipe.swiped_id).filter(
+                Swipe.swiper_id == str(swiper_id),
+                Swipe.swiped_id.in_(swiped_ids)
+            )
+        }
+
+    async def might_have_swiped_async(self, swiper_id: str, swiped_id: str) -> bool:
+        """might_have_swiped for async callers; a rebuild reads the whole history, so it runs in the threadpool"""
+        history = self.cached(swiper_id)
+        if history is None:
+            history = await run_in_threadpool(self.load, swiper_id)
+        return str(swiped_id) in history
+
+    def invalidate(self, swiper_id: str):
+        """Forget a filter so the next check reloads it"""
+        with self.lock:
+            self.filters.pop(str(swiper_id), None)
+
+    def record(self, swiper_id: str, swiped_id: str):
+        """Keep a loaded filter in sync with a new swipe"""
+        with self.lock:
+            entry = self.filters.get(str(swiper_id))
+            if entry:
+                entry[0].add(str(swiped_id))
+
+
+# Global swipe history instance
+swipe_history = SwipeHistoryFilter()
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.db.database import get_db
+from app.db.replicas import get_read_db
 from app.db.models import User, MediaKit
 from app.mediakit.schemas import MediaKitCreate, MediaKitUpdate, MediaKitResponse
 from app.auth.dependencies import get_current_user
@@ -50,7 +51,7 @@ def get_my_media_kit(
     return media_kit
 
 @router.get("/{user_id}", response_model=MediaKitResponse)
-def get_user_media_kit(user_id: str, db: Session = Depends(get_db)):
+def get_user_media_kit(user_id: str, db: Session = Depends(get_read_db)):
     media_kit = db.query(MediaKit).filter(
         MediaKit.user_id == user_id,
         MediaKit.is_public == True
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db
 from app.db.models import User, Notification
 from app.notifications.schemas import NotificationResponse, NotificationUpdate
 from app.auth.dependencies import get_current_user
@@ -69,13 +71,15 @@ def mark_all_as_read(
     return {"message": "All notifications marked as read"}
 
 @router.get("/count")
-def get_unread_count(
+async def get_unread_count(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    count = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.is_read == False
-    ).count()
+    count = await db.scalar(
+        select(func.count()).select_from(Notification).where(
+            Notification.user_id == current_user.id,
+            Notification.is_read == False
+        )
+    )
     
     return {"unread_count": count}
\ No newline at end of file
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.db.database import get_db
+from app.db.replicas import get_read_db
 from app.db.models import User, Offer, OfferAcceptance
 from app.offers.schemas import OfferCreate, OfferUpdate, OfferResponse, OfferAcceptanceCreate, OfferAcceptanceResponse
 from app.auth.dependencies import get_current_user, get_admin_user
+from app.chat import summaries
 from typing import List
 import json
 
@@ -46,7 +48,7 @@ def get_my_offers(
 
 @router.get("/browse", response_model=List[OfferResponse])
 def browse_offers(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     limit: int = 20,
     skip: int = 0
 ):
@@ -57,7 +59,7 @@ def browse_offers(
     return offers
 
 @router.get("/{offer_id}", response_model=OfferResponse)
-def get_offer(offer_id: str, db: Session = Depends(get_db)):
+def get_offer(offer_id: str, db: Session = Depends(get_read_db)):
     offer = db.query(Offer).filter(Offer.id == offer_id).first()
     
     if not offer:
@@ -137,6 +139,10 @@ def accept_offer(
     )
     db.add(chat)
     db.flush()
+    summaries.register_chat(db, chat, [
+        (offer.creator_id, summaries.ROLE_OFFER_CREATOR),
+        (current_user.id, summaries.ROLE_OFFER_ACCEPTER)
+    ])
     
     # Add initial message
     initial_message = Message(
@@ -148,6 +154,7 @@ def accept_offer(
         created_at=datetime.utcnow()
     )
     db.add(initial_message)
+    summaries.record_message(db, initial_message)
     
     db.commit()
     db.refresh(db_acceptance)
@@ -3,18 +3,22 @@ from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.db.models import User, UserProfile
 from app.onboarding.schemas import OnboardingStep1, OnboardingStep2, OnboardingStep3, CompleteOnboarding
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_db_user
+from app.auth.principal import principal_cache
+from app.matching.ann import creator_index
+from app.matching.deck import deck_manager
 import json
 
 router = APIRouter(prefix="/onboarding", tags=["onboarding"])
 
 @router.post("/step1")
-def complete_step1(data: OnboardingStep1, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def complete_step1(data: OnboardingStep1, current_user: User = Depends(get_current_db_user), db: Session = Depends(get_db)):
     current_user.name = data.name
     current_user.bio = data.bio
     if data.profile_photo:
         current_user.profile_photo = data.profile_photo
     db.commit()
+    principal_cache.invalidate(current_user.email)
     return {"message": "Step 1 completed"}
 
 @router.post("/step2")
@@ -28,6 +32,8 @@ def complete_step2(data: OnboardingStep2, current_user: User = Depends(get_curre
     profile.content_types = data.content_types
     profile.niches = data.niches
     db.commit()
+    if current_user.onboarding_completed:
+        creator_index.upsert(current_user.id, profile)
     return {"message": "Step 2 completed"}
 
 @router.post("/step3")
@@ -42,9 +48,15 @@ def complete_step3(data: OnboardingStep3, current_user: User = Depends(get_curre
     return {"message": "Step 3 completed"}
 
 @router.post("/complete")
-def complete_onboarding(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def complete_onboarding(current_user: User = Depends(get_current_db_user), db: Session = Depends(get_db)):
     current_user.onboarding_completed = True
     db.commit()
+    principal_cache.invalidate(current_user.email)
+    
+    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+    if profile:
+        creator_index.upsert(current_user.id, profile)
+    deck_manager.invalidate_all()
     return {"message": "Onboarding completed successfully"}
 
 @router.get("/status")
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.db.database import get_db
+from app.db.replicas import get_read_db
 from app.db.models import User, UserProfile
 from app.auth.dependencies import get_current_user
 
@@ -28,7 +29,7 @@ def get_my_profile(current_user: User = Depends(get_current_user), db: Session =
     }
 
 @router.get("/{user_id}")
-def get_user_profile(user_id: str, db: Session = Depends(get_db)):
+def get_user_profile(user_id: str, db: Session = Depends(get_read_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
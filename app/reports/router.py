@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_
-from app.db.database import get_db
+from app.db.replicas import get_read_db
 from app.db.models import User, Match, Message, Swipe, WantedApplication
 from app.auth.dependencies import get_current_user
 from app.reports import schemas
@@ -10,7 +10,7 @@ from datetime import datetime, timedelta
 router = APIRouter(prefix="/reports", tags=["reports"])
 
 @router.get("/engagement", response_model=schemas.EngagementReport)
-def get_engagement_report(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_engagement_report(current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
     # Get real stats from database
     likes_received = db.query(Swipe).filter(
         Swipe.swiped_id == current_user.id,
@@ -34,7 +34,7 @@ def get_engagement_report(current_user = Depends(get_current_user), db: Session
     )
 
 @router.get("/networking", response_model=schemas.NetworkingReport)
-def get_networking_report(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_networking_report(current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
     connections_made = db.query(Match).filter(
         or_(Match.user_a_id == current_user.id, Match.user_b_id == current_user.id)
     ).count()
@@ -52,7 +52,7 @@ def get_networking_report(current_user = Depends(get_current_user), db: Session
     )
 
 @router.get("/dashboard")
-def get_dashboard_stats(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_dashboard_stats(current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
     # Last 30 days
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
     
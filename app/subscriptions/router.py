@@ -3,7 +3,8 @@ from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.db.models import User, Subscription
 from app.subscriptions.schemas import SubscriptionCreate, SubscriptionResponse, PlanFeatures
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_db_user
+from app.auth.principal import principal_cache
 from typing import List
 from datetime import datetime, timedelta
 
@@ -62,7 +63,7 @@ def get_my_subscription(
 @router.post("/upgrade")
 def upgrade_subscription(
     subscription_data: SubscriptionCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_db_user),
     db: Session = Depends(get_db)
 ):
     if subscription_data.plan not in PLANS:
@@ -99,6 +100,7 @@ def upgrade_subscription(
         current_user.plan = "FREE"
     
     db.commit()
+    principal_cache.invalidate(current_user.email)
     
     return {
         "success": True,
@@ -109,7 +111,7 @@ def upgrade_subscription(
 
 @router.post("/cancel")
 def cancel_subscription(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_db_user),
     db: Session = Depends(get_db)
 ):
     subscription = db.query(Subscription).filter(
@@ -123,9 +125,10 @@ def cancel_subscription(
         )
     
     subscription.status = "cancelled"
-    current_user.plan = "free"
+    current_user.plan = "FREE"
     
     db.commit()
+    principal_cache.invalidate(current_user.email)
     
     return {"message": "Subscription cancelled successfully"}
 
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.db.database import get_db
+from app.db.replicas import get_read_db
 from app.db.models import User, WantedPost, WantedApplication, Chat, Message
 from app.wanted.schemas import WantedPostCreate, WantedPostResponse, WantedApplicationCreate, WantedApplicationResponse
 from app.auth.dependencies import get_current_user
+from app.chat.access import chat_access
+from app.chat import summaries
 from typing import List
 
 router = APIRouter(prefix="/wanted", tags=["wanted"])
@@ -45,7 +48,7 @@ def create_wanted_post(post: WantedPostCreate, current_user: User = Depends(get_
     )
 
 @router.get("/posts", response_model=List[WantedPostResponse])
-def get_wanted_posts(db: Session = Depends(get_db)):
+def get_wanted_posts(db: Session = Depends(get_read_db)):
     posts = db.query(WantedPost, User).join(User).filter(
         WantedPost.status == "open"
     ).all()
@@ -101,8 +104,13 @@ def apply_to_wanted(application: WantedApplicationCreate, current_user: User = D
         db.add(new_chat)
         db.flush()  # Get the chat ID
         chat_id = new_chat.id
+        summaries.register_chat(db, new_chat, [
+            (wanted_post.author_id, summaries.ROLE_AUTHOR),
+            (current_user.id, summaries.ROLE_APPLICANT)
+        ])
     else:
         chat_id = existing_chat.id
+        summaries.add_participant(db, chat_id, current_user.id, summaries.ROLE_APPLICANT)
     
     new_application = WantedApplication(
         wanted_post_id=application.wanted_post_id,
@@ -120,9 +128,11 @@ def apply_to_wanted(application: WantedApplicationCreate, current_user: User = D
             message_type="text"
         )
         db.add(initial_message)
+        summaries.record_message(db, initial_message)
     
     db.commit()
     db.refresh(new_application)
+    chat_access.invalidate_wanted(application.wanted_post_id)
     
     return {
         "id": new_application.id,
@@ -177,4 +187,5 @@ def accept_application(application_id: str, current_user: User = Depends(get_cur
     db.add(chat)
     
     db.commit()
+    chat_access.invalidate_wanted(post.id)
     return {"message": "Application accepted", "chat_id": chat.id}
\ No newline at end of file
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Script para preencher chat_summaries/chat_participants com os chats existentes
+Execute: python backfill_chat_summaries.py
+"""
+import sys
+sys.path.append('/opt/render/project/src')
+
+from app.db.database import SessionLocal
+from app.chat.summaries import backfill
+
+def backfill_summaries():
+    db = SessionLocal()
+    
+    try:
+        created = backfill(db)
+        print(f"✅ {created} resumos de chat criados")
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    backfill_summaries()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Hot route throughput benchmark: requests/s of the async routes under load
+
+Run the same command against each build, started with the same worker count
+and database, e.g. the commit before the async port and the current one:
+
+    git checkout <before> && uvicorn app.main:app --workers 4
+    python benchmarks/bench_hot_routes.py --url http://localhost:8000
+
+    git checkout - && uvicorn app.main:app --workers 4
+    python benchmarks/bench_hot_routes.py --url http://localhost:8000
+
+Each route is hammered on its own by --concurrency clients for --duration
+seconds. /chat/chats is still a sync route and serves as the control: it
+should not move between builds. Pass --chat-id (a chat the benchmark user
+belongs to) to include /chat/messages. Swipes are not benchmarked, since
+every swipe needs a fresh target. All requests come from one client IP, so
+raise the per-IP rate limit first.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+import httpx
+
+ROUTES = ["/auth/me", "/notifications/count", "/matching/discover", "/chat/chats"]
+
+
+def percentile(samples, pct):
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(path, samples, counters, duration):
+    ms = [s * 1000 for s in samples]
+    print(
+        f"{path:<32} {len(ms) / duration:8.1f} req/s  p50={percentile(ms, 50):7.1f}ms "
+        f"p99={percentile(ms, 99):7.1f}ms mean={statistics.fmean(ms) if ms else float('nan'):7.1f}ms "
+        f"status={dict(sorted(counters.items(), key=str))}"
+    )
+
+
+async def worker(client, path, stop, samples, counters):
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            outcome = response.status_code
+        except httpx.HTTPError as e:
+            outcome = type(e).__name__
+        samples.append(time.perf_counter() - started)
+        counters[outcome] = counters.get(outcome, 0) + 1
+
+
+async def login(client):
+    credentials = {"email": f"bench-{uuid.uuid4().hex[:8]}@example.com", "password": "bench-password"}
+    response = await client.post("/auth/register", json=credentials)
+    if response.status_code >= 400:
+        raise SystemExit(f"Could not register benchmark user: {response.status_code} {response.text}")
+    response = await client.post("/auth/login", json=credentials)
+    if response.status_code >= 400:
+        raise SystemExit(f"Could not log in: {response.status_code} {response.text}")
+    return response.json()["access_token"]
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 8)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        token = args.token or await login(client)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        routes = list(ROUTES)
+        if args.chat_id:
+            routes.append(f"/chat/messages/{args.chat_id}?limit=30")
+
+        print(f"{args.concurrency} concurrent clients, {args.duration}s per route against {args.url}")
+        for path in routes:
+            # Warm the route (deck build, caches, pool connections) before measuring
+            await asyncio.gather(*(client.get(path) for _ in range(args.concurrency)))
+            samples, counters = [], {}
+            stop = asyncio.Event()
+            tasks = [asyncio.create_task(worker(client, path, stop, samples, counters)) for _ in range(args.concurrency)]
+            await asyncio.sleep(args.duration)
+            stop.set()
+            await asyncio.gather(*tasks)
+            report(path, samples, counters, args.duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", help="Bearer token to use instead of registering a new user")
+    parser.add_argument("--chat-id")
+    parser.add_argument("--concurrency", type=int, default=128)
+    parser.add_argument("--duration", type=float, default=10.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Login storm benchmark: latency of other routes while /auth/login is hammered
+
+Start the API, then run this script against it twice, once per hashing mode:
+
+    PASSWORD_HASH_WORKERS=0 uvicorn app.main:app     # inline hashing in the threadpool
+    uvicorn app.main:app                             # process-pool hashing (default)
+
+    python benchmarks/bench_login_storm.py --url http://localhost:8000
+
+The probe route should be a sync endpoint so it shares the anyio threadpool
+with the rest of the API. With the process pool its p99 stays close to the
+baseline; with inline hashing it grows with the number of concurrent logins.
+All requests come from one client IP, so raise the per-IP rate limit first.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+import httpx
+
+
+def percentile(samples, pct):
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, samples):
+    ms = [s * 1000 for s in samples]
+    print(
+        f"{label:<10} n={len(ms):<6} p50={percentile(ms, 50):7.1f}ms "
+        f"p95={percentile(ms, 95):7.1f}ms p99={percentile(ms, 99):7.1f}ms "
+        f"mean={statistics.fmean(ms) if ms else float('nan'):7.1f}ms"
+    )
+
+
+async def probe(client, path, stop, samples, interval):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(path)
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+async def login_loop(client, credentials, stop, counters):
+    while not stop.is_set():
+        try:
+            response = await client.post("/auth/login", json=credentials)
+            outcome = response.status_code
+        except httpx.HTTPError as e:
+            outcome = type(e).__name__
+        counters[outcome] = counters.get(outcome, 0) + 1
+
+
+async def run(args):
+    credentials = {"email": f"bench-{uuid.uuid4().hex[:8]}@example.com", "password": "bench-password"}
+    limits = httpx.Limits(max_connections=args.concurrency + 8)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        response = await client.post("/auth/register", json=credentials)
+        if response.status_code >= 400:
+            raise SystemExit(f"Could not register benchmark user: {response.status_code} {response.text}")
+
+        baseline = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, args.probe, stop, baseline, args.interval))
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await task
+
+        storm = []
+        counters = {}
+        stop = asyncio.Event()
+        tasks = [asyncio.create_task(login_loop(client, credentials, stop, counters)) for _ in range(args.concurrency)]
+        tasks.append(asyncio.create_task(probe(client, args.probe, stop, storm, args.interval)))
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    print(f"probe {args.probe} | {args.concurrency} concurrent logins for {args.duration}s")
+    report("baseline", baseline)
+    report("storm", storm)
+    total = sum(counters.values())
+    print(f"logins: {total} ({total / args.duration:.1f}/s) status={dict(sorted(counters.items(), key=str))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--probe", default="/health/")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--interval", type=float, default=0.01)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
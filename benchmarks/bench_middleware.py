@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Middleware overhead benchmark: latency each layer adds to a trivial route
+
+Drives the ASGI app in-process (no sockets, no server), so the numbers are
+the cost of the middleware code itself:
+
+    python benchmarks/bench_middleware.py --requests 20000
+
+Each configuration wraps the same one-line route. "added" is the median
+latency minus the bare route's median. The BaseHTTPMiddleware row is a
+no-op dispatch, kept as a reference for the old style.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.core import rate_limit
+from app.core.middleware import RateLimitMiddleware, LoggingMiddleware, MetricsMiddleware
+from app.core.middleware_security import SecurityMiddleware, RequestValidationMiddleware
+
+# Every request comes from one client: lift the limits so nothing is rejected
+rate_limit.ANONYMOUS_LIMIT = rate_limit.RateLimit(10 ** 9, 60)
+BENCH_LIMIT = 10 ** 9
+
+
+async def noop_dispatch(request, call_next):
+    return await call_next(request)
+
+
+CONFIGURATIONS = {
+    "bare route": [],
+    "RateLimit": [(RateLimitMiddleware, {})],
+    "Logging": [(LoggingMiddleware, {})],
+    "Security": [(SecurityMiddleware, {"max_requests_per_minute": BENCH_LIMIT, "blocklist": ["10.0.0.0/8"]})],
+    "RequestValidation": [(RequestValidationMiddleware, {})],
+    "Metrics": [(MetricsMiddleware, {})],
+    "app stack": [(RateLimitMiddleware, {}), (LoggingMiddleware, {}), (MetricsMiddleware, {})],
+    "all four": [
+        (RequestValidationMiddleware, {}),
+        (SecurityMiddleware, {"max_requests_per_minute": BENCH_LIMIT}),
+        (RateLimitMiddleware, {}),
+        (LoggingMiddleware, {}),
+    ],
+    "BaseHTTPMiddleware no-op": [(BaseHTTPMiddleware, {"dispatch": noop_dispatch})],
+}
+
+
+def build_app(layers):
+    app = FastAPI()
+
+    # async so no threadpool hop blurs the comparison
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    for cls, options in layers:
+        app.add_middleware(cls, **options)
+    return app
+
+
+async def call(app, scope):
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Like a live connection: nothing more until the client goes away
+        await asyncio.Event().wait()
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+def make_scope():
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/health",
+        "raw_path": b"/health",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"user-agent", b"bench")],
+        "client": ("203.0.113.7", 50000),
+        "server": ("localhost", 8000),
+    }
+
+
+async def measure(app, requests, warmup):
+    for _ in range(warmup):
+        await call(app, make_scope())
+    samples = []
+    for _ in range(requests):
+        scope = make_scope()
+        started = time.perf_counter()
+        await call(app, scope)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def run(args):
+    results = {}
+    for name, layers in CONFIGURATIONS.items():
+        app = build_app(layers)
+        samples = await measure(app, args.requests, args.warmup)
+        results[name] = (statistics.median(samples), sorted(samples)[int(len(samples) * 0.99) - 1])
+
+    base = results["bare route"][0]
+    print(f"{args.requests} sequential GET /health per configuration")
+    print(f"{'configuration':<26} {'p50':>9} {'p99':>9} {'added':>9}")
+    for name, (p50, p99) in results.items():
+        print(f"{name:<26} {p50 * 1e6:7.1f}us {p99 * 1e6:7.1f}us {(p50 - base) * 1e6:7.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=1000)
+    parser.add_argument("--log-level", default="INFO", help="INFO keeps the logging layer's formatting cost in")
+    args = parser.parse_args()
+    # Format records but discard them: console I/O would swamp the numbers
+    logging.basicConfig(level=args.log_level, handlers=[logging.NullHandler()])
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Script para (re)construir o índice ANN de perfis de creators
+Execute: python build_creator_index.py
+"""
+import sys
+sys.path.append('/opt/render/project/src')
+
+from app.db.database import SessionLocal
+from app.matching.ann import creator_index
+
+def build_index():
+    db = SessionLocal()
+    
+    try:
+        index = creator_index.build(db)
+        print(f"✅ Índice salvo em {creator_index.path} com {len(index)} perfis")
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    build_index()
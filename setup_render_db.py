@@ -4,6 +4,7 @@ Setup database tables for Render deployment
 """
 import psycopg2
 import sys
+from app.core.encryption import data_encryption
 
 # Render database URL
 # External Database URL for local connections
@@ -34,6 +35,7 @@ def setup_database():
         CREATE TABLE IF NOT EXISTS users (
             id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
             email VARCHAR(255) UNIQUE NOT NULL,
+            email_bidx VARCHAR(64) UNIQUE,
             hashed_password VARCHAR(255) NOT NULL,
             is_active BOOLEAN DEFAULT true,
             plan userplan DEFAULT 'free',
@@ -61,13 +63,16 @@ def setup_database():
         );
         """)
         
-        # Test user
+        # Tables created before the blind index existed
+        cur.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS email_bidx VARCHAR(64) UNIQUE;")
+        
+        # Test user (logins look users up by the email's blind index)
         print("Creating test user...")
         cur.execute("""
-        INSERT INTO users (email, hashed_password, is_active) 
-        VALUES ('test@collapp.com', '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj3QJflLxQjm', true)
-        ON CONFLICT (email) DO NOTHING;
-        """)
+        INSERT INTO users (email, email_bidx, hashed_password, is_active) 
+        VALUES ('test@collapp.com', %s, '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj3QJflLxQjm', true)
+        ON CONFLICT (email) DO UPDATE SET email_bidx = EXCLUDED.email_bidx;
+        """, (data_encryption.blind_index('test@collapp.com'),))
         
         conn.commit()
         print("✅ Database setup completed successfully!")
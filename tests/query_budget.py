@@ -0,0 +1,96 @@
+"""
+Query budget harness for Collapp
+Counts SQL statements through engine events and fails when a block of code exceeds its budget
+"""
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+_PLACEHOLDER = r"(?:\?|%\(\w+\)s|%s|:\w+|\$\d+)"
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_POSTCOMPILE = re.compile(r"\(?__\[POSTCOMPILE_\w+\]\)?")
+
+
+def normalize_statement(statement: str) -> str:
+    """Statement shape: whitespace collapsed, IN lists and VALUES tuples reduced to (...)"""
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _POSTCOMPILE.sub("(...)", statement)
+    return _PLACEHOLDER_LIST.sub("(...)", statement)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block issues more statements, or repeats a shape more often, than allowed"""
+
+
+def _sync_engines(engines) -> list:
+    if not isinstance(engines, (list, tuple)):
+        engines = [engines]
+    return [e.sync_engine if isinstance(e, AsyncEngine) else e for e in engines]
+
+
+class QueryCounter:
+    """Records every statement executed on one or more engines while the block runs.
+
+    The listeners are engine-wide, so statements issued by the app's worker
+    threads (sync routes, background tasks) and async routes are counted too.
+    """
+
+    def __init__(self, engines):
+        self.engines = _sync_engines(engines)
+        self.statements: List[str] = []
+        self.lock = threading.Lock()
+
+    def __enter__(self) -> "QueryCounter":
+        for engine in self.engines:
+            event.listen(engine, "after_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for engine in self.engines:
+            event.remove(engine, "after_cursor_execute", self._record)
+        return False
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        with self.lock:
+            self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def shapes(self) -> Counter:
+        return Counter(normalize_statement(statement) for statement in self.statements)
+
+    def repeated(self, threshold: int = 2) -> Dict[str, int]:
+        """Shapes executed at least `threshold` times (the N+1 signature)"""
+        return {shape: n for shape, n in self.shapes().items() if n >= threshold}
+
+    def report(self) -> str:
+        lines = [f"{self.count} statements:"]
+        for shape, n in self.shapes().most_common():
+            lines.append(f"  {n}x {shape}")
+        return "\n".join(lines)
+
+    def assert_budget(self, max_statements: int, max_repeats: Optional[int] = 1, label: str = "block"):
+        """Fail if the block ran more than max_statements, or one shape more than max_repeats times"""
+        problems = []
+        if self.count > max_statements:
+            problems.append(f"{label} issued {self.count} statements (budget {max_statements})")
+        if max_repeats is not None:
+            for shape, n in self.repeated(max_repeats + 1).items():
+                problems.append(f"{label} repeated a statement {n}x (allowed {max_repeats}): {shape}")
+        if problems:
+            raise QueryBudgetExceeded("\n".join(problems) + "\n" + self.report())
+
+
+@contextmanager
+def query_budget(engines, max_statements: int, max_repeats: Optional[int] = 1, label: str = "block"):
+    """Count statements on the engines and check the budget when the block exits cleanly"""
+    with QueryCounter(engines) as counter:
+        yield counter
+    counter.assert_budget(max_statements, max_repeats, label)
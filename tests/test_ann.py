@@ -0,0 +1,117 @@
+import os
+import time
+from types import SimpleNamespace
+import numpy as np
+from app.matching.ann import CreatorIndex, IVFIndex
+from app.matching.scoring import profile_encoder
+
+
+def _profile(*niches):
+    return SimpleNamespace(niches=list(niches), content_types=["video"], languages=["pt"], country="BR")
+
+
+def _snapshot(path, built_at, profiles):
+    vectors, presence = profile_encoder.encode_many(profiles.values())
+    index = IVFIndex(profile_encoder.dimensions, len(profile_encoder.blocks))
+    index.add_many(list(profiles), vectors, presence)
+    index.built_at = built_at
+    index.save(path)
+    # Make sure the reload sees a new file even within the filesystem's mtime resolution
+    os.utime(path, (time.time() + 1, time.time() + 1))
+
+
+def _reload(index: CreatorIndex):
+    index.last_reload_check = 0.0
+    index._maybe_reload()
+
+
+def test_reload_drops_changes_the_snapshot_already_has(tmp_path):
+    index = CreatorIndex(str(tmp_path / "creators.npz"))
+    index.upsert("a", _profile("tech"))
+    index.remove("b")
+
+    _snapshot(index.path, time.time(), {"a": _profile("tech")})
+    _reload(index)
+
+    assert index.pending == {}
+    assert len(index.index) == 1
+
+
+def test_reload_keeps_changes_newer_than_the_snapshot(tmp_path):
+    index = CreatorIndex(str(tmp_path / "creators.npz"))
+    built_at = time.time()
+    index.upsert("a", _profile("games"))
+    index.remove("b")
+
+    # Built before the local edits: "a" still has its old niche and "b" is still eligible
+    _snapshot(index.path, built_at - 1, {"a": _profile("tech"), "b": _profile("tech")})
+    _reload(index)
+
+    assert set(index.pending) == {"a", "b"}
+    results = index.search(_profile("games"), k=5)
+    assert [user_id for user_id, _ in results] == ["a"]
+
+    # The next snapshot includes them, and the list empties instead of growing forever
+    _snapshot(index.path, time.time(), {"a": _profile("games")})
+    _reload(index)
+    assert index.pending == {}
+
+
+def test_snapshot_round_trips_built_at(tmp_path):
+    path = str(tmp_path / "creators.npz")
+    _snapshot(path, 1234.5, {"a": _profile("tech")})
+    assert IVFIndex.load(path).built_at == 1234.5
+
+
+def test_snapshot_without_built_at_uses_file_time(tmp_path):
+    path = str(tmp_path / "creators.npz")
+    vector, presence = profile_encoder.encode(_profile("tech"))
+    np.savez_compressed(path, centroids=np.zeros((0, profile_encoder.dimensions), dtype=np.float32),
+                        vectors=vector[None], presence=presence[None], ids=np.array(["a"]))
+    assert IVFIndex.load(path).built_at == os.path.getmtime(path)
+
+
+def _ids(index: CreatorIndex):
+    return set(index.index.rows)
+
+
+def test_sync_picks_up_creators_changed_by_other_workers(db, make_user, tmp_path):
+    index = CreatorIndex(str(tmp_path / "creators.npz"))
+    first = make_user()
+    index.build(db)
+
+    # Onboarded and suspended through another worker: only the database knows
+    second = make_user()
+    first.is_active = False
+    db.commit()
+    assert _ids(index) == {str(first.id)}
+
+    index.sync(db)
+    assert _ids(index) == {str(second.id)}
+
+
+def test_restarted_worker_catches_up_from_the_snapshot(db, make_user, tmp_path):
+    path = str(tmp_path / "creators.npz")
+    first = make_user()
+    CreatorIndex(path).build(db)
+    second = make_user()
+
+    restarted = CreatorIndex(path)
+    assert restarted.ready
+    assert _ids(restarted) == {str(first.id)}
+    restarted.sync(db)
+    assert _ids(restarted) == {str(first.id), str(second.id)}
+
+
+def test_sync_runs_at_most_once_per_interval(db, make_user, tmp_path):
+    index = CreatorIndex(str(tmp_path / "creators.npz"))
+    make_user()
+    index.build(db)
+    index.sync(db)
+
+    late = make_user()
+    index.sync(db)
+    assert str(late.id) not in _ids(index)
+    index.last_sync = 0.0
+    index.sync(db)
+    assert str(late.id) in _ids(index)
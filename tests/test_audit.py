@@ -0,0 +1,151 @@
+import threading
+from datetime import datetime
+import pytest
+from app.core.audit import AuditPipeline, DatabaseSink, FileSink
+from app.db.models import AuditEvent
+
+
+class ListSink:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def write(self, events):
+        if self.fail:
+            raise RuntimeError("sink down")
+        self.batches.append([event["n"] for event in events])
+
+    def close(self):
+        pass
+
+
+def _event(n):
+    return {
+        "timestamp": datetime(2024, 1, 1, 12, 0, 0),
+        "event_type": "login_failed",
+        "user_id": None,
+        "ip_address": "10.0.0.1",
+        "user_agent": "pytest",
+        "details": {"n": n},
+        "n": n,
+    }
+
+
+def _stalled(pipeline):
+    # A writer that never runs, so the queue only fills up
+    pipeline.thread = threading.Thread(target=lambda: None)
+    return pipeline
+
+
+def _queued(pipeline):
+    return [item["n"] for item in list(pipeline.queue.queue)]
+
+
+def _resume(pipeline):
+    pipeline.thread = None
+    pipeline._start()
+
+
+@pytest.fixture
+def sink():
+    return ListSink()
+
+
+def test_events_are_written_in_batches(sink):
+    pipeline = _stalled(AuditPipeline([sink], batch_size=3, flush_interval=5.0))
+    for n in range(7):
+        pipeline.enqueue(_event(n))
+    _resume(pipeline)
+
+    assert pipeline.flush()
+    assert sink.batches == [[0, 1, 2], [3, 4, 5], [6]]
+    assert pipeline.stats() == {"queued": 0, "written": 7, "dropped": 0, "failed": 0}
+    pipeline.close()
+
+
+def test_flush_interval_bounds_a_partial_batch(sink):
+    pipeline = AuditPipeline([sink], batch_size=100, flush_interval=0.05)
+    pipeline.enqueue(_event(0))
+    pipeline.thread.join(0.3)  # still running: nothing stops it but close()
+    assert sink.batches == [[0]]
+    pipeline.close()
+
+
+def test_drop_oldest_keeps_the_newest_events(sink):
+    pipeline = _stalled(AuditPipeline([sink], queue_size=3, overflow_policy="drop_oldest"))
+    results = [pipeline.enqueue(_event(n)) for n in range(5)]
+    assert results == [True] * 5
+    assert _queued(pipeline) == [2, 3, 4]
+    assert pipeline.dropped == 2
+
+
+def test_drop_newest_keeps_the_oldest_events(sink):
+    pipeline = _stalled(AuditPipeline([sink], queue_size=3, overflow_policy="drop_newest"))
+    results = [pipeline.enqueue(_event(n)) for n in range(5)]
+    assert results == [True, True, True, False, False]
+    assert _queued(pipeline) == [0, 1, 2]
+    assert pipeline.dropped == 2
+
+
+def test_block_waits_briefly_then_drops(sink):
+    pipeline = _stalled(AuditPipeline([sink], queue_size=1, overflow_policy="block"))
+    assert pipeline.enqueue(_event(0))
+    assert not pipeline.enqueue(_event(1))
+    assert _queued(pipeline) == [0] and pipeline.dropped == 1
+
+
+def test_block_succeeds_once_the_writer_makes_room(sink):
+    pipeline = _stalled(AuditPipeline([sink], queue_size=1, overflow_policy="block"))
+    pipeline.enqueue(_event(0))
+    pipeline.queue.get_nowait()  # the writer takes the event
+    assert pipeline.enqueue(_event(1))
+    assert pipeline.dropped == 0
+
+
+def test_unknown_overflow_policy_is_rejected():
+    with pytest.raises(ValueError):
+        AuditPipeline([], overflow_policy="drop_all")
+
+
+def test_a_failing_sink_does_not_stop_the_others(sink):
+    pipeline = _stalled(AuditPipeline([ListSink(fail=True), sink], batch_size=10))
+    for n in range(3):
+        pipeline.enqueue(_event(n))
+    _resume(pipeline)
+
+    assert pipeline.flush()
+    assert sink.batches == [[0, 1, 2]]
+    assert pipeline.stats()["failed"] == 3
+    pipeline.close()
+
+
+def test_close_drains_the_queue(sink):
+    pipeline = _stalled(AuditPipeline([sink], batch_size=2, flush_interval=5.0))
+    for n in range(5):
+        pipeline.enqueue(_event(n))
+    _resume(pipeline)
+    pipeline.close()
+
+    assert sum(sink.batches, []) == [0, 1, 2, 3, 4]
+    assert pipeline.thread is None
+
+
+def test_file_sink_writes_one_line_per_event_and_rotates(tmp_path):
+    path = tmp_path / "audit" / "security.log"
+    file_sink = FileSink(str(path), max_bytes=400, rotate_seconds=0, backup_count=2)
+    for n in range(6):
+        file_sink.write([_event(n), _event(n)])
+    file_sink.close()
+
+    lines = path.read_text().splitlines()
+    assert lines and all(" - security - INFO - {" in line for line in lines)
+    assert (tmp_path / "audit" / "security.log.1").exists()
+    assert (tmp_path / "audit" / "security.log.2").exists()
+    assert not (tmp_path / "audit" / "security.log.3").exists()
+
+
+def test_database_sink_inserts_the_batch(db):
+    DatabaseSink().write([_event(0), _event(1)])
+    rows = db.query(AuditEvent).all()
+    assert [row.details["n"] for row in sorted(rows, key=lambda row: row.details["n"])] == [0, 1]
+    assert rows[0].event_type == "login_failed" and rows[0].ip_address == "10.0.0.1"
@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from sqlalchemy import event, update
+from app.auth import crud
+from app.core.encryption import data_encryption
+from app.core.security import SCHEME_PBKDF2, detect_hash_scheme, legacy_pwd_context
+from app.db.models import User
+
+PASSWORD = "Secret-passw0rd"
+
+
+@pytest.fixture
+def statements_on_event_loop(engine):
+    """Statements the sync engine ran on a thread with a running event loop"""
+    seen = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        seen.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield seen
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_login_upgrades_a_legacy_hash_without_blocking_the_loop(client, db, make_user, statements_on_event_loop):
+    user = make_user(password_hash=legacy_pwd_context.hash(PASSWORD))
+
+    response = client.post("/auth/login", json={"email": user.email, "password": PASSWORD})
+
+    assert response.status_code == 200, response.text
+    assert statements_on_event_loop == []
+    db.expire_all()
+    assert detect_hash_scheme(db.get(User, user.id).password_hash) == SCHEME_PBKDF2
+
+
+def test_login_rejects_a_wrong_password(client, make_user):
+    user = make_user(password_hash=legacy_pwd_context.hash(PASSWORD))
+    response = client.post("/auth/login", json={"email": user.email, "password": "wrong"})
+    assert response.status_code == 401
+
+
+def test_lookup_falls_back_to_email_for_rows_without_a_blind_index(client, db, make_user):
+    user = make_user(password_hash=legacy_pwd_context.hash(PASSWORD))
+    # As a row inserted with raw SQL, or before migration 009, would be
+    db.execute(update(User).where(User.id == user.id).values(email_bidx=None))
+    db.commit()
+
+    assert crud.get_user_by_email(db, user.email).id == user.id
+    response = client.post("/auth/login", json={"email": user.email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+
+
+def test_lookup_uses_the_blind_index(db, make_user):
+    user = make_user()
+    assert user.email_bidx == data_encryption.blind_index(user.email)
+    assert crud.get_user_by_email(db, user.email).id == user.id
+    assert crud.get_user_by_email(db, "nobody@example.com") is None
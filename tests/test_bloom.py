@@ -0,0 +1,54 @@
+import uuid
+from app.core.bloom import BloomFilter, ScalableBloomFilter
+
+
+def _ids(n):
+    return [str(uuid.uuid4()) for _ in range(n)]
+
+
+def test_no_false_negatives_at_capacity():
+    items = _ids(5000)
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    assert len(bloom) == 5000
+
+
+def test_no_false_negatives_past_capacity():
+    # An overfull filter gets less precise, never forgetful
+    items = _ids(2000)
+    bloom = BloomFilter(capacity=100, error_rate=0.01)
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+
+
+def test_false_positive_rate_stays_near_target():
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    for item in _ids(10000):
+        bloom.add(item)
+    false_positives = sum(probe in bloom for probe in _ids(20000))
+    assert false_positives / 20000 < 0.02
+
+
+def test_empty_filter_contains_nothing():
+    assert not any(item in BloomFilter() for item in _ids(100))
+    assert not any(item in ScalableBloomFilter() for item in _ids(100))
+
+
+def test_scalable_filter_grows_without_false_negatives():
+    items = _ids(3000)
+    bloom = ScalableBloomFilter(initial_capacity=64)
+    bloom.update(items)
+    assert len(bloom.filters) > 1
+    assert [f.capacity for f in bloom.filters] == [64 * 2 ** n for n in range(len(bloom.filters))]
+    assert all(item in bloom for item in items)
+    assert len(bloom) == 3000
+
+
+def test_scalable_filter_bounds_the_compound_error_rate():
+    bloom = ScalableBloomFilter(initial_capacity=64, error_rate=0.01)
+    bloom.update(_ids(5000))
+    false_positives = sum(probe in bloom for probe in _ids(20000))
+    assert false_positives / 20000 < 0.02
@@ -0,0 +1,322 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.orm import Session
+from starlette.websockets import WebSocketDisconnect
+import app.chat.router as chat_router
+from app.chat import summaries
+from app.chat.access import ChatParticipantsResolver, chat_access
+from app.chat.hub import ChatHub, LocalBroker
+from app.core.security import create_access_token
+from app.db.models import Chat, ChatParticipant, ChatSummary, Match, Message, WantedApplication, WantedPost
+from query_budget import QueryCounter
+
+
+@pytest.fixture
+def match_chat(db, make_user):
+    """Two matched creators and their chat"""
+    me, other = make_user(), make_user()
+    match = Match(user_a_id=me.id, user_b_id=other.id, match_percent=80)
+    db.add(match)
+    db.flush()
+    chat = Chat(match_id=match.id)
+    db.add(chat)
+    db.flush()
+    summaries.register_chat(db, chat, [(me.id, summaries.ROLE_MATCH), (other.id, summaries.ROLE_MATCH)])
+    db.commit()
+    return {"me": me, "other": other, "chat": chat}
+
+
+@pytest.fixture
+def legacy_chat(db, make_user):
+    """A wanted post conversation from before the inbox read model: no summary rows"""
+    author, applicant = make_user(), make_user()
+    post = WantedPost(author_id=author.id, title="Collab", description="Vídeo conjunto", collaboration_type="collab")
+    db.add(post)
+    db.flush()
+    chat = Chat(wanted_id=post.id)
+    db.add_all([chat, WantedApplication(wanted_post_id=post.id, applicant_id=applicant.id, message="Oi")])
+    db.flush()
+    db.add(Message(chat_id=chat.id, sender_id=applicant.id, content="Oi"))
+    db.commit()
+    return {"author": author, "applicant": applicant, "post": post, "chat": chat}
+
+
+def _inbox(client, auth_headers, user):
+    response = client.get("/chat/chats", headers=auth_headers(user))
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_backfill_puts_legacy_chats_in_the_inbox(db, client, auth_headers, legacy_chat):
+    assert _inbox(client, auth_headers, legacy_chat["author"]) == []
+
+    assert summaries.backfill(db) == 1
+    assert summaries.backfill(db) == 0
+
+    [chat] = _inbox(client, auth_headers, legacy_chat["author"])
+    assert chat["id"] == legacy_chat["chat"].id
+    assert chat["last_message"]["content"] == "Oi"
+    assert [p["id"] for p in chat["participants"]] == [str(legacy_chat["author"].id), str(legacy_chat["applicant"].id)]
+
+
+def test_backfill_joins_an_outer_transaction(engine, db, legacy_chat):
+    # How migration 005 runs it: the session must not commit alembic's transaction
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        session = Session(bind=conn)
+        assert summaries.backfill(session) == 1
+        session.close()
+        assert transaction.is_active
+        transaction.rollback()
+    db.expire_all()
+    assert db.query(ChatSummary).count() == 0
+
+
+def test_new_message_summarizes_a_legacy_chat(client, auth_headers, legacy_chat):
+    response = client.post(
+        "/chat/messages",
+        json={"chat_id": legacy_chat["chat"].id, "content": "Bora!"},
+        headers=auth_headers(legacy_chat["author"])
+    )
+    assert response.status_code == 200, response.text
+
+    [chat] = _inbox(client, auth_headers, legacy_chat["applicant"])
+    assert chat["last_message"]["content"] == "Bora!"
+    assert chat["unread_count"] == 1
+
+
+def test_new_applicant_summarizes_a_legacy_chat(db, client, make_user, auth_headers, legacy_chat):
+    newcomer = make_user()
+    response = client.post(
+        "/wanted/applications",
+        json={"wanted_post_id": legacy_chat["post"].id, "message": "Também quero"},
+        headers=auth_headers(newcomer)
+    )
+    assert response.status_code == 200, response.text
+
+    roles = dict(db.query(ChatParticipant.user_id, ChatParticipant.role).filter(
+        ChatParticipant.chat_id == legacy_chat["chat"].id
+    ).all())
+    assert roles == {
+        legacy_chat["author"].id: summaries.ROLE_AUTHOR,
+        legacy_chat["applicant"].id: summaries.ROLE_APPLICANT,
+        newcomer.id: summaries.ROLE_APPLICANT,
+    }
+    [chat] = _inbox(client, auth_headers, newcomer)
+    assert chat["last_message"]["content"] == "Também quero"
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+
+def test_local_broker_delivers_to_subscribers_of_the_chat():
+    hub = ChatHub(LocalBroker())
+    subscriber, bystander = FakeSocket(), FakeSocket()
+
+    async def scenario():
+        hub.connect("chat-1", subscriber)
+        hub.connect("chat-2", bystander)
+        # Routes publish from worker threads
+        await asyncio.get_running_loop().run_in_executor(None, hub.publish, "chat-1", {"content": "Oi"})
+        for _ in range(100):
+            if subscriber.sent:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert subscriber.sent == [{"type": "message", "message": {"content": "Oi"}}]
+    assert bystander.sent == []
+
+
+def test_disconnected_subscriber_stops_receiving():
+    hub = ChatHub(LocalBroker())
+    subscriber = FakeSocket()
+
+    async def scenario():
+        hub.connect("chat-1", subscriber)
+        hub.disconnect("chat-1", subscriber)
+        hub.publish("chat-1", {"content": "Oi"})
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert subscriber.sent == [] and not hub.connections
+
+
+def _auth_frame(user):
+    return {"type": "auth", "token": create_access_token({"sub": user.email})}
+
+
+def test_websocket_authenticates_with_the_first_frame(client, auth_headers, match_chat):
+    chat_id = match_chat["chat"].id
+    with client.websocket_connect(f"/chat/ws/{chat_id}") as websocket:
+        websocket.send_json(_auth_frame(match_chat["me"]))
+        assert websocket.receive_json() == {"type": "ready"}
+
+        response = client.post("/chat/messages", json={"chat_id": chat_id, "content": "Bora!"}, headers=auth_headers(match_chat["other"]))
+        assert response.status_code == 200, response.text
+        event = websocket.receive_json()
+        assert event["type"] == "message" and event["message"]["content"] == "Bora!"
+
+
+def test_websocket_ignores_a_token_in_the_url(client, match_chat):
+    token = create_access_token({"sub": match_chat["me"].email})
+    with client.websocket_connect(f"/chat/ws/{match_chat['chat'].id}?token={token}") as websocket:
+        websocket.send_json({"type": "ping"})
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1008
+
+
+def test_websocket_rejects_non_participants(client, make_user, match_chat):
+    with client.websocket_connect(f"/chat/ws/{match_chat['chat'].id}") as websocket:
+        websocket.send_json(_auth_frame(make_user()))
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1008
+
+
+def test_websocket_closes_when_no_auth_frame_arrives(client, match_chat, monkeypatch):
+    monkeypatch.setattr(chat_router, "WS_AUTH_TIMEOUT_SECONDS", 0.05)
+    with client.websocket_connect(f"/chat/ws/{match_chat['chat'].id}") as websocket:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1008
+
+
+def test_participants_are_allowed_from_the_cache(db, engine, match_chat):
+    resolver = ChatParticipantsResolver()
+    chat_id, other_id = match_chat["chat"].id, match_chat["other"].id
+    assert resolver.authorize(db, chat_id, match_chat["me"].id) is True
+    with QueryCounter([engine]) as queries:
+        assert resolver.authorize(db, chat_id, other_id) is True
+    assert queries.count == 0
+
+
+def test_non_participants_are_denied(db, client, make_user, auth_headers, match_chat):
+    stranger = make_user()
+    assert ChatParticipantsResolver().authorize(db, match_chat["chat"].id, stranger.id) is False
+    response = client.get(f"/chat/messages/{match_chat['chat'].id}", headers=auth_headers(stranger))
+    assert response.status_code == 403
+
+
+def test_missing_chat_is_none(db, client, auth_headers, match_chat):
+    assert ChatParticipantsResolver().authorize(db, "no-such-chat", match_chat["me"].id) is None
+    response = client.get("/chat/messages/no-such-chat", headers=auth_headers(match_chat["me"]))
+    assert response.status_code == 404
+
+
+def test_new_applicant_is_allowed_after_applying(db, client, make_user, auth_headers):
+    author, first, second = make_user(), make_user(), make_user()
+    post = WantedPost(author_id=author.id, title="Collab", description="Vídeo conjunto", collaboration_type="collab")
+    db.add(post)
+    db.commit()
+
+    def apply(user):
+        response = client.post("/wanted/applications", json={"wanted_post_id": post.id, "message": "Oi"}, headers=auth_headers(user))
+        assert response.status_code == 200, response.text
+
+    apply(first)
+    chat_id = db.query(Chat.id).filter(Chat.wanted_id == post.id).scalar()
+    assert chat_access.authorize(db, chat_id, first.id) is True
+
+    apply(second)
+    # The application dropped the cached participants instead of waiting for the TTL
+    assert chat_access.cache.get(chat_id) is None
+    assert chat_access.authorize(db, chat_id, second.id) is True
+    assert client.get(f"/chat/messages/{chat_id}", headers=auth_headers(second)).status_code == 200
+
+
+def test_denial_is_rechecked_in_the_database(db, make_user):
+    # Another worker added the applicant after this one cached the chat
+    author, applicant = make_user(), make_user()
+    post = WantedPost(author_id=author.id, title="Collab", description="Vídeo conjunto", collaboration_type="collab")
+    db.add(post)
+    db.flush()
+    chat = Chat(wanted_id=post.id)
+    db.add(chat)
+    db.commit()
+    resolver = ChatParticipantsResolver()
+    assert resolver.authorize(db, chat.id, author.id) is True
+
+    db.add(WantedApplication(wanted_post_id=post.id, applicant_id=applicant.id))
+    db.commit()
+    assert resolver.authorize(db, chat.id, applicant.id) is True
+
+
+def test_invalidate_match_drops_only_that_match(db, make_user, match_chat):
+    resolver = ChatParticipantsResolver()
+    chat = match_chat["chat"]
+    resolver.resolve(db, chat.id)
+    resolver.invalidate_match("another-match")
+    assert resolver.cache.get(chat.id) is not None
+    resolver.invalidate_match(chat.match_id)
+    assert resolver.cache.get(chat.id) is None
+
+
+@pytest.fixture
+def history(db, match_chat):
+    """75 messages, three per second, so page boundaries fall inside created_at ties"""
+    chat, me = match_chat["chat"], match_chat["me"]
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    # Ids are inserted out of order so id order, not insert order, has to break ties
+    for n in sorted(range(75), key=lambda n: (n % 3, n)):
+        db.add(Message(id=f"m{n:03d}", chat_id=chat.id, sender_id=me.id, content=f"#{n}", created_at=start + timedelta(seconds=n // 3)))
+    db.commit()
+    return [f"m{n:03d}" for n in range(75)]
+
+
+def _page(client, auth_headers, match_chat, **params):
+    response = client.get(f"/chat/messages/{match_chat['chat'].id}", params=params, headers=auth_headers(match_chat["me"]))
+    assert response.status_code == 200, response.text
+    return [message["id"] for message in response.json()]
+
+
+def test_paging_backwards_from_the_latest_page(client, auth_headers, match_chat, history):
+    latest = _page(client, auth_headers, match_chat, limit=30)
+    assert latest == history[-30:]
+    older = _page(client, auth_headers, match_chat, before=latest[0])
+    assert older == history[-60:-30]
+    assert _page(client, auth_headers, match_chat, before=older[0]) == history[:15]
+
+
+def test_pages_split_created_at_ties_without_gaps(client, auth_headers, match_chat, history):
+    # Page size 7 never lines up with the groups of three equal timestamps
+    seen = []
+    page = _page(client, auth_headers, match_chat, limit=7)
+    while page:
+        seen = page + seen
+        page = _page(client, auth_headers, match_chat, before=page[0], limit=7)
+    assert seen == history
+
+
+def test_paging_forward_with_after(client, auth_headers, match_chat, history):
+    assert _page(client, auth_headers, match_chat, after="m010", limit=5) == history[11:16]
+    assert _page(client, auth_headers, match_chat, after="m010") == history[11:41]
+    assert _page(client, auth_headers, match_chat, after="m074") == []
+
+
+def test_without_paging_every_message_is_returned_in_order(client, auth_headers, match_chat, history):
+    assert _page(client, auth_headers, match_chat) == history
+
+
+def test_bad_cursors_are_rejected(db, client, auth_headers, match_chat, history, make_user):
+    url = f"/chat/messages/{match_chat['chat'].id}"
+    headers = auth_headers(match_chat["me"])
+    assert client.get(url, params={"before": "m040", "after": "m010"}, headers=headers).status_code == 400
+
+    response = client.get(url, params={"before": "no-such-message"}, headers=headers)
+    assert response.status_code == 400 and response.json()["detail"] == "Invalid cursor"
+
+    # A message id from another chat is not a cursor here
+    other_chat = Chat(match_id=None)
+    db.add(other_chat)
+    db.flush()
+    db.add(Message(id="elsewhere", chat_id=other_chat.id, sender_id=match_chat["me"].id, content="x"))
+    db.commit()
+    assert client.get(url, params={"after": "elsewhere"}, headers=headers).status_code == 400
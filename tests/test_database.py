@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.db.database import normalize_url, to_async_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("postgresql://u:p@host/db", "postgresql+asyncpg://u:p@host/db"),
+    ("postgres://u:p@host/db", "postgresql+asyncpg://u:p@host/db"),
+    ("postgresql+psycopg2://u:p@host/db", "postgresql+asyncpg://u:p@host/db"),
+    ("postgresql+asyncpg://u:p@host/db", "postgresql+asyncpg://u:p@host/db"),
+    ("postgresql://u:p@host/db?sslmode=require", "postgresql+asyncpg://u:p@host/db?ssl=require"),
+    ("sqlite:///collapp.db", "sqlite+aiosqlite:///collapp.db"),
+])
+def test_to_async_url(url, expected):
+    assert to_async_url(url) == expected
+
+
+def test_normalize_url_only_renames_the_postgres_scheme():
+    assert normalize_url("postgres://u:p@host:5432/db") == "postgresql://u:p@host:5432/db"
+    assert normalize_url("postgresql://u:p@host/db") == "postgresql://u:p@host/db"
+    assert normalize_url("sqlite:///collapp.db") == "sqlite:///collapp.db"
+
+
+@pytest.mark.parametrize("url", ["postgres://u:p@host/db", "postgresql://u:p@host/db"])
+def test_provider_connection_string_builds_an_async_engine(url):
+    # What a connectionString override used to break at import
+    engine = create_async_engine(to_async_url(url))
+    assert engine.dialect.driver == "asyncpg"
@@ -0,0 +1,143 @@
+from sqlalchemy.orm import object_session
+from app.db.models import Swipe, UserProfile
+from app.matching.ann import creator_index
+from app.matching.deck import DECK_SIZE, DECK_TTL_SECONDS, REFILL_THRESHOLD, CandidateDeck, DeckManager
+from app.matching.swipe_filter import swipe_history
+
+
+def _creator(make_user, niches, **fields):
+    user = make_user(with_profile=False, onboarding_completed=True, **fields)
+    user.profile = UserProfile(niches=niches, content_types=["video"])
+    object_session(user).commit()
+    return user
+
+
+def test_deck_ranks_eligible_unswiped_creators(db, make_user):
+    me = _creator(make_user, ["tech", "games"])
+    best = _creator(make_user, ["tech", "games"])
+    partial = _creator(make_user, ["tech"])
+    swiped = _creator(make_user, ["tech", "games"])
+    inactive = _creator(make_user, ["tech", "games"], is_active=False)
+    unfinished = make_user(with_profile=True, onboarding_completed=False)
+    db.add(Swipe(swiper_id=me.id, swiped_id=swiped.id, action="pass"))
+    db.commit()
+
+    cards = DeckManager().next_cards(db, str(me.id), count=10)
+
+    ids = [candidate_id for candidate_id, _ in cards]
+    assert ids == [str(best.id), str(partial.id)]
+    assert cards[0][1] > cards[1][1]
+    assert not {str(me.id), str(swiped.id), str(inactive.id), str(unfinished.id)} & set(ids)
+
+
+def test_swiped_and_excluded_creators_leave_the_deck(db, make_user):
+    me = _creator(make_user, ["tech"])
+    first, second, third = (_creator(make_user, ["tech"]) for _ in range(3))
+    manager = DeckManager()
+    user_id = str(me.id)
+    assert len(manager.next_cards(db, user_id)) == 3
+
+    manager.record_swipe(user_id, str(first.id))
+    manager.exclude_creator(str(second.id))
+    assert [c for c, _ in manager.peek_cards(user_id)] == [str(third.id)]
+
+    # Re-included creators come back with the rebuild that the stale deck triggers
+    manager.include_creator(str(second.id))
+    assert manager.needs_refill(user_id)
+    manager.rebuild(user_id, db)
+    assert str(second.id) in [c for c, _ in manager.peek_cards(user_id)]
+
+
+def test_peek_does_not_consume_cards():
+    deck = CandidateDeck(["a", "b", "c"], generation=0)
+    assert deck.peek(2, set()) == ["a", "b"]
+    assert deck.peek(2, set()) == ["a", "b"]
+    deck.discard("a")
+    assert deck.peek(2, set()) == ["b", "c"]
+    assert deck.live_count() == 2
+
+
+def test_peek_cards_is_none_without_a_deck():
+    assert DeckManager().peek_cards("nobody") is None
+
+
+def test_low_deck_is_refilled_once():
+    manager = DeckManager()
+    ids = [str(n) for n in range(DECK_SIZE)]
+    manager._store("u", CandidateDeck(ids, manager.generation))
+    assert not manager.needs_refill("u")
+
+    for candidate_id in ids[:DECK_SIZE - REFILL_THRESHOLD + 1]:
+        manager.record_swipe("u", candidate_id)
+    assert manager.needs_refill("u")
+    # Already scheduled: no second background rebuild
+    assert not manager.needs_refill("u")
+
+
+def test_short_deck_is_not_refilled_for_being_low():
+    # Fewer candidates than DECK_SIZE means the pool is exhausted; rebuilding finds nothing new
+    manager = DeckManager()
+    manager._store("u", CandidateDeck(["a"], manager.generation))
+    manager.record_swipe("u", "a")
+    assert not manager.needs_refill("u")
+
+
+def test_stale_decks_are_refilled():
+    manager = DeckManager()
+    manager._store("u", CandidateDeck(["a"], manager.generation))
+    manager._store("v", CandidateDeck(["a"], manager.generation))
+
+    manager.invalidate_all()
+    assert manager.needs_refill("u")
+
+    manager.decks["v"].generation = manager.generation
+    manager.decks["v"].built_at -= DECK_TTL_SECONDS + 1
+    assert manager.needs_refill("v")
+
+
+def test_rebuild_keeps_swipes_recorded_meanwhile(db, make_user):
+    me = _creator(make_user, ["tech"])
+    first, second = _creator(make_user, ["tech"]), _creator(make_user, ["tech"])
+    manager = DeckManager()
+    user_id = str(me.id)
+    manager.next_cards(db, user_id)
+
+    # A swipe lands while the rebuild query is still running
+    manager.record_swipe(user_id, str(first.id))
+    manager.rebuild(user_id, db)
+
+    assert [c for c, _ in manager.peek_cards(user_id)] == [str(second.id)]
+
+
+def test_swipe_outside_the_deck_does_not_count_against_it():
+    deck = CandidateDeck(["a", "b"], generation=0)
+    deck.discard("not-in-deck")
+    assert deck.live_count() == 2
+
+
+def _false_positive(db, swiper, creator):
+    # Stand-in for a Bloom hit on a creator the user never swiped
+    swipe_history.get(db, swiper.id).add(str(creator.id))
+
+
+def test_filter_false_positives_stay_in_the_deck(db, make_user):
+    me = _creator(make_user, ["tech"])
+    unswiped, swiped = _creator(make_user, ["tech"]), _creator(make_user, ["tech"])
+    db.add(Swipe(swiper_id=me.id, swiped_id=swiped.id, action="pass"))
+    db.commit()
+    _false_positive(db, me, unswiped)
+
+    ids = [c for c, _ in DeckManager().next_cards(db, str(me.id), count=10)]
+    assert ids == [str(unswiped.id)]
+
+
+def test_filter_false_positives_stay_in_the_ann_deck(db, make_user):
+    me = _creator(make_user, ["tech"])
+    unswiped, swiped = _creator(make_user, ["tech"]), _creator(make_user, ["tech"])
+    db.add(Swipe(swiper_id=me.id, swiped_id=swiped.id, action="pass"))
+    db.commit()
+    creator_index.build(db)
+    _false_positive(db, me, unswiped)
+
+    ids = [c for c, _ in DeckManager().next_cards(db, str(me.id), count=10)]
+    assert ids == [str(unswiped.id)]
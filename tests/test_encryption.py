@@ -0,0 +1,71 @@
+from cryptography.fernet import Fernet
+from app.core.encryption import DataEncryption, _derive_key
+
+OLD, NEW = "old-test-key", "new-test-key"
+FIELDS = ["email", "phone"]
+
+
+def _rows():
+    return [
+        {"id": 1, "email": "ana@example.com", "phone": "+5511999990000"},
+        {"id": 2, "email": "bia@example.com", "phone": None},
+    ]
+
+
+def test_round_trip():
+    crypto = DataEncryption(OLD, previous_passwords=[])
+    token = crypto.encrypt("ana@example.com")
+    assert token != "ana@example.com"
+    assert crypto.decrypt(token) == "ana@example.com"
+    assert crypto.decrypt_rows(crypto.encrypt_rows(_rows(), FIELDS), FIELDS) == _rows()
+
+
+def test_old_key_still_decrypts_after_rotation():
+    old = DataEncryption(OLD, previous_passwords=[])
+    token = old.encrypt("ana@example.com")
+    rows = old.encrypt_rows(_rows(), FIELDS)
+
+    ring = DataEncryption(NEW, previous_passwords=[OLD])
+    assert ring.decrypt(token) == "ana@example.com"
+    assert ring.decrypt_rows(rows, FIELDS) == _rows()
+
+
+def test_new_key_alone_cannot_read_old_tokens():
+    token = DataEncryption(OLD, previous_passwords=[]).encrypt("ana@example.com")
+    assert DataEncryption(NEW, previous_passwords=[]).decrypt(token) == token
+
+
+def test_rotate_rows_moves_tokens_to_the_new_key():
+    rows = DataEncryption(OLD, previous_passwords=[]).encrypt_rows(_rows(), FIELDS)
+    rotated = DataEncryption(NEW, previous_passwords=[OLD]).rotate_rows(rows, FIELDS)
+
+    assert rotated[0]["email"] != rows[0]["email"]
+    assert rotated[1]["phone"] is None
+    # Once every row is rotated the old key can be dropped
+    assert DataEncryption(NEW, previous_passwords=[]).decrypt_rows(rotated, FIELDS) == _rows()
+    Fernet(_derive_key(NEW)).decrypt(rotated[0]["email"].encode())
+
+
+def test_rotate_rows_leaves_plaintext_and_unknown_tokens_alone():
+    stranger = DataEncryption("someone-else", previous_passwords=[]).encrypt("x@example.com")
+    rows = [{"email": "plain@example.com", "phone": stranger}]
+    assert DataEncryption(NEW, previous_passwords=[OLD]).rotate_rows(rows, FIELDS) == rows
+
+
+def test_rows_are_copied():
+    rows = _rows()
+    crypto = DataEncryption(OLD, previous_passwords=[])
+    crypto.rotate_rows(crypto.encrypt_rows(rows, FIELDS), FIELDS)
+    assert rows == _rows()
+
+
+def test_decrypt_rows_passes_plaintext_through():
+    crypto = DataEncryption(OLD, previous_passwords=[])
+    assert crypto.decrypt_rows(_rows(), FIELDS) == _rows()
+
+
+def test_blind_index_is_stable_across_key_rotation():
+    old = DataEncryption(OLD, previous_passwords=[], blind_index_password="index-key")
+    ring = DataEncryption(NEW, previous_passwords=[OLD], blind_index_password="index-key")
+    assert old.blind_index("ana@example.com") == ring.blind_index("ana@example.com")
+    assert old.blind_index("ana@example.com") != old.blind_index("bia@example.com")
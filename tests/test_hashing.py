@@ -0,0 +1,56 @@
+import asyncio
+import os
+import threading
+import pytest
+from app.core.hashing import PasswordHasher, PasswordHasherBusy, password_hasher
+from app.core.security import verify_password
+
+PASSWORD = "Secret-passw0rd"
+
+
+def test_admission_limit_rejects_instead_of_queueing():
+    hasher = PasswordHasher(workers=0, max_pending=1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.create_task(hasher._run(release.wait))
+        await asyncio.sleep(0.05)  # let the first call take the only slot
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.hash(PASSWORD)
+        release.set()
+        await first
+        # The slot is returned once the call finishes
+        return await hasher.hash(PASSWORD)
+
+    hashed = asyncio.run(scenario())
+    assert verify_password(PASSWORD, hashed)
+    assert hasher.pending == 0
+
+
+def test_busy_hasher_answers_503_with_retry_after(client, make_user, monkeypatch):
+    user = make_user()
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    login = client.post("/auth/login", json={"email": user.email, "password": PASSWORD})
+    register = client.post("/auth/register", json={"email": "new-creator@example.com", "password": PASSWORD})
+
+    for response in (login, register):
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+
+def test_broken_pool_is_replaced():
+    hasher = PasswordHasher(workers=1, max_pending=4)
+    try:
+        # A worker dying (as under the OOM killer) breaks the whole pool
+        with pytest.raises(Exception):
+            hasher._pool().submit(os._exit, 1).result(timeout=60)
+        broken = hasher.executor
+
+        hashed = asyncio.run(hasher.hash(PASSWORD))
+
+        assert verify_password(PASSWORD, hashed)
+        assert hasher.executor is not broken
+        assert hasher.pending == 0
+    finally:
+        hasher.shutdown()
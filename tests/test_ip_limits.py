@@ -0,0 +1,114 @@
+import pytest
+from app.core.ip_blocklist import CIDRBlocklist
+from app.core.rate_limit import SlidingWindowCounter
+
+T0 = 6000.0  # start of a 60s window
+
+
+def test_counts_within_one_window():
+    counter = SlidingWindowCounter(window=60)
+    assert [counter.hit("ip", T0 + n) for n in range(3)] == [1, 2, 3]
+
+
+def test_previous_window_weighs_in_fully_at_the_boundary():
+    counter = SlidingWindowCounter(window=60)
+    for _ in range(10):
+        counter.hit("ip", T0 + 59.9)
+    # First instant of the next window: the last 60s still hold all 10 requests
+    assert counter.hit("ip", T0 + 60) == pytest.approx(11)
+
+
+def test_previous_window_fades_linearly():
+    counter = SlidingWindowCounter(window=60)
+    for _ in range(10):
+        counter.hit("ip", T0 + 30)
+    assert counter.hit("ip", T0 + 90) == pytest.approx(10 * 0.5 + 1)
+    assert counter.hit("ip", T0 + 119.999) == pytest.approx(10 * (1 - 59.999 / 60) + 2)
+
+
+def test_idle_for_a_full_window_starts_over():
+    counter = SlidingWindowCounter(window=60)
+    for _ in range(10):
+        counter.hit("ip", T0)
+    assert counter.hit("ip", T0 + 120) == 1
+
+
+def test_keys_are_counted_separately_and_evicted_when_idle():
+    counter = SlidingWindowCounter(window=60, max_keys=10)
+    counter.hit("a", T0)
+    assert counter.hit("b", T0) == 1
+    counter.hit("c", T0 + 180)
+    assert list(counter.counters) == ["c"]
+
+
+def test_counter_size_is_bounded():
+    counter = SlidingWindowCounter(window=60, max_keys=2)
+    for key in "abcd":
+        counter.hit(key, T0)
+    assert len(counter.counters) <= 3 and "a" not in counter.counters
+
+
+def test_cidr_range_blocks_every_address_inside():
+    blocklist = CIDRBlocklist()
+    blocklist.block("10.1.0.0/16")
+    assert blocklist.is_blocked("10.1.0.0")
+    assert blocklist.is_blocked("10.1.255.255")
+    assert not blocklist.is_blocked("10.2.0.1")
+    assert not blocklist.is_blocked("10.0.255.255")
+
+
+def test_single_address_and_host_bits():
+    blocklist = CIDRBlocklist()
+    blocklist.block("192.168.1.7")
+    blocklist.block("172.16.5.9/24")  # host bits are ignored, like strict=False
+    assert blocklist.is_blocked("192.168.1.7")
+    assert not blocklist.is_blocked("192.168.1.8")
+    assert blocklist.is_blocked("172.16.5.200")
+
+
+def test_ipv6_and_catch_all_ranges():
+    blocklist = CIDRBlocklist()
+    blocklist.block("2001:db8::/32")
+    assert blocklist.is_blocked("2001:db8::1")
+    assert not blocklist.is_blocked("2001:db9::1")
+    assert not blocklist.is_blocked("10.0.0.1")
+
+    blocklist.block("0.0.0.0/0")
+    assert blocklist.is_blocked("8.8.8.8")
+    assert not blocklist.is_blocked("2001:db9::1")
+
+
+def test_invalid_addresses_are_not_blocked():
+    blocklist = CIDRBlocklist()
+    blocklist.block("0.0.0.0/0")
+    assert not blocklist.is_blocked("unknown")
+
+
+def test_blocks_expire_and_are_purged():
+    blocklist = CIDRBlocklist()
+    blocklist.block("10.0.0.0/8", ttl=60, now=1000.0)
+    blocklist.block("10.1.0.0/16")
+    assert blocklist.is_blocked("10.2.0.1", now=1059.0)
+    assert not blocklist.is_blocked("10.2.0.1", now=1060.0)
+    assert blocklist.is_blocked("10.1.0.1", now=1060.0)
+
+    assert blocklist.purge(now=1060.0) == 1
+    assert len(blocklist) == 1
+    assert blocklist.is_blocked("10.1.0.1", now=1060.0)
+
+
+def test_a_longer_block_is_not_shortened():
+    blocklist = CIDRBlocklist()
+    blocklist.block("10.0.0.1")
+    blocklist.block("10.0.0.1", ttl=60, now=1000.0)
+    assert blocklist.is_blocked("10.0.0.1", now=1e12)
+    assert len(blocklist) == 1
+
+
+def test_unblock():
+    blocklist = CIDRBlocklist()
+    blocklist.block("10.0.0.0/24")
+    blocklist.unblock("10.0.0.0/24")
+    blocklist.unblock("10.9.0.0/24")  # never blocked: no-op
+    assert not blocklist.is_blocked("10.0.0.1")
+    assert len(blocklist) == 0
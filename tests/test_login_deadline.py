@@ -0,0 +1,72 @@
+import asyncio
+import time
+import anyio.to_thread
+import pytest
+from fastapi import HTTPException
+from app.auth.security_enhanced import EnhancedAuthService
+from app.core.security_enhanced import LOGIN_PADDING_SECONDS, security_manager
+
+TARGET = 0.05
+
+
+def _timed(coroutine_factory):
+    async def run():
+        started = time.monotonic()
+        try:
+            await coroutine_factory()
+        except HTTPException:
+            pass
+        return time.monotonic() - started
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = EnhancedAuthService()
+
+    def authenticate(email, password, ip_address, user_agent, db):
+        if password != "right":
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        return {"email": email}
+
+    monkeypatch.setattr(service, "_authenticate_user", authenticate)
+    return service
+
+
+def test_success_and_failure_finish_in_the_same_slot(service):
+    success = _timed(lambda: service.authenticate_user("a@example.com", "right", "10.0.0.1", "pytest", None))
+    failure = _timed(lambda: service.authenticate_user("a@example.com", "wrong", "10.0.0.1", "pytest", None))
+
+    assert LOGIN_PADDING_SECONDS <= success < 2 * LOGIN_PADDING_SECONDS
+    assert LOGIN_PADDING_SECONDS <= failure < 2 * LOGIN_PADDING_SECONDS
+
+
+def test_failure_is_raised_after_the_deadline():
+    async def attempt():
+        async with security_manager.login_deadline(TARGET):
+            raise HTTPException(status_code=401)
+
+    with pytest.raises(HTTPException):
+        asyncio.run(attempt())
+    assert TARGET <= _timed(attempt) < 2 * TARGET
+
+
+def test_overruns_round_up_to_the_next_slot():
+    async def slow():
+        async with security_manager.login_deadline(TARGET):
+            await asyncio.sleep(1.4 * TARGET)
+
+    assert 2 * TARGET <= _timed(slow) < 3 * TARGET
+
+
+def test_waiting_does_not_hold_a_thread(service):
+    # 400 attempts on 40 threads: if padding held a thread this would take 10 slots
+    async def storm():
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 40
+        await asyncio.gather(*(
+            service.authenticate_user(f"{n}@example.com", "right", "10.0.0.1", "pytest", None)
+            for n in range(400)
+        ))
+
+    elapsed = _timed(storm)
+    assert LOGIN_PADDING_SECONDS <= elapsed < 3 * LOGIN_PADDING_SECONDS
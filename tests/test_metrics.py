@@ -0,0 +1,65 @@
+import time
+import pytest
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+import app.core.middleware as middleware
+from app.core.metrics import RequestStats, current_request_stats, instrument_engine
+from app.core.middleware import MetricsMiddleware
+
+BACKGROUND_SECONDS = 0.3
+
+
+@pytest.fixture
+def observations(monkeypatch):
+    seen = []
+    monkeypatch.setattr(middleware, "observe_request", lambda *args: seen.append(args))
+    return seen
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: str, background_tasks: BackgroundTasks):
+        background_tasks.add_task(time.sleep, BACKGROUND_SECONDS)
+        return {"id": item_id}
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    return app
+
+
+def test_latency_stops_before_background_tasks(observations):
+    response = TestClient(_app()).get("/items/1")
+
+    assert response.status_code == 200
+    [(method, route, status_code, seconds, _)] = observations
+    assert (method, route, status_code) == ("GET", "/items/{item_id}", 200)
+    assert seconds < BACKGROUND_SECONDS
+
+
+def test_failed_request_is_observed_once(observations):
+    client = TestClient(_app(), raise_server_exceptions=False)
+    assert client.get("/boom").status_code == 500
+    assert [(route, status_code) for _, route, status_code, _, _ in observations] == [("/boom", 500)]
+
+
+def test_failed_statement_leaves_no_timing_behind(engine):
+    instrument_engine(engine)
+    stats = RequestStats()
+    token = current_request_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+            conn.execute(text("SELECT 1"))
+            assert not any(str(key).startswith("metrics") for key in conn.info)
+    finally:
+        current_request_stats.reset(token)
+
+    assert stats.statements == 1
@@ -0,0 +1,16 @@
+from app.db.models import ChatSummary, Message, Offer
+
+
+def test_accept_offer_records_the_first_message(client, db, make_user, auth_headers):
+    creator, accepter = make_user(), make_user()
+    offer = Offer(creator_id=creator.id, title="Collab", description="Vídeo conjunto", delivery_time=7, status="active")
+    db.add(offer)
+    db.commit()
+
+    response = client.post(f"/offers/{offer.id}/accept", json={"offer_id": str(offer.id), "message": "Topo!"}, headers=auth_headers(accepter))
+
+    assert response.status_code == 200, response.text
+    db.expire_all()
+    summary = db.query(ChatSummary).one()
+    message = db.get(Message, summary.last_message_id)
+    assert message is not None and message.message_type == "offer_acceptance"
@@ -0,0 +1,84 @@
+import pytest
+from fastapi import HTTPException
+from app.auth.crud import update_user_password
+from app.auth.dependencies import get_current_db_user
+from app.auth.principal import UserPrincipal, principal_cache
+from app.db.models import User, UserPlan
+from query_budget import QueryCounter
+
+
+def _me(client, headers):
+    response = client.get("/auth/me", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_repeat_requests_are_served_from_the_cache(client, engines, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    _me(client, headers)
+    with QueryCounter(list(engines)) as queries:
+        _me(client, headers)
+    assert queries.count == 0
+
+
+def test_upgrade_and_cancel_refresh_the_plan(client, make_user, auth_headers):
+    headers = auth_headers(make_user())
+    assert _me(client, headers)["plan"] == "FREE"
+
+    assert client.post("/subscriptions/upgrade", json={"plan": "pro"}, headers=headers).status_code == 200
+    assert _me(client, headers)["plan"] == "PRO"
+
+    assert client.post("/subscriptions/cancel", headers=headers).status_code == 200
+    assert _me(client, headers)["plan"] == "FREE"
+
+
+def test_onboarding_writes_refresh_the_principal(db, client, make_user, auth_headers):
+    user = make_user(with_profile=False)
+    headers = auth_headers(user)
+    _me(client, headers)
+
+    response = client.post("/onboarding/step1", json={"name": "Novo Nome", "bio": "Bio"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert _me(client, headers)["name"] == "Novo Nome"
+
+    assert client.post("/onboarding/complete", headers=headers).status_code == 200
+    assert principal_cache.cache.get(user.email) is None
+    assert client.get("/onboarding/status", headers=headers).json()["onboarding_completed"] is True
+
+
+def test_moderation_drops_the_cached_principal(client, make_user, auth_headers):
+    admin, user = make_user(is_admin=True), make_user()
+    email, user_id = user.email, user.id
+    _me(client, auth_headers(user))
+    assert principal_cache.cache.get(email).is_active
+
+    response = client.post(f"/admin/moderate/user/{user_id}", params={"action": "suspend"}, headers=auth_headers(admin))
+    assert response.status_code == 200, response.text
+    assert principal_cache.cache.get(email) is None
+
+
+def test_password_change_drops_the_cached_principal(db, client, make_user, auth_headers):
+    user = make_user()
+    _me(client, auth_headers(user))
+    update_user_password(db, user, "Nova-senha-123", hashed_password="new-hash")
+    assert principal_cache.cache.get(user.email) is None
+
+
+def test_db_user_is_the_row_of_the_request_session(db, make_user):
+    user = make_user()
+    row = get_current_db_user(UserPrincipal.from_user(user), db)
+    assert isinstance(row, User) and row in db
+    assert row.id == user.id
+
+    db.delete(row)
+    db.commit()
+    with pytest.raises(HTTPException) as error:
+        get_current_db_user(UserPrincipal.from_user(user), db)
+    assert error.value.status_code == 401
+
+
+def test_routes_that_write_the_user_persist_through_the_db_user(db, client, make_user, auth_headers):
+    user = make_user()
+    assert client.post("/subscriptions/upgrade", json={"plan": "enterprise"}, headers=auth_headers(user)).status_code == 200
+    db.expire_all()
+    assert db.get(User, user.id).plan == UserPlan.ENTERPRISE
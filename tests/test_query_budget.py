@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import text
+from query_budget import QueryBudgetExceeded, QueryCounter, normalize_statement
+
+
+def test_normalize_collapses_whitespace_and_in_lists():
+    a = normalize_statement("SELECT users.id\n  FROM users WHERE users.id IN (?, ?, ?)")
+    b = normalize_statement("SELECT users.id FROM users WHERE users.id IN (%(id_1_1)s, %(id_1_2)s)")
+    assert a == "SELECT users.id FROM users WHERE users.id IN (...)"
+    assert b == a
+
+
+def test_counter_counts_statements_and_repeats(engine):
+    with QueryCounter(engine) as counter:
+        with engine.connect() as conn:
+            for value in range(3):
+                conn.execute(text("SELECT :value"), {"value": value})
+            conn.execute(text("SELECT 1 + 1"))
+
+    assert counter.count == 4
+    assert list(counter.repeated().values()) == [3]
+
+
+def test_counter_stops_listening_on_exit(engine):
+    with QueryCounter(engine) as counter:
+        pass
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert counter.count == 0
+
+
+def test_budget_fails_on_repeated_shape(engine, query_budget):
+    with pytest.raises(QueryBudgetExceeded, match="repeated a statement 2x"):
+        with query_budget(5):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT :value"), {"value": 1})
+                conn.execute(text("SELECT :value"), {"value": 2})
+
+
+def test_budget_fails_over_statement_count(engine, query_budget):
+    with pytest.raises(QueryBudgetExceeded, match="issued 2 statements \\(budget 1\\)"):
+        with query_budget(1, max_repeats=None):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
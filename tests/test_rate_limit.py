@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+from starlette.requests import Request
+from app.core.rate_limit import MemoryStore, RateLimit, RateLimiter, SQLStore
+
+LIMIT = RateLimit(3, 60)  # one request every 20s, bursting to 3
+
+
+def _request(path="/auth/login", peer="10.0.0.1", forwarded=None, token=None):
+    headers = []
+    if forwarded is not None:
+        headers.append((b"x-forwarded-for", forwarded.encode()))
+    if token is not None:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    return Request({"type": "http", "method": "POST", "path": path, "headers": headers, "client": (peer, 1234), "query_string": b""})
+
+
+def _check(limiter, request):
+    return asyncio.run(limiter.check(request))
+
+
+@pytest.fixture(params=["memory", "sql"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryStore()
+        return
+    store = SQLStore(f"sqlite:///{tmp_path / 'buckets.db'}")
+    yield store
+    store.engine.dispose()
+
+
+def test_burst_then_retry_after_one_interval(store):
+    assert [store.acquire("k", LIMIT, 1000.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert store.acquire("k", LIMIT, 1000.0) == pytest.approx(20.0)
+    # A rejected request does not push the next allowed time back
+    assert store.acquire("k", LIMIT, 1010.0) == pytest.approx(10.0)
+    assert store.acquire("k", LIMIT, 1020.0) == 0.0
+    assert store.acquire("k", LIMIT, 1020.0) == pytest.approx(20.0)
+
+
+def test_steady_rate_is_never_limited(store):
+    for n in range(10):
+        assert store.acquire("k", LIMIT, 1000.0 + n * LIMIT.interval) == 0.0
+
+
+def test_idle_bucket_refills_to_a_full_burst(store):
+    for _ in range(3):
+        store.acquire("k", LIMIT, 1000.0)
+    assert [store.acquire("k", LIMIT, 1060.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert store.acquire("k", LIMIT, 1060.0) > 0
+
+
+def test_keys_are_independent(store):
+    for _ in range(3):
+        store.acquire("a", LIMIT, 1000.0)
+    assert store.acquire("a", LIMIT, 1000.0) > 0
+    assert store.acquire("b", LIMIT, 1000.0) == 0.0
+
+
+def test_sql_store_is_shared_between_workers(tmp_path):
+    url = f"sqlite:///{tmp_path / 'buckets.db'}"
+    first, second = SQLStore(url), SQLStore(url)
+    for store in (first, second, first):
+        assert store.acquire("k", LIMIT, 1000.0) == 0.0
+    assert second.acquire("k", LIMIT, 1000.0) > 0
+
+
+def test_memory_store_evicts_full_buckets_first():
+    store = MemoryStore(max_keys=2)
+    store.acquire("old", LIMIT, 1000.0)
+    store.acquire("busy", LIMIT, 1100.0)
+    store.acquire("new", LIMIT, 1100.0)
+    assert "old" not in store.buckets
+    assert list(store.buckets) == ["busy", "new"]
+
+
+def test_memory_store_evicts_lru_keys_over_capacity():
+    store = MemoryStore(max_keys=2)
+    for key in ("a", "b", "c"):
+        store.acquire(key, LIMIT, 1000.0)
+    store.acquire("d", LIMIT, 1000.0)
+    # Eviction runs before the insert, so the store holds at most max_keys + 1
+    assert list(store.buckets) == ["b", "c", "d"]
+
+
+def test_client_ip_skips_trusted_proxies():
+    limiter = RateLimiter(MemoryStore(), trusted_proxies=1)
+    assert limiter.client_ip(_request(forwarded="1.2.3.4, 5.6.7.8")) == "5.6.7.8"
+    assert limiter.client_ip(_request(forwarded="")) == "10.0.0.1"
+    assert RateLimiter(MemoryStore(), trusted_proxies=2).client_ip(_request(forwarded="1.2.3.4, 5.6.7.8")) == "1.2.3.4"
+
+
+def test_route_buckets_are_per_forwarded_client():
+    limiter = RateLimiter(MemoryStore(), trusted_proxies=1)
+    for _ in range(10):
+        assert _check(limiter, _request(forwarded="1.1.1.1")) == 0.0
+    assert _check(limiter, _request(forwarded="1.1.1.1")) > 0
+    assert _check(limiter, _request(forwarded="2.2.2.2")) == 0.0
+
+
+def test_untrusted_forwarded_for_is_ignored():
+    # Without a trusted proxy the header is whatever the client sent
+    limiter = RateLimiter(MemoryStore(), trusted_proxies=0)
+    for n in range(10):
+        assert _check(limiter, _request(forwarded=f"1.1.1.{n}")) == 0.0
+    assert _check(limiter, _request(forwarded="1.1.1.99")) > 0
+    assert list(limiter.store.buckets) == ["/auth/login:ip:10.0.0.1"]
+
+
+def test_direct_clients_are_limited_by_peer_address():
+    limiter = RateLimiter(MemoryStore(), trusted_proxies=0)
+    for _ in range(10):
+        assert _check(limiter, _request()) == 0.0
+    assert _check(limiter, _request()) > 0
+    assert _check(limiter, _request(peer="10.0.0.2")) == 0.0
@@ -0,0 +1,165 @@
+import time
+import pytest
+from sqlalchemy import create_engine, text
+import app.db.database as database
+import app.db.replicas as replicas
+from app.db.models import RecentWrite
+from app.db.replicas import ReplicaRouter
+from query_budget import QueryCounter
+
+
+def _router(engines, max_lag=5.0, sticky_seconds=10.0):
+    return ReplicaRouter(engines, max_lag=max_lag, sticky_seconds=sticky_seconds, check_interval=0.0)
+
+
+@pytest.fixture
+def replica_engines(tmp_path):
+    created = [create_engine(f"sqlite:///{tmp_path / f'replica{n}.db'}") for n in range(2)]
+    yield created
+    for engine in created:
+        engine.dispose()
+
+
+def _bind(session):
+    try:
+        return session.get_bind()
+    finally:
+        session.close()
+
+
+def test_no_replicas_reads_from_primary(engine):
+    assert _bind(_router([]).session("someone@example.com")) is engine
+
+
+def test_healthy_replicas_take_turns(replica_engines):
+    router = _router(replica_engines)
+    router.lag_query = text("SELECT 0")
+    binds = [_bind(router.session()) for _ in range(4)]
+    assert binds == replica_engines * 2
+
+
+def test_lagging_replica_fails_back_to_primary(engine, replica_engines):
+    router = _router(replica_engines[:1], max_lag=5.0)
+    router.lag_query = text("SELECT 30")
+    assert _bind(router.session()) is engine
+    assert router.stats()[0]["healthy"] and router.stats()[0]["lag_seconds"] == 30
+
+
+def test_unreachable_replica_fails_back_to_primary(engine, tmp_path):
+    router = _router([create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")])
+    router.lag_query = text("SELECT 0")
+    assert _bind(router.session()) is engine
+    assert not router.stats()[0]["healthy"]
+
+
+def test_recent_writer_reads_from_primary(db, engine, replica_engines):
+    router = _router(replica_engines[:1])
+    router.lag_query = text("SELECT 0")
+    router.record_write("writer@example.com")
+    assert _bind(router.session("writer@example.com")) is engine
+    assert _bind(router.session("reader@example.com")) is replica_engines[0]
+
+
+def test_sticky_window_covers_max_lag():
+    assert _router([], max_lag=30.0, sticky_seconds=10.0).recent_writers.ttl == 30.0
+
+
+@pytest.fixture
+def replica_router(engine, monkeypatch):
+    """A router whose one replica is a second engine on the test database"""
+    replica = create_engine(engine.url, connect_args={"check_same_thread": False} if engine.dialect.name == "sqlite" else {})
+    router = _router([replica])
+    router.lag_query = text("SELECT 0")
+    monkeypatch.setattr(replicas, "replica_router", router)
+    yield router
+    replica.dispose()
+
+
+def test_read_routes_use_the_replica(client, make_user, replica_router):
+    make_user()
+    replica = replica_router.replicas[0].engine
+
+    with QueryCounter([replica]) as on_replica, QueryCounter([database.SessionLocal.kw["bind"]]) as on_primary:
+        response = client.get("/offers/browse")
+
+    assert response.status_code == 200
+    assert on_replica.count > 0 and on_primary.count == 0
+
+
+def test_write_keeps_the_writer_on_the_primary(client, make_user, auth_headers, replica_router):
+    user, other = make_user(), make_user()
+    offer = {"title": "Collab", "description": "Vídeo conjunto", "delivery_time": 7}
+
+    response = client.post("/offers/create", json=offer, headers=auth_headers(user))
+    assert response.status_code == 200, response.text
+    assert replica_router.recent_writers.get(user.email)
+    assert not replica_router.recent_writers.get(other.email)
+
+    # The public page follows the bearer token, so the writer sees the new offer
+    replica = replica_router.replicas[0].engine
+    with QueryCounter([replica]) as on_replica:
+        client.get("/offers/browse", headers=auth_headers(user))
+    assert on_replica.count == 0
+    with QueryCounter([replica]) as on_replica:
+        client.get("/offers/browse", headers=auth_headers(other))
+    assert on_replica.count > 0
+
+
+def test_reads_do_not_make_a_reader_sticky(client, make_user, auth_headers, replica_router):
+    user = make_user()
+    assert client.get("/reports/dashboard", headers=auth_headers(user)).status_code == 200
+    assert not replica_router.recent_writers.get(user.email)
+
+
+def test_async_write_keeps_the_writer_on_the_primary(client, db, make_user, auth_headers, replica_router):
+    user, other = make_user(), make_user()
+    swipe = {"swiped_user_id": str(other.id), "action": "like"}
+    assert client.post("/matching/swipe", json=swipe, headers=auth_headers(user)).status_code == 200
+    assert replica_router.recent_writers.get(user.email)
+    assert db.get(RecentWrite, user.email) is not None
+
+
+def test_write_through_another_worker_keeps_the_writer_on_the_primary(db, engine, replica_engines):
+    # Two routers stand in for two workers sharing one primary
+    writer_worker, reader_worker = _router(replica_engines[:1]), _router(replica_engines[:1])
+    reader_worker.lag_query = text("SELECT 0")
+    writer_worker.share_write(db, "writer@example.com")
+    db.commit()
+
+    assert _bind(reader_worker.session("writer@example.com")) is engine
+    assert _bind(reader_worker.session("reader@example.com")) is replica_engines[0]
+
+
+def test_shared_write_expires_with_the_sticky_window(db, replica_engines):
+    router = _router(replica_engines[:1], max_lag=5.0, sticky_seconds=10.0)
+    router.lag_query = text("SELECT 0")
+    router.share_write(db, "writer@example.com", now=time.time() - 11)
+    db.commit()
+    assert _bind(router.session("writer@example.com")) is replica_engines[0]
+
+
+def test_unreadable_recent_writes_read_from_the_primary(engine, replica_engines):
+    # No schema at all: the router cannot tell, so it takes the safe side
+    router = _router(replica_engines[:1])
+    router.lag_query = text("SELECT 0")
+    assert _bind(router.session("someone@example.com")) is engine
+
+
+def test_request_writes_are_shared_in_their_transaction(client, db, make_user, auth_headers, replica_router):
+    user = make_user()
+    offer = {"title": "Collab", "description": "Vídeo conjunto", "delivery_time": 7}
+    assert client.post("/offers/create", json=offer, headers=auth_headers(user)).status_code == 200
+    assert db.get(RecentWrite, user.email) is not None
+
+    # A fresh process has nothing cached but still keeps the writer on the primary
+    replica_router.recent_writers.clear()
+    replica = replica_router.replicas[0].engine
+    with QueryCounter([replica]) as on_replica:
+        client.get("/offers/browse", headers=auth_headers(user))
+    assert on_replica.count == 0
+
+
+def test_reads_write_no_recent_writes_row(client, db, make_user, auth_headers, replica_router):
+    user = make_user()
+    assert client.get("/reports/dashboard", headers=auth_headers(user)).status_code == 200
+    assert db.get(RecentWrite, user.email) is None
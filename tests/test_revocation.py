@@ -0,0 +1,34 @@
+import math
+import time
+from app.core.revocation import revocation_store
+from app.core.security import create_access_token, verify_token
+
+
+def test_subject_revocation_spares_tokens_issued_right_after(db, make_user, client, auth_headers):
+    user = make_user()
+    before = auth_headers(user)
+
+    revocation_store.revoke_subject(user.email)
+    after = auth_headers(user)  # e.g. the login that follows a password reset, same second
+
+    assert client.get("/auth/me", headers=before).status_code == 401
+    assert client.get("/auth/me", headers=after).status_code == 200
+
+
+def test_whole_second_iat_from_the_same_second_is_revoked(db):
+    # Tokens minted before iat carried sub-second precision
+    revocation_store.revoke_subject("legacy@example.com")
+    issued = math.floor(time.time())
+    assert revocation_store.is_revoked({"sub": "legacy@example.com", "iat": issued})
+
+
+def test_iat_keeps_sub_second_precision():
+    payload = verify_token(create_access_token({"sub": "someone@example.com"}))
+    assert isinstance(payload["iat"], float)
+
+
+def test_revoked_jti_is_rejected(db):
+    payload = verify_token(create_access_token({"sub": "someone@example.com"}))
+    assert not revocation_store.is_revoked(payload)
+    revocation_store.revoke_token(payload)
+    assert revocation_store.is_revoked(payload)
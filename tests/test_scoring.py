@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+import numpy as np
+from app.matching.scoring import NEUTRAL_SCORE, compatibility, profile_encoder, score_candidates, top_k
+
+
+def _profile(**fields):
+    fields.setdefault("niches", [])
+    return SimpleNamespace(**fields)
+
+
+ME = _profile(niches=["tech", "games"], content_types=["video"], languages=["pt"], follower_counts={"ig": 12000})
+
+
+def test_identical_profiles_score_100():
+    assert compatibility(ME, _profile(**vars(ME))) == 100
+
+
+def test_scores_order_by_overlap():
+    same = _profile(niches=["tech", "games"], content_types=["video"], languages=["pt"], follower_counts={"ig": 15000})
+    some = _profile(niches=["tech", "beauty"], content_types=["video"], languages=["pt"], follower_counts={"ig": 12000})
+    none = _profile(niches=["food"], content_types=["podcast"], languages=["en"], follower_counts={"ig": 5})
+    scores = score_candidates(ME, [none, some, same])
+    assert scores[2] > scores[1] > scores[0]
+    assert all(0 <= score <= 100 for score in scores)
+
+
+def test_top_k_returns_best_first_and_keeps_input_order_on_ties():
+    candidates = [
+        _profile(niches=["food"]),
+        _profile(niches=["tech", "games"]),
+        _profile(niches=["tech"]),
+        _profile(niches=["tech", "games"]),
+    ]
+    ranked = top_k(_profile(niches=["tech", "games"]), candidates, k=3)
+    assert [index for index, _ in ranked] == [1, 3, 2]
+    assert [score for _, score in ranked] == sorted((score for _, score in ranked), reverse=True)
+
+
+def test_top_k_handles_k_beyond_and_empty_pools():
+    assert len(top_k(ME, [ME], k=10)) == 1
+    assert top_k(ME, [], k=10) == []
+
+
+def test_missing_data_is_neutral_not_zero():
+    assert compatibility(ME, None) == NEUTRAL_SCORE
+    # No block filled on both sides: nothing to compare
+    assert compatibility(_profile(niches=["tech"]), _profile(languages=["pt"])) == NEUTRAL_SCORE
+
+
+def test_only_shared_blocks_count():
+    # A candidate that left content types empty is not penalised for it
+    partial = _profile(niches=["tech", "games"])
+    assert compatibility(ME, partial) == 100
+
+
+def test_encoding_is_stable_and_case_insensitive():
+    a, _ = profile_encoder.encode(_profile(niches=["Tech ", "GAMES"]))
+    b, _ = profile_encoder.encode(_profile(niches=["tech", "games"]))
+    assert np.array_equal(a, b)
+
+
+def test_engagement_rates_accept_fractions_or_percentages():
+    fraction = _profile(engagement_rates={"ig": 0.045})
+    percent = _profile(engagement_rates={"ig": 4.5})
+    assert compatibility(fraction, percent) == 100
@@ -0,0 +1,48 @@
+import asyncio
+from app.db.models import Swipe
+from app.matching.swipe_filter import swipe_history
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def test_swipe_rebuilds_history_off_the_event_loop(client, db, make_user, auth_headers, monkeypatch):
+    user, other, seen = make_user(), make_user(), make_user()
+    db.add(Swipe(swiper_id=user.id, swiped_id=seen.id, action="pass"))
+    db.commit()
+
+    rebuilt_on_loop = []
+    rebuild = swipe_history.rebuild
+
+    def spy(db, swiper_id):
+        rebuilt_on_loop.append(_on_event_loop())
+        return rebuild(db, swiper_id)
+
+    monkeypatch.setattr(swipe_history, "rebuild", spy)
+    response = client.post("/matching/swipe", json={"swiped_user_id": str(other.id), "action": "pass"}, headers=auth_headers(user))
+
+    assert response.status_code == 200, response.text
+    assert rebuilt_on_loop == [False]
+    assert str(seen.id) in swipe_history.cached(user.id)
+    assert str(other.id) in swipe_history.cached(user.id)
+
+
+def test_repeat_swipe_is_rejected_from_the_cached_filter(client, make_user, auth_headers):
+    user, other = make_user(), make_user()
+    swipe = {"swiped_user_id": str(other.id), "action": "like"}
+    assert client.post("/matching/swipe", json=swipe, headers=auth_headers(user)).status_code == 200
+    assert client.post("/matching/swipe", json=swipe, headers=auth_headers(user)).status_code == 400
+
+
+def test_invalidate_forces_a_reload(db, make_user):
+    user = make_user()
+    assert swipe_history.cached(user.id) is None
+    swipe_history.load(user.id)
+    assert swipe_history.cached(user.id) is not None
+    swipe_history.invalidate(user.id)
+    assert swipe_history.cached(user.id) is None
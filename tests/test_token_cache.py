@@ -0,0 +1,75 @@
+import time
+from app.core.security import create_access_token, verify_token
+from app.core.security_enhanced import security_manager
+from app.core.token_cache import VerifiedTokenCache, token_cache
+
+
+def _payload(jti="j1", ttl=60.0, **claims):
+    return dict(claims, sub="creator@example.com", jti=jti, exp=time.time() + ttl)
+
+
+def test_cached_until_exp():
+    cache = VerifiedTokenCache()
+    cache.put("access", "short", _payload(ttl=0.05))
+    cache.put("access", "long", _payload(jti="j2"))
+    assert cache.get("access", "short") is not None
+    time.sleep(0.1)
+    assert cache.get("access", "short") is None
+    assert cache.get("access", "long") is not None
+
+
+def test_tokens_without_a_usable_exp_are_not_cached():
+    cache = VerifiedTokenCache()
+    cache.put("access", "no-exp", {"sub": "creator@example.com"})
+    cache.put("access", "expired", _payload(ttl=-1))
+    assert cache.get("access", "no-exp") is None
+    assert cache.get("access", "expired") is None
+
+
+def test_revoke_jti_drops_every_token_with_it():
+    cache = VerifiedTokenCache()
+    cache.put("access", "a", _payload(jti="shared"))
+    cache.put("enhanced", "a", _payload(jti="shared"))
+    cache.put("access", "b", _payload(jti="other"))
+
+    cache.revoke_jti("shared")
+    cache.revoke_jti("unknown")  # no-op
+    assert cache.get("access", "a") is None
+    assert cache.get("enhanced", "a") is None
+    assert cache.get("access", "b") is not None
+
+
+def test_callers_get_copies():
+    cache = VerifiedTokenCache()
+    cache.put("access", "a", _payload())
+    cache.get("access", "a")["sub"] = "someone-else@example.com"
+    assert cache.get("access", "a")["sub"] == "creator@example.com"
+
+
+def test_hits_and_misses_are_counted():
+    cache = VerifiedTokenCache()
+    cache.get("access", "a")
+    cache.put("access", "a", _payload())
+    cache.get("access", "a")
+    cache.get("access", "a")
+    assert cache.stats() == {"size": 1, "hits": 2, "misses": 1}
+
+
+def test_verifiers_do_not_share_entries():
+    # An access token has no aud/iss; the enhanced verifier must not accept it from the cache
+    token = create_access_token({"sub": "creator@example.com"})
+    assert verify_token(token)["sub"] == "creator@example.com"
+    assert security_manager.verify_token(token) is None
+
+    enhanced = security_manager.create_access_token({"sub": "creator@example.com"})
+    assert security_manager.verify_token(enhanced)["sub"] == "creator@example.com"
+    assert token_cache.get("enhanced", enhanced) is not None
+    assert token_cache.get("access", enhanced) is None
+
+
+def test_repeat_verification_is_a_cache_hit():
+    token = create_access_token({"sub": "creator@example.com"})
+    verify_token(token)
+    hits = token_cache.stats()["hits"]
+    assert verify_token(token)["sub"] == "creator@example.com"
+    assert token_cache.stats()["hits"] == hits + 1